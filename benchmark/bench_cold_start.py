@@ -0,0 +1,127 @@
+"""
+Benchmark the cold start of a NacosMCP server, with and without
+REGISTER_IN_BACKGROUND.
+
+Starts a stateless streamable HTTP server registering to an in-process
+FakeNacos answering each operation after ``--rtt-ms``, and prints the
+median time until the port accepts connections, until the first
+``tools/list`` request is answered and until the server is registered.
+
+    python benchmark/bench_cold_start.py --tools 50 --rtt-ms 20 --repeat 5
+"""
+
+import asyncio
+import logging
+import signal
+import socket
+import statistics
+import time
+
+import click
+import httpx
+
+from nacos_mcp_wrapper.server.nacos_mcp import NacosMCP
+from nacos_mcp_wrapper.server.nacos_settings import NacosSettings
+from nacos_mcp_wrapper.testing.fake_nacos import FakeNacos
+
+HEADERS = {
+    "Accept": "application/json, text/event-stream",
+    "Content-Type": "application/json",
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def make_server(tools: int, port: int, background: bool) -> NacosMCP:
+    nacos_settings = NacosSettings()
+    nacos_settings.SERVER_ADDR = "127.0.0.1:8848"
+    nacos_settings.SERVICE_IP = "127.0.0.1"
+    nacos_settings.RECONCILE_INTERVAL = 0
+    nacos_settings.REGISTER_IN_BACKGROUND = background
+    mcp = NacosMCP("bench-cold-start", nacos_settings=nacos_settings,
+                   port=port, log_level="WARNING", stateless_http=True,
+                   json_response=True)
+    for index in range(tools):
+        mcp.add_tool(lambda query: query, name=f"tool_{index}",
+                     description=f"Tool number {index}")
+    return mcp
+
+
+async def wait_for_bind(port: int):
+    while True:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+        except OSError:
+            await asyncio.sleep(0.001)
+            continue
+        writer.close()
+        return
+
+
+async def wait_for_first_request(client: httpx.AsyncClient, url: str):
+    while True:
+        try:
+            response = await client.post(url, headers=HEADERS, json={
+                "jsonrpc": "2.0", "id": 1, "method": "tools/list"})
+        except httpx.TransportError:
+            await asyncio.sleep(0.001)
+            continue
+        if response.status_code == 200:
+            return
+        await asyncio.sleep(0.001)
+
+
+async def cold_start(tools: int, rtt: float,
+                     background: bool) -> tuple[float, float, float]:
+    """Milliseconds until bound, until the first request is answered and
+    until registered."""
+    port = free_port()
+    mcp = make_server(tools, port, background)
+    fake = FakeNacos(latency=rtt)
+    with fake.install():
+        start = time.perf_counter()
+        serve_task = asyncio.create_task(mcp.run_streamable_http_async())
+        try:
+            await wait_for_bind(port)
+            bound = time.perf_counter() - start
+            async with httpx.AsyncClient(timeout=30) as client:
+                await wait_for_first_request(client, f"http://127.0.0.1:{port}/mcp")
+            answered = time.perf_counter() - start
+            await mcp.nacos_server.wait_until_registered()
+            registered = time.perf_counter() - start
+        finally:
+            # stopped as in production, uvicorn handles the signal
+            signal.raise_signal(signal.SIGTERM)
+            await serve_task
+    return bound * 1000, answered * 1000, registered * 1000
+
+
+async def bench(tools: int, rtt: float, repeat: int):
+    print(f"{tools} tools, {rtt * 1000:.1f} ms per nacos operation")
+    for background in (False, True):
+        results = [await cold_start(tools, rtt, background)
+                   for _ in range(repeat)]
+        bound, answered, registered = (statistics.median(values)
+                                       for values in zip(*results))
+        name = "register in background" if background else "register first"
+        print(f"{name:<24} bound {bound:7.1f} ms, first request "
+              f"{answered:7.1f} ms, registered {registered:7.1f} ms")
+
+
+@click.command()
+@click.option("--tools", default=50, help="Tools of the server")
+@click.option("--rtt-ms", default=20.0, help="Latency of each nacos operation")
+@click.option("--repeat", default=5, help="Cold starts per mode, the median is reported")
+def main(tools: int, rtt_ms: float, repeat: int):
+    logging.getLogger("nacos_mcp_wrapper").setLevel(logging.WARNING)
+    # uvicorn raises the signal it stopped on again once it stopped
+    signal.signal(signal.SIGTERM, lambda sig, frame: None)
+    asyncio.run(bench(tools, rtt_ms / 1000, repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark event store throughput and replay latency.
+
+Compares the InMemoryEventStore of the streamable HTTP example with
+``SqliteEventStore``, in memory and on disk.
+
+    python benchmark/bench_event_store.py --events 50000 --streams 100
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import click
+from mcp.types import JSONRPCMessage, JSONRPCNotification
+
+from nacos_mcp_wrapper.server.event_store import SqliteEventStore
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "example",
+                                "simple-streamablehttp"))
+from event_store import InMemoryEventStore  # noqa: E402
+
+
+def make_message(index: int) -> JSONRPCMessage:
+    return JSONRPCMessage(JSONRPCNotification(
+        jsonrpc="2.0",
+        method="notifications/message",
+        params={"level": "info", "data": f"event {index}"},
+    ))
+
+
+async def bench_store(store, events: int, streams: int) -> dict:
+    messages = [make_message(index) for index in range(events)]
+    event_ids = []
+    start = time.perf_counter()
+    for index, message in enumerate(messages):
+        event_ids.append(await store.store_event(f"stream-{index % streams}",
+                                                 message))
+    store_time = time.perf_counter() - start
+
+    replayed = 0
+
+    async def send_callback(event_message):
+        nonlocal replayed
+        replayed += 1
+
+    # resume from the middle and from near the end of the history
+    latencies = []
+    for position in (events // 2, events - streams * 2):
+        start = time.perf_counter()
+        await store.replay_events_after(event_ids[position], send_callback)
+        latencies.append(time.perf_counter() - start)
+    return {
+        "store_rate": events / store_time,
+        "replay_mid_ms": latencies[0] * 1000,
+        "replay_tail_ms": latencies[1] * 1000,
+        "replayed": replayed,
+    }
+
+
+@click.command()
+@click.option("--events", default=50000, help="Number of stored events")
+@click.option("--streams", default=100, help="Number of streams")
+def main(events: int, streams: int):
+    per_stream = events // streams + 1
+
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            stores = {
+                "in-memory (example)": InMemoryEventStore(
+                    max_events_per_stream=per_stream),
+                "sqlite :memory:": SqliteEventStore(max_events=events),
+                "sqlite file": SqliteEventStore(
+                    os.path.join(tmp_dir, "events.db"), max_events=events),
+            }
+            for name, store in stores.items():
+                result = await bench_store(store, events, streams)
+                print(f"{name:22s} store {result['store_rate']:>10.0f} ev/s"
+                      f"  replay mid {result['replay_mid_ms']:8.2f} ms"
+                      f"  replay tail {result['replay_tail_ms']:8.2f} ms"
+                      f"  ({result['replayed']} replayed)")
+                if isinstance(store, SqliteEventStore):
+                    store.close()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
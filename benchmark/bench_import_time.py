@@ -0,0 +1,86 @@
+"""
+Benchmark the import time of nacos_mcp_wrapper.
+
+Runs ``python -X importtime`` in fresh interpreters, reports the cumulative
+import time of the wrapper modules and of the heaviest dependencies, and
+checks that the nacos sdk, psutil and jsonref are not loaded at import.
+Exits with status 1 when the median exceeds the budget, so it can gate CI.
+
+The default budget leaves room for slow CI machines: the mcp sdk alone
+takes 500 to 900 ms, and an eager import of the nacos sdk and grpc adds
+about as much again.
+
+    python benchmark/bench_import_time.py --repeat 5 --budget-ms 1500
+"""
+
+import re
+import statistics
+import subprocess
+import sys
+
+import click
+
+LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+LAZY_MODULES = ("v2.nacos", "psutil", "jsonref", "grpc")
+
+
+def import_times(module: str) -> dict[str, tuple[int, int]]:
+    """Cumulative import time in microseconds and nesting depth of the
+    imports of the first two levels."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in completed.stderr.splitlines():
+        match = LINE.match(line)
+        if match is None:
+            continue
+        cumulative, indent, name = int(match.group(2)), match.group(3), match.group(4)
+        # nested imports are indented by two spaces per level
+        depth = len(indent) // 2 + 1
+        if depth <= 2:
+            times[name] = (cumulative, depth)
+    return times
+
+
+@click.command()
+@click.option("--module", default="nacos_mcp_wrapper.server.nacos_mcp",
+              help="Module to import")
+@click.option("--repeat", default=5, help="Fresh interpreters, the median is reported")
+@click.option("--top", default=10, help="Number of heaviest imports to print")
+@click.option("--budget-ms", default=1500.0,
+              help="Fail when the median import time exceeds it, 0 disables the check")
+def main(module: str, repeat: int, top: int, budget_ms: float):
+    runs = [import_times(module) for _ in range(repeat)]
+    totals = [sum(cumulative for cumulative, depth in times.values()
+                  if depth == 1) / 1000 for times in runs]
+    median = statistics.median(totals)
+
+    last = runs[-1]
+    print(f"module: {module}")
+    print(f"import time: median {median:.1f} ms, min {min(totals):.1f} ms")
+    for name, (cumulative, depth) in sorted(
+            last.items(), key=lambda item: -item[1][0])[:top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {'  ' * (depth - 1)}{name}")
+
+    completed = subprocess.run(
+        [sys.executable, "-c",
+         f"import sys, {module}; print(' '.join(sys.modules))"],
+        capture_output=True, text=True, check=True,
+    )
+    loaded = completed.stdout.split()
+    eager = sorted({lazy for lazy in LAZY_MODULES for name in loaded
+                    if name == lazy or name.startswith(lazy + ".")})
+    failed = False
+    if eager:
+        print(f"loaded at import, expected lazily: {', '.join(eager)}")
+        failed = True
+    if budget_ms and median > budget_ms:
+        print(f"over budget: {median:.1f} ms > {budget_ms:.1f} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
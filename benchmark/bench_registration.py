@@ -0,0 +1,179 @@
+"""
+Benchmark the registration of a server to nacos, against an in-process fake.
+
+Runs ``register_to_nacos`` of a NacosServer with ``--tools`` tools on a
+FakeNacos answering each operation after ``--rtt-ms``, and prints the
+nacos operations of:
+
+- the first release of the server, plus its instance registration
+- a restart, the server being already released
+- a restart of a stdio server with STDIO_FAST_PATH and CACHE_DIR
+- a restart with the first release attempts failing
+
+Times are medians, until ``register_to_nacos`` returns and until the
+server is registered.
+
+Then pushes ``--pushes`` tool description changes to a registered server
+and prints the pushes received versus applied.
+
+    python benchmark/bench_registration.py --tools 50 --rtt-ms 5 --repeat 5
+"""
+
+import asyncio
+import logging
+import statistics
+import tempfile
+import time
+
+import click
+import mcp.types as types
+
+from nacos_mcp_wrapper.server.nacos_server import NacosServer
+from nacos_mcp_wrapper.server.nacos_settings import NacosSettings
+from nacos_mcp_wrapper.testing.fake_nacos import FakeNacos
+
+SERVER_NAME = "bench-registration"
+
+
+def make_settings(cache_dir: str | None = None) -> NacosSettings:
+    nacos_settings = NacosSettings()
+    nacos_settings.SERVER_ADDR = "127.0.0.1:8848"
+    nacos_settings.SERVICE_IP = "127.0.0.1"
+    nacos_settings.REGISTER_RETRY_BASE_DELAY = 0.01
+    nacos_settings.RECONCILE_INTERVAL = 0
+    nacos_settings.SUBSCRIBE_QUIET_WINDOW = 0.05
+    nacos_settings.SUBSCRIBE_MAX_DELAY = 0.2
+    if cache_dir is not None:
+        nacos_settings.CACHE_DIR = cache_dir
+        nacos_settings.STDIO_FAST_PATH = True
+    return nacos_settings
+
+
+def make_server(tools: int, nacos_settings: NacosSettings) -> NacosServer:
+    server = NacosServer(SERVER_NAME, nacos_settings=nacos_settings,
+                         version="1.0.0")
+    tool_list = [
+        types.Tool(
+            name=f"tool_{index}",
+            description=f"Tool number {index}",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "query": {"type": "string", "description": "Query"},
+                    "limit": {"type": "integer", "default": 10},
+                    "filters": {"$ref": "#/$defs/filters"},
+                },
+                "required": ["query"],
+                "$defs": {"filters": {
+                    "type": "object",
+                    "properties": {"tags": {"type": "array",
+                                            "items": {"type": "string"}}},
+                }},
+            },
+        )
+        for index in range(tools)
+    ]
+
+    @server.list_tools()
+    async def list_tools() -> list[types.Tool]:
+        return tool_list
+
+    return server
+
+
+async def register(fake: FakeNacos, tools: int, transport: str,
+                   nacos_settings: NacosSettings) -> tuple[float, float, NacosServer]:
+    """Milliseconds until register_to_nacos returns and until the server
+    is registered, the stdio fast path subscribes in background."""
+    server = make_server(tools, nacos_settings)
+    with fake.install():
+        start = time.perf_counter()
+        await server.register_to_nacos(transport, port=18000)
+        returned = time.perf_counter() - start
+        await server.wait_until_registered()
+        registered = time.perf_counter() - start
+    return returned * 1000, registered * 1000, server
+
+
+async def run_scenario(name: str, tools: int, rtt: float, repeat: int,
+                       transport: str = "sse", released: bool = False,
+                       failures: int = 0, fast_path: bool = False):
+    returned_times, registered_times = [], []
+    calls = None
+    for _ in range(repeat):
+        fake = FakeNacos(latency=rtt)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache_dir = cache_dir if fast_path else None
+            if released or fast_path:
+                _, _, server = await register(fake, tools, transport,
+                                              make_settings(cache_dir))
+                await server.close()
+                fake.calls.clear()
+            if failures:
+                fake.fail("get_mcp_server", times=failures)
+                fake.fail("release_mcp_server", times=failures)
+            returned, registered, server = await register(
+                fake, tools, transport, make_settings(cache_dir))
+            await server.close()
+        returned_times.append(returned)
+        registered_times.append(registered)
+        calls = fake.calls
+    print(f"{name:<26} returned {statistics.median(returned_times):7.1f} ms, "
+          f"registered {statistics.median(registered_times):7.1f} ms  "
+          f"{', '.join(f'{op}={count}' for op, count in sorted(calls.items()))}")
+
+
+async def run_push_storm(tools: int, pushes: int, interval: float):
+    fake = FakeNacos()
+    _, _, server = await register(fake, tools, "sse", make_settings())
+
+    def change(server_detail_info, index):
+        tool = server_detail_info.toolSpec.tools[index % tools]
+        tool.description = f"Tool number {index % tools}, revision {index}"
+
+    # the subscription notified the server once already
+    await server.flush_subscription_updates()
+    before = server.subscription_counters
+    start = time.perf_counter()
+    await fake.push_storm(SERVER_NAME, pushes, interval, change)
+    pushed = time.perf_counter() - start
+    # apply the end of the burst still waiting for its quiet window
+    await server.flush_subscription_updates()
+    counters = {name: count - before[name]
+                for name, count in server.subscription_counters.items()}
+    print(f"push storm: {pushes} pushes in {pushed * 1000:.1f} ms, "
+          f"received {counters['received']}, applied {counters['applied']}")
+    await server.close()
+
+
+async def bench(tools: int, rtt: float, repeat: int, pushes: int,
+                push_interval: float):
+    print(f"{tools} tools, {rtt * 1000:.1f} ms per nacos operation")
+    await run_scenario("first release", tools, rtt, repeat)
+    await run_scenario("already released", tools, rtt, repeat, released=True)
+    await run_scenario("stdio, released", tools, rtt, repeat,
+                       transport="stdio", released=True)
+    await run_scenario("stdio, fast path", tools, rtt, repeat,
+                       transport="stdio", fast_path=True)
+    await run_scenario("first release, 2 failures", tools, rtt, repeat,
+                       failures=2)
+    if pushes:
+        await run_push_storm(tools, pushes, push_interval)
+
+
+@click.command()
+@click.option("--tools", default=50, help="Tools of the server")
+@click.option("--rtt-ms", default=5.0, help="Latency of each nacos operation")
+@click.option("--repeat", default=5, help="Registrations per scenario, the median is reported")
+@click.option("--pushes", default=200, help="Subscription pushes of the push storm, 0 skips it")
+@click.option("--push-interval-ms", default=1.0, help="Delay between two pushes")
+def main(tools: int, rtt_ms: float, repeat: int, pushes: int,
+         push_interval_ms: float):
+    # the injected failures are logged as errors
+    logging.getLogger("nacos_mcp_wrapper").setLevel(logging.CRITICAL)
+    asyncio.run(bench(tools, rtt_ms / 1000, repeat, pushes,
+                      push_interval_ms / 1000))
+
+
+if __name__ == "__main__":
+    main()
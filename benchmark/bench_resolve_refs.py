@@ -0,0 +1,115 @@
+"""
+Benchmark $ref resolution of tool inputSchemas.
+
+Compares the jsonref based path formerly used by ``NacosServer.init_tools_tmp``
+(replace_refs + json dumps/loads) with ``utils.resolve_refs`` on schemas
+generated by pydantic, the way FastMCP builds them for tool arguments.
+
+    python benchmark/bench_resolve_refs.py --tools 200 --repeat 5
+"""
+
+import json
+import time
+from enum import Enum
+from typing import Optional
+
+import click
+import jsonref
+from pydantic import BaseModel, create_model
+
+from nacos_mcp_wrapper.server.utils import jsonref_default, resolve_refs
+
+
+class Country(str, Enum):
+    CN = "CN"
+    US = "US"
+    DE = "DE"
+
+
+class Address(BaseModel):
+    street: str
+    city: str
+    zip_code: Optional[str] = None
+    country: Country
+
+
+class Contact(BaseModel):
+    email: str
+    phone: Optional[str] = None
+    addresses: list[Address] = []
+
+
+class Item(BaseModel):
+    sku: str
+    quantity: int
+    price: float
+    tags: list[str] = []
+
+
+class Order(BaseModel):
+    order_id: str
+    customer: Contact
+    shipping: Address
+    billing: Optional[Address] = None
+    items: list[Item]
+    notes: dict[str, str] = {}
+
+
+class TreeNode(BaseModel):
+    name: str
+    children: list["TreeNode"] = []
+
+
+MODELS = [Address, Contact, Item, Order]
+
+
+def build_schemas(tools: int) -> list[dict]:
+    schemas = []
+    for index in range(tools):
+        model = MODELS[index % len(MODELS)]
+        arguments = create_model(
+            f"tool_{index}Arguments",
+            payload=(model, ...),
+            limit=(int, 10),
+            dry_run=(bool, False),
+        )
+        schemas.append(arguments.model_json_schema())
+    return schemas
+
+
+def resolve_with_jsonref(schema: dict) -> dict:
+    resolved_data = jsonref.JsonRef.replace_refs(schema)
+    resolved_data = json.dumps(resolved_data, default=jsonref_default)
+    return json.loads(resolved_data)
+
+
+def measure(func, schemas: list[dict], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for schema in schemas:
+            func(schema)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+@click.command()
+@click.option("--tools", default=200, help="Number of tool schemas")
+@click.option("--repeat", default=5, help="Repetitions, the best one is reported")
+def main(tools: int, repeat: int):
+    schemas = build_schemas(tools)
+    for schema in schemas:
+        assert resolve_refs(schema) == resolve_with_jsonref(schema)
+    # recursive models can't go through the json dumps of the jsonref path
+    resolve_refs(TreeNode.model_json_schema())
+
+    jsonref_time = measure(resolve_with_jsonref, schemas, repeat)
+    native_time = measure(resolve_refs, schemas, repeat)
+    print(f"tools: {tools}")
+    print(f"jsonref + dumps/loads: {jsonref_time * 1000:.2f} ms")
+    print(f"resolve_refs:          {native_time * 1000:.2f} ms")
+    print(f"speedup:               {jsonref_time / native_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
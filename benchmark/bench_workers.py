@@ -0,0 +1,121 @@
+"""
+Load benchmark of the multi-worker serving mode of NacosMCP.
+
+Starts a stateless streamable HTTP server with a CPU bound tool for each
+worker count, drives it with concurrent ``tools/call`` requests and prints
+the throughput. The workers register to an in-process FakeNacos, no nacos
+server is needed.
+
+    python benchmark/bench_workers.py --workers 1,2,4 --duration 10
+"""
+
+import asyncio
+import socket
+import subprocess
+import sys
+import time
+
+import click
+import httpx
+
+HEADERS = {
+    "Accept": "application/json, text/event-stream",
+    "Content-Type": "application/json",
+}
+
+
+def serve(port: int, workers: int):
+    from nacos_mcp_wrapper.server.nacos_mcp import NacosMCP
+    from nacos_mcp_wrapper.server.nacos_settings import NacosSettings
+    from nacos_mcp_wrapper.testing.fake_nacos import FakeNacos
+
+    nacos_settings = NacosSettings()
+    nacos_settings.SERVER_ADDR = "127.0.0.1:8848"
+    nacos_settings.SERVICE_IP = "127.0.0.1"
+    mcp = NacosMCP("bench-workers", nacos_settings=nacos_settings,
+                   port=port, log_level="WARNING", stateless_http=True,
+                   json_response=True, workers=workers)
+
+    @mcp.tool()
+    def checksum(rounds: int) -> int:
+        """Burn some CPU and return a checksum"""
+        total = 0
+        for index in range(rounds):
+            total = (total * 31 + index) % 1000003
+        return total
+
+    # the forked workers inherit the fake
+    with FakeNacos().install():
+        mcp.run(transport="streamable-http")
+
+
+def wait_for_port(port: int, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        time.sleep(0.1)
+    raise TimeoutError(f"server did not listen on {port}")
+
+
+async def drive(port: int, concurrency: int, duration: float,
+                rounds: int) -> tuple[int, int]:
+    url = f"http://127.0.0.1:{port}/mcp"
+    done = 0
+    errors = 0
+    deadline = time.monotonic() + duration
+
+    async def worker(client: httpx.AsyncClient, worker_id: int):
+        nonlocal done, errors
+        request_id = 0
+        while time.monotonic() < deadline:
+            request_id += 1
+            response = await client.post(url, headers=HEADERS, json={
+                "jsonrpc": "2.0",
+                "id": f"{worker_id}-{request_id}",
+                "method": "tools/call",
+                "params": {"name": "checksum", "arguments": {"rounds": rounds}},
+            })
+            if response.status_code == 200:
+                done += 1
+            else:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        await asyncio.gather(*(worker(client, i) for i in range(concurrency)))
+    return done, errors
+
+
+@click.command()
+@click.option("--workers", default="1,2,4", help="Comma separated worker counts")
+@click.option("--port", default=18100, help="Port of the benchmarked server")
+@click.option("--concurrency", default=64, help="Concurrent client requests")
+@click.option("--duration", default=10.0, help="Seconds per worker count")
+@click.option("--rounds", default=20000, help="CPU work per tool call")
+@click.option("--serve-workers", default=0, hidden=True)
+def main(workers: str, port: int, concurrency: int, duration: float,
+         rounds: int, serve_workers: int):
+    if serve_workers:
+        serve(port, serve_workers)
+        return
+    baseline = None
+    for count in [int(value) for value in workers.split(",")]:
+        process = subprocess.Popen([sys.executable, __file__, "--port",
+                                    str(port), "--serve-workers", str(count)])
+        try:
+            wait_for_port(port)
+            done, errors = asyncio.run(drive(port, concurrency, duration,
+                                             rounds))
+        finally:
+            process.terminate()
+            process.wait()
+        rate = done / duration
+        baseline = baseline or rate
+        print(f"workers {count:>3}: {rate:>9.1f} req/s  "
+              f"scaling {rate / baseline:4.2f}x  errors {errors}")
+
+
+if __name__ == "__main__":
+    main()
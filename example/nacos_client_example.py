@@ -0,0 +1,26 @@
+import asyncio
+
+from nacos_mcp_wrapper.client.nacos_mcp_client import NacosMCPClient
+from nacos_mcp_wrapper.server.nacos_settings import NacosSettings
+
+# Settings of the Nacos the mcp server is registered to
+nacos_settings = NacosSettings()
+nacos_settings.SERVER_ADDR = "127.0.0.1:8848" # <nacos_server_addr> e.g. 127.0.0.1:8848
+nacos_settings.USERNAME=""
+nacos_settings.PASSWORD=""
+
+async def main():
+    # Resolves nacos-mcp-calculator from nacos_multiplexer_example.py and
+    # spreads the calls over its instances
+    async with NacosMCPClient("nacos-mcp-calculator", version="1.0.0",
+                              nacos_settings=nacos_settings,
+                              sessions_per_instance=2) as client:
+        print(f"instances: {client.instances}")
+        tools = await client.list_tools()
+        print(f"tools: {[tool.name for tool in tools.tools]}")
+        result = await client.call_tool("add", {"a": 1, "b": 2},
+                                        idempotent=True)
+        print(f"1 + 2 = {result.content[0].text}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
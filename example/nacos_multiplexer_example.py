@@ -0,0 +1,36 @@
+from nacos_mcp_wrapper.server.multiplexer import NacosMCPMultiplexer
+from nacos_mcp_wrapper.server.nacos_mcp import NacosMCP
+from nacos_mcp_wrapper.server.nacos_settings import NacosSettings
+
+# Registration settings for Nacos, servers with the same settings share
+# one Nacos client. Each server gets its own copy, the server fills in
+# fields such as SERVICE_IP when it registers.
+nacos_settings = NacosSettings()
+nacos_settings.SERVER_ADDR = "127.0.0.1:8848" # <nacos_server_addr> e.g. 127.0.0.1:8848
+nacos_settings.USERNAME=""
+nacos_settings.PASSWORD=""
+
+calculator = NacosMCP("nacos-mcp-calculator",
+                      nacos_settings=nacos_settings.model_copy(),
+                      version="1.0.0")
+greeter = NacosMCP("nacos-mcp-greeter",
+                   nacos_settings=nacos_settings.model_copy(),
+                   version="1.0.0")
+
+@calculator.tool()
+def add(a: int, b: int) -> int:
+    """Add two integers together"""
+    return a + b
+
+@greeter.tool()
+def greet(name: str) -> str:
+    """Get a personalized greeting"""
+    return f"Hello, {name}!"
+
+if __name__ == "__main__":
+    # Served on one port, registered to Nacos with the export paths
+    # /calculator/mcp and /greeter/sse
+    multiplexer = NacosMCPMultiplexer(port=18004)
+    multiplexer.mount("/calculator", calculator)
+    multiplexer.mount("/greeter", greeter, transport="sse")
+    multiplexer.run()
@@ -119,7 +119,8 @@ async def main(
     #   2. Resume streams by sending Last-Event-ID in GET requests
     #   3. Replay missed events after reconnection
     # Note: This in-memory implementation is for demonstration ONLY.
-    # For production, use a persistent storage solution.
+    # For production, use a persistent storage solution such as
+    # nacos_mcp_wrapper.server.event_store.SqliteEventStore("events.db").
     event_store = InMemoryEventStore()
 
     # Create the session manager with our app and event store
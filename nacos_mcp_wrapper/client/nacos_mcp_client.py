@@ -0,0 +1,438 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from contextlib import AsyncExitStack
+from datetime import timedelta
+from typing import Any, TYPE_CHECKING
+
+import anyio
+import httpx
+from mcp import ClientSession, McpError, types
+from mcp.client.sse import sse_client
+from mcp.client.streamable_http import streamable_http_client
+
+from nacos_mcp_wrapper.server.client_pool import client_pool, NacosClients
+from nacos_mcp_wrapper.server.nacos_settings import NacosSettings
+
+if TYPE_CHECKING:
+	from v2.nacos import Instance
+	from v2.nacos.ai.model.mcp.mcp import McpServerDetailInfo
+
+logger = logging.getLogger(__name__)
+
+PROTOCOLS = ("mcp-sse", "mcp-streamable")
+# seconds a session whose call timed out has to answer a ping
+_PING_TIMEOUT = 5.0
+# seconds the streamable transport waits for the next server sent event
+_SSE_READ_TIMEOUT = 300.0
+# errors of a session whose transport broke
+_CONNECTION_ERRORS = (httpx.TransportError, anyio.ClosedResourceError,
+					  anyio.BrokenResourceError, anyio.EndOfStream,
+					  ConnectionError)
+
+
+class NoAvailableInstanceError(Exception):
+	"""No healthy instance of the mcp server can serve the call."""
+
+
+class _EjectedError(Exception):
+	pass
+
+
+class _PooledSession:
+	"""One mcp client session, opened and closed by its own task.
+
+	The transports of the mcp sdk are anyio task groups which must be left
+	by the task which entered them, the session task owns them for its
+	whole life and callers only use the ClientSession.
+	"""
+
+	def __init__(self, url: str, protocol: str, headers: dict[str, Any] | None,
+			timeout: float):
+		self.url = url
+		self.protocol = protocol
+		self.headers = headers
+		self.timeout = timeout
+		self.session: ClientSession | None = None
+		self.outstanding = 0
+		self._ready: asyncio.Future | None = None
+		self._closing = asyncio.Event()
+		self._task: asyncio.Task | None = None
+
+	@property
+	def alive(self) -> bool:
+		return self._task is not None and not self._task.done() and self.session is not None
+
+	async def open(self):
+		self._ready = asyncio.get_running_loop().create_future()
+		self._task = asyncio.create_task(self._run())
+		try:
+			await asyncio.wait_for(asyncio.shield(self._ready), self.timeout)
+		except BaseException:
+			self._task.cancel()
+			raise
+
+	async def _run(self):
+		try:
+			async with AsyncExitStack() as stack:
+				if self.protocol == "mcp-sse":
+					read_stream, write_stream = await stack.enter_async_context(
+							sse_client(self.url, headers=self.headers,
+									   timeout=self.timeout))
+				else:
+					http_client = await stack.enter_async_context(
+							httpx.AsyncClient(
+									headers=self.headers,
+									timeout=httpx.Timeout(
+											self.timeout, read=_SSE_READ_TIMEOUT)))
+					read_stream, write_stream, _ = await stack.enter_async_context(
+							streamable_http_client(self.url,
+												   http_client=http_client))
+				session = await stack.enter_async_context(
+						ClientSession(read_stream, write_stream))
+				await session.initialize()
+				self.session = session
+				self._ready.set_result(None)
+				await self._closing.wait()
+		except BaseException as e:
+			if not self._ready.done():
+				self._ready.set_exception(e)
+			elif not self._closing.is_set():
+				logger.info(f"mcp session to {self.url} closed: {e!r}")
+			if isinstance(e, asyncio.CancelledError):
+				raise
+		finally:
+			self.session = None
+
+	async def close(self):
+		self._closing.set()
+		if self._task is None:
+			return
+		try:
+			await asyncio.wait_for(self._task, self.timeout)
+		except BaseException:
+			self._task.cancel()
+
+
+class _Endpoint:
+	"""An instance of the mcp server and its pool of sessions."""
+
+	def __init__(self, ip: str, port: int, url: str):
+		self.ip = ip
+		self.port = port
+		self.url = url
+		self.healthy = True
+		self.sessions: list[_PooledSession] = []
+		self.open_lock = asyncio.Lock()
+		self.outstanding = 0
+		self.failures = 0
+		self.ejected_until = 0.0
+
+	def available(self, now: float) -> bool:
+		return self.healthy and self.ejected_until <= now
+
+
+class NacosMCPClient:
+	"""Call the tools of an mcp server registered to nacos by name.
+
+	The server is resolved with ``get_mcp_server``, its instances are read
+	from the naming service under ``remoteServerConfig.serviceRef`` and
+	followed through a naming subscription. Each instance keeps up to
+	``sessions_per_instance`` warm SSE or streamable HTTP sessions.
+
+	Calls go to the less loaded of two random healthy instances (power of
+	two choices on outstanding requests). An instance which fails to
+	connect, or whose session breaks, is ejected for ``eject_seconds``,
+	doubled on each consecutive failure, and the call fails over to
+	another instance. A call which failed after it was sent is only
+	retried for ``idempotent`` calls. A call which times out on a session
+	still answering pings fails alone, the session and the instance keep
+	serving the other calls.
+
+	Usage::
+
+		async with NacosMCPClient("weather", nacos_settings=settings) as client:
+			result = await client.call_tool("get_weather", {"city": "Paris"})
+	"""
+
+	def __init__(self,
+			name: str,
+			version: str | None = None,
+			nacos_settings: NacosSettings | None = None,
+			sessions_per_instance: int = 1,
+			max_attempts: int = 3,
+			timeout: float = 30.0,
+			eject_seconds: float = 5.0,
+			headers: dict[str, Any] | None = None,
+			scheme: str = "http"):
+		if nacos_settings is None:
+			nacos_settings = NacosSettings()
+		if nacos_settings.NAMESPACE == "":
+			nacos_settings.NAMESPACE = "public"
+		self.name = name
+		self.version = version
+		self._nacos_settings = nacos_settings
+		self._sessions_per_instance = max(sessions_per_instance, 1)
+		self._max_attempts = max(max_attempts, 1)
+		self._timeout = timeout
+		self._eject_seconds = eject_seconds
+		self._headers = headers
+		self._scheme = scheme
+		self._clients: NacosClients | None = None
+		self._naming_service = None
+		self._protocol: str | None = None
+		self._export_path = "/"
+		self._group_name: str | None = None
+		self._service_name: str | None = None
+		self._endpoints: dict[tuple[str, int], _Endpoint] = {}
+		self._started = False
+
+	async def __aenter__(self) -> "NacosMCPClient":
+		await self.start()
+		return self
+
+	async def __aexit__(self, exc_type, exc_value, traceback):
+		await self.close()
+
+	@property
+	def protocol(self) -> str | None:
+		return self._protocol
+
+	@property
+	def instances(self) -> list[tuple[str, int]]:
+		return list(self._endpoints)
+
+	async def start(self):
+		"""Resolve the mcp server and subscribe to its instances."""
+		from v2.nacos import ListInstanceParam, SubscribeServiceParam
+		from v2.nacos.ai.model.ai_param import GetMcpServerParam
+
+		if self._started:
+			return
+		self._clients = client_pool.acquire_for(self._nacos_settings)
+		try:
+			ai_service = await self._clients.ai_service()
+			server_detail_info = await ai_service.get_mcp_server(
+					GetMcpServerParam(mcp_name=self.name, version=self.version))
+			self._resolve(server_detail_info)
+			self._naming_service = await self._clients.naming_service()
+			await self._naming_service.subscribe(SubscribeServiceParam(
+					service_name=self._service_name,
+					group_name=self._group_name,
+					subscribe_callback=self._on_instances_changed))
+			instances = await self._naming_service.list_instances(
+					ListInstanceParam(service_name=self._service_name,
+									  group_name=self._group_name,
+									  healthy_only=None,
+									  subscribe=True))
+		except BaseException:
+			clients, self._clients = self._clients, None
+			self._naming_service = None
+			await client_pool.release(clients)
+			raise
+		self._started = True
+		await self._on_instances_changed(instances)
+
+	def _resolve(self, server_detail_info: McpServerDetailInfo | None):
+		if server_detail_info is None:
+			raise NoAvailableInstanceError(
+					f"mcp server {self.name} not found in nacos")
+		protocol = server_detail_info.protocol
+		remote_config = server_detail_info.remoteServerConfig
+		if protocol not in PROTOCOLS or remote_config is None or remote_config.serviceRef is None:
+			raise NoAvailableInstanceError(
+					f"mcp server {self.name} is not a remote server, protocol:{protocol}")
+		service_ref = remote_config.serviceRef
+		if service_ref.namespaceId and service_ref.namespaceId != self._nacos_settings.NAMESPACE:
+			logger.warning(
+					f"mcp server {self.name} refers to a service of namespace "
+					f"{service_ref.namespaceId}, looking it up in {self._nacos_settings.NAMESPACE}")
+		self._protocol = protocol
+		self._export_path = remote_config.exportPath or "/"
+		if not self._export_path.startswith("/"):
+			self._export_path = "/" + self._export_path
+		self._group_name = service_ref.groupName or "DEFAULT_GROUP"
+		self._service_name = service_ref.serviceName
+
+	async def _on_instances_changed(self, instances: list[Instance] | None):
+		current = {}
+		for instance in instances or []:
+			if instance.enabled and instance.weight > 0:
+				current[(instance.ip, instance.port)] = instance
+		for address in list(self._endpoints):
+			if address not in current:
+				endpoint = self._endpoints.pop(address)
+				for session in endpoint.sessions:
+					asyncio.create_task(session.close())
+		for address, instance in current.items():
+			endpoint = self._endpoints.get(address)
+			if endpoint is None:
+				ip, port = address
+				host = f"[{ip}]" if ":" in ip else ip
+				endpoint = self._endpoints[address] = _Endpoint(
+						ip, port,
+						f"{self._scheme}://{host}:{port}{self._export_path}")
+			endpoint.healthy = instance.healthy
+		logger.info(f"instances of mcp server {self.name}: "
+					f"{sorted(self._endpoints)}")
+
+	def _pick_endpoint(self, excluded: set[tuple[str, int]]) -> _Endpoint:
+		now = time.monotonic()
+		candidates = [endpoint for address, endpoint in self._endpoints.items()
+					  if address not in excluded and endpoint.available(now)]
+		if not candidates:
+			# every instance is ejected, try the one coming back first
+			candidates = sorted(
+					(endpoint for address, endpoint in self._endpoints.items()
+					 if address not in excluded and endpoint.healthy),
+					key=lambda endpoint: endpoint.ejected_until)[:1]
+		if not candidates:
+			raise NoAvailableInstanceError(
+					f"no available instance of mcp server {self.name}")
+		if len(candidates) == 1:
+			return candidates[0]
+		first, second = random.sample(candidates, 2)
+		return first if first.outstanding <= second.outstanding else second
+
+	def _idle_session(self, endpoint: _Endpoint) -> _PooledSession | None:
+		endpoint.sessions = [session for session in endpoint.sessions
+							 if session.alive]
+		if not endpoint.sessions:
+			return None
+		session = min(endpoint.sessions, key=lambda session: session.outstanding)
+		if session.outstanding == 0 or len(
+				endpoint.sessions) >= self._sessions_per_instance:
+			return session
+		return None
+
+	async def _session(self, endpoint: _Endpoint) -> _PooledSession:
+		"""The least busy session of the instance, a new one is opened while
+		all are busy and the pool is not full."""
+		session = self._idle_session(endpoint)
+		if session is not None:
+			return session
+		async with endpoint.open_lock:
+			session = self._idle_session(endpoint)
+			if session is not None:
+				return session
+			if endpoint.ejected_until > time.monotonic():
+				# ejected by a concurrent call while waiting for the lock
+				raise _EjectedError()
+			session = _PooledSession(endpoint.url, self._protocol,
+									 self._headers, self._timeout)
+			await session.open()
+			endpoint.sessions.append(session)
+			return session
+
+	def _eject(self, endpoint: _Endpoint, e: BaseException):
+		if endpoint.ejected_until > time.monotonic():
+			# concurrent calls failing on the same outage count once
+			return
+		endpoint.failures += 1
+		delay = self._eject_seconds * 2 ** min(endpoint.failures - 1, 6)
+		endpoint.ejected_until = time.monotonic() + delay
+		logger.warning(f"eject instance {endpoint.ip}:{endpoint.port} of "
+					   f"mcp server {self.name} for {delay}s: {e!r}")
+
+	async def _session_responds(self, session: _PooledSession) -> bool:
+		if not session.alive:
+			return False
+		try:
+			await asyncio.wait_for(session.session.send_ping(),
+								   min(self._timeout, _PING_TIMEOUT))
+		except Exception:
+			return False
+		return True
+
+	async def call_tool(self, name: str, arguments: dict[str, Any] | None = None,
+			idempotent: bool = False) -> types.CallToolResult:
+		return await self._request(
+				lambda session: session.call_tool(
+						name, arguments,
+						read_timeout_seconds=timedelta(seconds=self._timeout)),
+				idempotent)
+
+	async def list_tools(self) -> types.ListToolsResult:
+		return await self._request(lambda session: session.list_tools(), True)
+
+	async def _request(self, send, idempotent: bool):
+		if not self._started:
+			await self.start()
+		excluded = set()
+		last_error: BaseException | None = None
+		for _ in range(self._max_attempts):
+			try:
+				endpoint = self._pick_endpoint(excluded)
+			except NoAvailableInstanceError:
+				if last_error is not None:
+					break
+				raise
+			address = (endpoint.ip, endpoint.port)
+			try:
+				session = await self._session(endpoint)
+			except _EjectedError:
+				excluded.add(address)
+				continue
+			except Exception as e:
+				self._eject(endpoint, e)
+				excluded.add(address)
+				last_error = e
+				continue
+			endpoint.outstanding += 1
+			session.outstanding += 1
+			try:
+				result = await send(session.session)
+			except McpError as e:
+				if e.error.code == httpx.codes.REQUEST_TIMEOUT:
+					if await self._session_responds(session):
+						# only this call is slow, the session is shared
+						raise
+				elif e.error.code != types.CONNECTION_CLOSED:
+					# answered by the server, not an instance failure
+					endpoint.failures = 0
+					raise
+				error = e
+			except _CONNECTION_ERRORS as e:
+				error = e
+			else:
+				endpoint.failures = 0
+				return result
+			finally:
+				endpoint.outstanding -= 1
+				session.outstanding -= 1
+			# the session broke, so did the calls sharing it
+			self._eject(endpoint, error)
+			await session.close()
+			if not idempotent:
+				raise error
+			excluded.add(address)
+			last_error = error
+		raise NoAvailableInstanceError(
+				f"no instance of mcp server {self.name} could serve the call, "
+				f"last error: {last_error!r}")
+
+	async def close(self):
+		"""Close the sessions, stop following the instances and release the
+		nacos clients."""
+		from v2.nacos import SubscribeServiceParam
+
+		endpoints, self._endpoints = self._endpoints, {}
+		await asyncio.gather(*(session.close() for endpoint in endpoints.values()
+							   for session in endpoint.sessions))
+		clients, self._clients = self._clients, None
+		if clients is None:
+			return
+		if self._started and self._naming_service is not None:
+			try:
+				await self._naming_service.unsubscribe(SubscribeServiceParam(
+						service_name=self._service_name,
+						group_name=self._group_name,
+						subscribe_callback=self._on_instances_changed))
+			except Exception as e:
+				logger.warning(f"Failed to unsubscribe mcp server {self.name}: {e}")
+		self._started = False
+		self._naming_service = None
+		await client_pool.release(clients)
@@ -0,0 +1,60 @@
+import json
+import logging
+import os
+import tempfile
+from typing import Any
+
+from nacos_mcp_wrapper.server.utils import content_digest
+
+logger = logging.getLogger(__name__)
+
+
+class ServerDetailCache:
+	"""Last known nacos state of an mcp server, kept on local disk.
+
+	One JSON file per namespace, name and version holds the last
+	McpServerDetailInfo received from nacos (tools meta included) and the
+	resolved local tool schemas, so a restart can serve the nacos overridden
+	descriptions and enabled flags before nacos answers.
+	"""
+
+	def __init__(self, cache_dir: str, namespace: str, name: str,
+			version: str):
+		self.cache_dir = cache_dir
+		self.path = os.path.join(
+				cache_dir, f"{content_digest(namespace, name, version)}.json")
+
+	def load(self) -> dict[str, Any] | None:
+		try:
+			with open(self.path, encoding="utf-8") as f:
+				return json.load(f)
+		except FileNotFoundError:
+			return None
+		except (OSError, ValueError) as e:
+			logger.warning(f"Failed to load mcp server cache {self.path}: {e}")
+			return None
+
+	def save(self, data: dict[str, Any]):
+		"""Write the snapshot atomically, readers never see a partial file.
+
+		Saves may run concurrently in threads, each writes its own temporary
+		file.
+		"""
+		tmp_path = None
+		try:
+			os.makedirs(self.cache_dir, exist_ok=True)
+			fd, tmp_path = tempfile.mkstemp(
+					dir=self.cache_dir,
+					prefix=f"{os.path.basename(self.path)}.", suffix=".tmp")
+			with open(fd, "w", encoding="utf-8") as f:
+				json.dump(data, f, ensure_ascii=False)
+			os.replace(tmp_path, self.path)
+			tmp_path = None
+		except (OSError, TypeError, ValueError) as e:
+			logger.warning(f"Failed to save mcp server cache {self.path}: {e}")
+		finally:
+			if tmp_path is not None:
+				try:
+					os.unlink(tmp_path)
+				except OSError:
+					pass
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from typing import Any, Callable, Hashable, TYPE_CHECKING
+
+from nacos_mcp_wrapper.server.nacos_settings import NacosSettings
+
+if TYPE_CHECKING:
+	from v2.nacos import ClientConfig, NacosNamingService
+	from v2.nacos.ai.nacos_ai_service import NacosAIService
+
+logger = logging.getLogger(__name__)
+
+
+def client_key(nacos_settings: NacosSettings) -> Hashable:
+	"""Key of the nacos clients which ``nacos_settings`` can share."""
+	credential_provider = nacos_settings.CREDENTIAL_PROVIDER
+	return (
+		nacos_settings.SERVER_ADDR,
+		nacos_settings.NAMESPACE,
+		nacos_settings.ACCESS_KEY,
+		nacos_settings.SECRET_KEY,
+		nacos_settings.USERNAME,
+		nacos_settings.PASSWORD,
+		json.dumps(nacos_settings.APP_CONN_LABELS, sort_keys=True,
+				   default=str),
+		None if credential_provider is None else id(credential_provider),
+	)
+
+
+def build_client_config(nacos_settings: NacosSettings) -> ClientConfig:
+	from v2.nacos import ClientConfigBuilder
+
+	client_config_builder = ClientConfigBuilder()
+	client_config_builder.server_address(
+			nacos_settings.SERVER_ADDR).namespace_id(
+			nacos_settings.NAMESPACE).access_key(
+			nacos_settings.ACCESS_KEY).secret_key(
+			nacos_settings.SECRET_KEY).username(
+			nacos_settings.USERNAME).password(
+			nacos_settings.PASSWORD).app_conn_labels(
+			nacos_settings.APP_CONN_LABELS)
+
+	if nacos_settings.CREDENTIAL_PROVIDER is not None:
+		client_config_builder.credentials_provider(
+				nacos_settings.CREDENTIAL_PROVIDER)
+
+	return client_config_builder.build()
+
+
+class NacosClients:
+	"""The AI and naming services sharing one nacos client config.
+
+	Each service is created on first use, concurrent callers wait for the
+	same creation.
+	"""
+
+	def __init__(self, client_config: ClientConfig):
+		self._client_config = client_config
+		self._ai_service: NacosAIService | None = None
+		self._naming_service: NacosNamingService | None = None
+		self._ai_lock = asyncio.Lock()
+		self._naming_lock = asyncio.Lock()
+		self.refs = 0
+
+	async def ai_service(self) -> NacosAIService:
+		async with self._ai_lock:
+			if self._ai_service is None:
+				from v2.nacos.ai.nacos_ai_service import NacosAIService
+
+				self._ai_service = await NacosAIService.create_ai_service(
+						self._client_config)
+			return self._ai_service
+
+	async def naming_service(self) -> NacosNamingService:
+		async with self._naming_lock:
+			if self._naming_service is None:
+				from v2.nacos import NacosNamingService
+
+				self._naming_service = await NacosNamingService.create_naming_service(
+						self._client_config)
+			return self._naming_service
+
+	async def shutdown(self):
+		ai_service, self._ai_service = self._ai_service, None
+		naming_service, self._naming_service = self._naming_service, None
+		if ai_service is not None:
+			await ai_service.shutdown()
+		if naming_service is not None:
+			await naming_service.shutdown()
+
+
+class NacosClientPool:
+	"""Process wide registry of reference counted nacos clients.
+
+	Servers built with the same client config (server address, namespace,
+	credentials and labels) share one pair of connections, closed when the
+	last server releases them. Clients are bound to the event loop which
+	created them, so each loop gets its own entries, dropped once the loop
+	is closed.
+	"""
+
+	def __init__(self):
+		# keyed by the loop itself, the id of a closed loop can be reused.
+		# The clients reference their loop, which keeps the key alive, the
+		# entries are dropped explicitly, see _drop_closed_loops.
+		self._entries: dict[
+			asyncio.AbstractEventLoop, dict[Hashable, NacosClients]] = {}
+		# builds the clients of a new entry, replaced by
+		# nacos_mcp_wrapper.testing.fake_nacos to run without a nacos server
+		self.clients_factory: Callable[[ClientConfig], NacosClients] = NacosClients
+
+	def acquire(self, key: Hashable,
+			client_config: Callable[[], ClientConfig]) -> NacosClients:
+		"""Get the clients of ``key``, ``client_config`` builds their config
+		when no server of this loop uses them yet."""
+		self._drop_closed_loops()
+		entries = self._entries.setdefault(asyncio.get_running_loop(), {})
+		clients = entries.get(key)
+		if clients is None:
+			clients = entries[key] = self.clients_factory(client_config())
+		clients.refs += 1
+		return clients
+
+	def acquire_for(self, nacos_settings: NacosSettings) -> NacosClients:
+		return self.acquire(client_key(nacos_settings),
+							lambda: build_client_config(nacos_settings))
+
+	async def release(self, clients: NacosClients):
+		clients.refs -= 1
+		if clients.refs > 0:
+			return
+		for loop, entries in list(self._entries.items()):
+			for key, entry in list(entries.items()):
+				if entry is clients:
+					del entries[key]
+			if not entries:
+				del self._entries[loop]
+		await clients.shutdown()
+
+	def _drop_closed_loops(self):
+		# servers not closed before their loop keep references, their
+		# clients can't be shut down on a closed loop anymore
+		for loop in [loop for loop in self._entries if loop.is_closed()]:
+			del self._entries[loop]
+
+	def stats(self) -> dict[str, Any]:
+		self._drop_closed_loops()
+		return {
+			"entries": sum(len(entries) for entries in self._entries.values()),
+			"refs": sum(clients.refs for entries in self._entries.values()
+						for clients in entries.values()),
+		}
+
+
+client_pool = NacosClientPool()
@@ -0,0 +1,161 @@
+"""
+SQLite backed event store for StreamableHTTP resumability.
+
+Events get monotonic integer ids, formatted as fixed width strings so they
+also sort lexicographically, and replay is an index seek on
+``(stream_id, id)`` instead of a scan. Old events are evicted by TTL and by
+a cap on the number of stored events.
+"""
+
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+
+from mcp.server.streamable_http import (
+	EventCallback,
+	EventId,
+	EventMessage,
+	EventStore,
+	StreamId,
+)
+from mcp.types import JSONRPCMessage
+
+logger = logging.getLogger(__name__)
+
+_EVENT_ID_WIDTH = 20
+_REPLAY_BATCH_SIZE = 500
+
+
+class SqliteEventStore(EventStore):
+	"""
+	Persistent EventStore backed by a SQLite database.
+
+	Statements run in a worker thread, one at a time, so a slow disk or a
+	database locked by another process never blocks the event loop. Use
+	``":memory:"`` as path for a process local store.
+	"""
+
+	def __init__(self, path: str = ":memory:", max_events: int = 100000,
+			ttl: float | None = 3600, evict_interval: int = 1000,
+			timeout: float = 5.0):
+		"""Initialize the event store.
+
+		Args:
+			path: Path of the SQLite database file
+			max_events: Maximum number of events to keep across all streams
+			ttl: Seconds an event is kept, None to keep events until the
+				size limit evicts them
+			evict_interval: Number of stored events between two evictions
+			timeout: Seconds a statement waits for a database locked by
+				another connection
+		"""
+		self.max_events = max_events
+		self.ttl = ttl
+		self.evict_interval = max(evict_interval, 1)
+		self._stored_since_evict = 0
+		self._lock = threading.Lock()
+		self._conn = sqlite3.connect(path, isolation_level=None,
+									 check_same_thread=False, timeout=timeout)
+		if path != ":memory:":
+			self._conn.execute("PRAGMA journal_mode=WAL")
+		self._conn.execute("PRAGMA synchronous=NORMAL")
+		self._conn.execute(
+				"CREATE TABLE IF NOT EXISTS events ("
+				"id INTEGER PRIMARY KEY AUTOINCREMENT, "
+				"stream_id TEXT NOT NULL, "
+				"created_at REAL NOT NULL, "
+				"message TEXT)")
+		self._conn.execute(
+				"CREATE INDEX IF NOT EXISTS idx_events_stream "
+				"ON events (stream_id, id)")
+		self._conn.execute(
+				"CREATE INDEX IF NOT EXISTS idx_events_created_at "
+				"ON events (created_at)")
+		self._evict()
+
+	@staticmethod
+	def _format_event_id(row_id: int) -> EventId:
+		return str(row_id).zfill(_EVENT_ID_WIDTH)
+
+	async def _run(self, statements, *args):
+		return await asyncio.to_thread(self._locked, statements, *args)
+
+	def _locked(self, statements, *args):
+		with self._lock:
+			return statements(*args)
+
+	async def store_event(
+			self, stream_id: StreamId, message: JSONRPCMessage | None
+	) -> EventId:
+		"""Stores an event with a monotonic event ID."""
+		data = None
+		if message is not None:
+			data = message.model_dump_json(by_alias=True, exclude_none=True)
+		row_id = await self._run(self._insert, stream_id, data)
+		return self._format_event_id(row_id)
+
+	def _insert(self, stream_id: StreamId, data: str | None) -> int:
+		cursor = self._conn.execute(
+				"INSERT INTO events (stream_id, created_at, message) "
+				"VALUES (?, ?, ?)",
+				(stream_id, time.time(), data))
+		self._stored_since_evict += 1
+		if self._stored_since_evict >= self.evict_interval:
+			self._evict()
+		return cursor.lastrowid
+
+	async def replay_events_after(
+			self,
+			last_event_id: EventId,
+			send_callback: EventCallback,
+	) -> StreamId | None:
+		"""Replays events that occurred after the specified event ID."""
+		try:
+			last_id = int(last_event_id)
+		except (TypeError, ValueError):
+			logger.warning("Event ID %s is not valid", last_event_id)
+			return None
+		stream_id = await self._run(self._stream_of, last_id)
+		if stream_id is None:
+			logger.warning("Event ID %s not found in store", last_event_id)
+			return None
+
+		while True:
+			rows = await self._run(self._events_after, stream_id, last_id)
+			for row_id, data in rows:
+				last_id = row_id
+				if data is None:
+					continue
+				message = JSONRPCMessage.model_validate_json(data)
+				await send_callback(
+						EventMessage(message, self._format_event_id(row_id)))
+			if len(rows) < _REPLAY_BATCH_SIZE:
+				return stream_id
+
+	def _stream_of(self, row_id: int) -> StreamId | None:
+		row = self._conn.execute("SELECT stream_id FROM events WHERE id = ?",
+								 (row_id,)).fetchone()
+		return None if row is None else row[0]
+
+	def _events_after(self, stream_id: StreamId,
+			row_id: int) -> list[tuple[int, str | None]]:
+		return self._conn.execute(
+				"SELECT id, message FROM events "
+				"WHERE stream_id = ? AND id > ? ORDER BY id LIMIT ?",
+				(stream_id, row_id, _REPLAY_BATCH_SIZE)).fetchall()
+
+	def _evict(self):
+		self._stored_since_evict = 0
+		if self.ttl is not None:
+			self._conn.execute("DELETE FROM events WHERE created_at < ?",
+							   (time.time() - self.ttl,))
+		row = self._conn.execute("SELECT MAX(id) FROM events").fetchone()
+		if row[0] is not None:
+			self._conn.execute("DELETE FROM events WHERE id <= ?",
+							   (row[0] - self.max_events,))
+
+	def close(self):
+		with self._lock:
+			self._conn.close()
@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+# weight never reaches 0, nacos would stop routing to the instance at all
+MIN_WEIGHT = 0.1
+_LAG_SAMPLE_PERIOD = 0.25
+
+
+class LoadTracker:
+	"""In-flight tool calls and recent call latencies of a server."""
+
+	def __init__(self, max_samples: int = 1024):
+		self.in_flight = 0
+		self._latencies: deque[float] = deque(maxlen=max_samples)
+
+	def call_started(self):
+		self.in_flight += 1
+
+	def call_finished(self, seconds: float):
+		self.in_flight -= 1
+		self._latencies.append(seconds)
+
+	def take_p95(self) -> float:
+		"""p95 latency of the calls finished since the last take, 0 if none."""
+		if not self._latencies:
+			return 0.0
+		latencies = sorted(self._latencies)
+		self._latencies.clear()
+		return latencies[math.ceil(len(latencies) * 0.95) - 1]
+
+
+class LoadReporter:
+	"""Turn the load of a server into the weight of its nacos instance.
+
+	Every ``interval`` seconds the pressure is computed as the highest
+	ratio of in-flight calls, event loop lag and p95 latency to their
+	targets, smoothed over the previous samples. The instance weight is
+	``base_weight / pressure`` once pressure exceeds 1. ``update`` is called
+	with the weight and load metadata only when the weight moved by more
+	than ``hysteresis`` (relative) and at most once per ``min_update_interval``
+	seconds, so a noisy replica does not flood nacos.
+	"""
+
+	def __init__(self, tracker: LoadTracker,
+			update: Callable[[float, dict[str, str]], Awaitable[None]],
+			base_weight: float = 1.0,
+			interval: float = 5.0,
+			min_update_interval: float = 30.0,
+			hysteresis: float = 0.2,
+			in_flight_target: int = 32,
+			loop_lag_target: float = 0.05,
+			latency_target: float | None = None,
+			smoothing: float = 0.5):
+		self._tracker = tracker
+		self._update = update
+		self.base_weight = base_weight
+		self.weight = base_weight
+		self._interval = interval
+		self._min_update_interval = min_update_interval
+		self._hysteresis = hysteresis
+		self._in_flight_target = in_flight_target
+		self._loop_lag_target = loop_lag_target
+		self._latency_target = latency_target
+		self._smoothing = smoothing
+		self.pressure = 0.0
+		self._last_update_at: float | None = None
+		self._task: asyncio.Task | None = None
+
+	def start(self):
+		if self._task is None or self._task.done():
+			self._task = asyncio.create_task(self._run())
+
+	def stop(self):
+		if self._task is not None:
+			self._task.cancel()
+			self._task = None
+
+	async def _sample_loop_lag(self, duration: float) -> float:
+		"""Worst delay of the event loop waking up a sleep, over ``duration``."""
+		loop = asyncio.get_running_loop()
+		worst = 0.0
+		deadline = loop.time() + duration
+		while True:
+			period = min(_LAG_SAMPLE_PERIOD, deadline - loop.time())
+			if period <= 0:
+				return worst
+			expected = loop.time() + period
+			await asyncio.sleep(period)
+			worst = max(worst, loop.time() - expected)
+
+	async def _run(self):
+		while True:
+			loop_lag = await self._sample_loop_lag(self._interval)
+			try:
+				await self.report(loop_lag)
+			except Exception as e:
+				logger.warning(f"Failed to report load to nacos: {e}")
+
+	async def report(self, loop_lag: float):
+		in_flight = self._tracker.in_flight
+		p95 = self._tracker.take_p95()
+		pressure = max(in_flight / self._in_flight_target,
+					   loop_lag / self._loop_lag_target)
+		if self._latency_target:
+			pressure = max(pressure, p95 / self._latency_target)
+		self.pressure = (self._smoothing * self.pressure
+						 + (1 - self._smoothing) * pressure)
+		weight = round(max(self.base_weight / max(self.pressure, 1.0),
+						   MIN_WEIGHT), 2)
+		if weight == self.weight or (
+				weight != self.base_weight
+				and abs(weight - self.weight) <= self._hysteresis * self.weight):
+			return
+		now = time.monotonic()
+		if (self._last_update_at is not None
+				and now - self._last_update_at < self._min_update_interval):
+			return
+		metadata = {
+			"load.inFlight": str(in_flight),
+			"load.loopLagMs": f"{loop_lag * 1000:.1f}",
+			"load.p95Ms": f"{p95 * 1000:.1f}",
+			"load.pressure": f"{self.pressure:.2f}",
+		}
+		await self._update(weight, metadata)
+		logger.info(f"Update instance weight {self.weight} -> {weight}, {metadata}")
+		self.weight = weight
+		self._last_update_at = now
@@ -0,0 +1,242 @@
+import contextlib
+import logging
+import threading
+import time
+from typing import Literal
+
+logger = logging.getLogger(__name__)
+
+MetricsBackend = Literal["prometheus", "opentelemetry"]
+
+_NACOS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+				  10.0, 30.0)
+_NOOP_CONTEXT = contextlib.nullcontext()
+
+
+class Metrics:
+	"""Metrics of the nacos servers of the process, no-op by default.
+
+	Backends override the ``observe`` methods. Callers on hot paths check
+	``enabled`` first, so disabled metrics only cost an attribute lookup.
+	"""
+
+	enabled = False
+
+	def nacos_operation(self, server: str, operation: str):
+		"""Context manager timing one nacos round trip, failures included."""
+		return _NOOP_CONTEXT
+
+	def observe_nacos_operation(self, server: str, operation: str,
+			seconds: float, error: bool):
+		pass
+
+	def observe_subscription_push(self, server: str):
+		pass
+
+	def observe_subscription_applied(self, server: str, lag: float):
+		pass
+
+	def observe_tool_call(self, server: str, tool: str, seconds: float,
+			error: bool):
+		pass
+
+	def observe_result_cache(self, server: str, tool: str, hit: bool):
+		pass
+
+	def add_active_sessions(self, server: str, delta: int):
+		pass
+
+
+class _OperationTimer:
+	__slots__ = ("_metrics", "_server", "_operation", "_start")
+
+	def __init__(self, metrics: Metrics, server: str, operation: str):
+		self._metrics = metrics
+		self._server = server
+		self._operation = operation
+		self._start = 0.0
+
+	def __enter__(self):
+		self._start = time.perf_counter()
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self._metrics.observe_nacos_operation(
+				self._server, self._operation,
+				time.perf_counter() - self._start, exc_type is not None)
+		return False
+
+
+class _EnabledMetrics(Metrics):
+	enabled = True
+
+	def nacos_operation(self, server: str, operation: str):
+		return _OperationTimer(self, server, operation)
+
+
+class PrometheusMetrics(_EnabledMetrics):
+	"""Metrics exported with prometheus_client.
+
+	They are registered to the default registry, expose it with
+	``prometheus_client.start_http_server`` or set METRICS_PORT.
+	"""
+
+	def __init__(self, registry=None):
+		import prometheus_client
+
+		kwargs = {} if registry is None else {"registry": registry}
+		self._nacos_operation_seconds = prometheus_client.Histogram(
+				"nacos_mcp_nacos_operation_seconds",
+				"Duration of the round trips to nacos",
+				["server", "operation", "outcome"], buckets=_NACOS_BUCKETS,
+				**kwargs)
+		self._subscription_pushes = prometheus_client.Counter(
+				"nacos_mcp_subscription_pushes",
+				"Subscription updates pushed by nacos", ["server"], **kwargs)
+		self._subscription_applies = prometheus_client.Counter(
+				"nacos_mcp_subscription_applies",
+				"Coalesced subscription updates applied", ["server"], **kwargs)
+		self._subscription_lag_seconds = prometheus_client.Histogram(
+				"nacos_mcp_subscription_lag_seconds",
+				"Delay between a subscription push and its application",
+				["server"], **kwargs)
+		self._tool_call_seconds = prometheus_client.Histogram(
+				"nacos_mcp_tool_call_seconds", "Duration of the tool calls",
+				["server", "tool"], **kwargs)
+		self._tool_call_errors = prometheus_client.Counter(
+				"nacos_mcp_tool_call_errors", "Tool calls which failed",
+				["server", "tool"], **kwargs)
+		self._result_cache_lookups = prometheus_client.Counter(
+				"nacos_mcp_tool_result_cache_lookups",
+				"Lookups of the tool result cache, by hit or miss",
+				["server", "tool", "outcome"], **kwargs)
+		self._active_sessions = prometheus_client.Gauge(
+				"nacos_mcp_active_sessions", "Open mcp sessions", ["server"],
+				**kwargs)
+
+	def observe_nacos_operation(self, server: str, operation: str,
+			seconds: float, error: bool):
+		self._nacos_operation_seconds.labels(
+				server, operation, "error" if error else "ok").observe(seconds)
+
+	def observe_subscription_push(self, server: str):
+		self._subscription_pushes.labels(server).inc()
+
+	def observe_subscription_applied(self, server: str, lag: float):
+		self._subscription_applies.labels(server).inc()
+		self._subscription_lag_seconds.labels(server).observe(lag)
+
+	def observe_tool_call(self, server: str, tool: str, seconds: float,
+			error: bool):
+		self._tool_call_seconds.labels(server, tool).observe(seconds)
+		if error:
+			self._tool_call_errors.labels(server, tool).inc()
+
+	def observe_result_cache(self, server: str, tool: str, hit: bool):
+		self._result_cache_lookups.labels(
+				server, tool, "hit" if hit else "miss").inc()
+
+	def add_active_sessions(self, server: str, delta: int):
+		self._active_sessions.labels(server).inc(delta)
+
+
+class OpenTelemetryMetrics(_EnabledMetrics):
+	"""Metrics recorded with the OpenTelemetry API.
+
+	They go to the global meter provider, which the application configures
+	with the exporter of its choice.
+	"""
+
+	def __init__(self, meter_provider=None):
+		from opentelemetry import metrics
+
+		meter = metrics.get_meter("nacos_mcp_wrapper",
+								  meter_provider=meter_provider)
+		self._nacos_operation_duration = meter.create_histogram(
+				"nacos_mcp.nacos.operation.duration", unit="s",
+				description="Duration of the round trips to nacos")
+		self._subscription_pushes = meter.create_counter(
+				"nacos_mcp.subscription.pushes",
+				description="Subscription updates pushed by nacos")
+		self._subscription_applies = meter.create_counter(
+				"nacos_mcp.subscription.applies",
+				description="Coalesced subscription updates applied")
+		self._subscription_lag = meter.create_histogram(
+				"nacos_mcp.subscription.lag", unit="s",
+				description="Delay between a subscription push and its application")
+		self._tool_call_duration = meter.create_histogram(
+				"nacos_mcp.tool.call.duration", unit="s",
+				description="Duration of the tool calls")
+		self._tool_call_errors = meter.create_counter(
+				"nacos_mcp.tool.call.errors",
+				description="Tool calls which failed")
+		self._result_cache_lookups = meter.create_counter(
+				"nacos_mcp.tool.result_cache.lookups",
+				description="Lookups of the tool result cache, by hit or miss")
+		self._active_sessions = meter.create_up_down_counter(
+				"nacos_mcp.sessions.active", description="Open mcp sessions")
+
+	def observe_nacos_operation(self, server: str, operation: str,
+			seconds: float, error: bool):
+		self._nacos_operation_duration.record(seconds, {
+			"server": server,
+			"operation": operation,
+			"outcome": "error" if error else "ok",
+		})
+
+	def observe_subscription_push(self, server: str):
+		self._subscription_pushes.add(1, {"server": server})
+
+	def observe_subscription_applied(self, server: str, lag: float):
+		self._subscription_applies.add(1, {"server": server})
+		self._subscription_lag.record(lag, {"server": server})
+
+	def observe_tool_call(self, server: str, tool: str, seconds: float,
+			error: bool):
+		attributes = {"server": server, "tool": tool}
+		self._tool_call_duration.record(seconds, attributes)
+		if error:
+			self._tool_call_errors.add(1, attributes)
+
+	def observe_result_cache(self, server: str, tool: str, hit: bool):
+		self._result_cache_lookups.add(1, {
+			"server": server,
+			"tool": tool,
+			"outcome": "hit" if hit else "miss",
+		})
+
+	def add_active_sessions(self, server: str, delta: int):
+		self._active_sessions.add(delta, {"server": server})
+
+
+NOOP_METRICS = Metrics()
+_backends: dict[str, Metrics] = {}
+_backends_lock = threading.Lock()
+
+
+def get_metrics(backend: MetricsBackend | None,
+		port: int | None = None) -> Metrics:
+	"""Get the process wide metrics of ``backend``, the no-op ones for None.
+
+	Each backend is created once, the servers of a process share its
+	instruments. ``port`` starts the prometheus http exporter.
+	"""
+	if backend is None:
+		return NOOP_METRICS
+	with _backends_lock:
+		metrics = _backends.get(backend)
+		if metrics is not None:
+			return metrics
+		if backend == "prometheus":
+			metrics = PrometheusMetrics()
+			if port is not None:
+				import prometheus_client
+
+				prometheus_client.start_http_server(port)
+				logger.info(f"Serve prometheus metrics on port {port}")
+		elif backend == "opentelemetry":
+			metrics = OpenTelemetryMetrics()
+		else:
+			raise ValueError(f"unknown metrics backend: {backend}")
+		_backends[backend] = metrics
+		return metrics
@@ -0,0 +1,142 @@
+import asyncio
+import contextlib
+import logging
+from collections.abc import AsyncIterator
+from typing import Literal
+
+from nacos_mcp_wrapper.server.nacos_mcp import NacosMCP
+from nacos_mcp_wrapper.server.nacos_settings import NacosSettings
+from nacos_mcp_wrapper.server.shutdown import GracefulShutdown, start_serving
+
+logger = logging.getLogger(__name__)
+
+
+class NacosMCPMultiplexer:
+	"""Serve several NacosMCP servers behind one uvicorn listener.
+
+	Each server is mounted under its own path prefix and registered to nacos
+	with ``prefix + sse_path`` or ``prefix + streamable_http_path`` as export
+	path. All of them run on one event loop, and servers configured with the
+	same nacos settings share one pair of nacos clients.
+
+	Example:
+		multiplexer = NacosMCPMultiplexer(port=18000)
+		multiplexer.mount("/weather", weather_mcp)
+		multiplexer.mount("/search", search_mcp, transport="sse")
+		multiplexer.run()
+	"""
+
+	def __init__(self,
+			host: str = "127.0.0.1",
+			port: int = 8000,
+			log_level: str = "info",
+			nacos_settings: NacosSettings | None = None):
+		"""
+		Args:
+			host: Host of the shared listener
+			port: Port of the shared listener, registered for every server
+			log_level: uvicorn log level
+			nacos_settings: Settings of the listener, REGISTER_IN_BACKGROUND,
+				DRAIN_DELAY and GRACEFUL_SHUTDOWN_TIMEOUT
+		"""
+		self.host = host
+		self.port = port
+		self.log_level = log_level
+		self._nacos_settings = nacos_settings or NacosSettings()
+		self._mounts: list[tuple[str, NacosMCP, str]] = []
+		self.shutdown_timings: dict[str, float] = {}
+
+	def mount(self, prefix: str, mcp: NacosMCP,
+			transport: Literal["sse", "streamable-http"] = "streamable-http"):
+		prefix = "/" + prefix.strip("/")
+		if prefix == "/":
+			raise ValueError("servers need a non empty path prefix")
+		if any(_prefix == prefix for _prefix, _, _ in self._mounts):
+			raise ValueError(f"prefix {prefix} is already mounted")
+		if transport not in ("sse", "streamable-http"):
+			raise ValueError(f"unsupported transport: {transport}")
+		self._mounts.append((prefix, mcp, transport))
+
+	def run(self) -> None:
+		import anyio
+
+		anyio.run(self.run_async)
+
+	def _build_app(self):
+		from starlette.applications import Starlette
+		from starlette.routing import Mount
+
+		routes = []
+		session_managers = []
+		for prefix, mcp, transport in self._mounts:
+			if transport == "sse":
+				# the SSE transport prefixes the message endpoint with the
+				# root path set by the Mount
+				app = mcp.sse_app()
+			else:
+				app = mcp.streamable_http_app()
+				session_managers.append(mcp.session_manager)
+			routes.append(Mount(prefix, app=app))
+
+		@contextlib.asynccontextmanager
+		async def lifespan(app) -> AsyncIterator[None]:
+			# mounted apps don't get lifespan events, run their session
+			# managers here
+			async with contextlib.AsyncExitStack() as stack:
+				for session_manager in session_managers:
+					await stack.enter_async_context(session_manager.run())
+				yield
+
+		return Starlette(routes=routes, lifespan=lifespan)
+
+	def _export_path(self, prefix: str, mcp: NacosMCP, transport: str) -> str:
+		if transport == "sse":
+			return prefix + mcp.settings.sse_path
+		return prefix + mcp.settings.streamable_http_path
+
+	async def run_async(self) -> None:
+		"""Serve all mounted servers and register them to nacos.
+
+		As in ``NacosMCP``, registration finishes before uvicorn starts
+		unless REGISTER_IN_BACKGROUND is enabled, then the servers are
+		registered once the port is accepting connections.
+		"""
+		import uvicorn
+
+		if not self._mounts:
+			raise ValueError("no server mounted")
+		config = uvicorn.Config(
+				self._build_app(),
+				host=self.host,
+				port=self.port,
+				log_level=self.log_level,
+				timeout_graceful_shutdown=self._nacos_settings.GRACEFUL_SHUTDOWN_TIMEOUT,
+		)
+		server = uvicorn.Server(config)
+		nacos_servers = [mcp.nacos_server for _, mcp, _ in self._mounts]
+		shutdown = GracefulShutdown(server, nacos_servers,
+									drain_delay=self._nacos_settings.DRAIN_DELAY)
+		register_task = None
+		try:
+			if not self._nacos_settings.REGISTER_IN_BACKGROUND:
+				await self._register_all()
+				await server.serve()
+				return
+
+			serve_task = await start_serving(server)
+			if server.started:
+				register_task = asyncio.create_task(self._register_all())
+			await serve_task
+		finally:
+			if register_task is not None and not register_task.done():
+				register_task.cancel()
+			await shutdown.close()
+			self.shutdown_timings = shutdown.timings
+
+	async def _register_all(self):
+		await asyncio.gather(*(
+			mcp.nacos_server.register_to_nacos(
+					transport, self.port,
+					self._export_path(prefix, mcp, transport))
+			for prefix, mcp, transport in self._mounts
+		))
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from contextlib import AbstractAsyncContextManager
 from typing import Any, Literal, Collection, Callable
@@ -16,6 +17,7 @@ from mcp.types import Icon
 
 from nacos_mcp_wrapper.server.nacos_server import NacosServer
 from nacos_mcp_wrapper.server.nacos_settings import NacosSettings
+from nacos_mcp_wrapper.server.shutdown import GracefulShutdown, start_serving
 
 logger = logging.getLogger(__name__)
 
@@ -56,6 +58,8 @@ class NacosMCP(FastMCP):
 			AbstractAsyncContextManager[LifespanResultT]] | None) = None,
 			auth: AuthSettings | None = None,
 			transport_security: TransportSecuritySettings | None = None,
+			workers: int = 1,
+			worker_registration: Literal["host", "worker"] = "host",
 	):
 		super().__init__(
 				name=name,
@@ -86,6 +90,15 @@ class NacosMCP(FastMCP):
 				transport_security=transport_security,
 		)
 
+		if nacos_settings is None:
+			nacos_settings = NacosSettings()
+		if workers > 1 and nacos_settings.METRICS_PORT is not None:
+			# the exporter would be started once, in the parent process
+			raise ValueError(
+					"METRICS_PORT can't be used with several workers, leave it "
+					"unset and expose the metrics of the workers, e.g. with "
+					"the multiprocess mode of prometheus_client")
+
 		self._mcp_server = NacosServer(
 				name=name or "FastMCP",
 				nacos_settings=nacos_settings,
@@ -97,48 +110,197 @@ class NacosMCP(FastMCP):
 				if self.settings.lifespan
 				else default_lifespan,
 		)
+		self._mcp_server.uses_request_context = self._tool_uses_context
+		self._workers = workers
+		self._worker_registration = worker_registration
+		self.shutdown_timings: dict[str, float] = {}
 		# Set up MCP protocol handlers
 		self._setup_handlers()
 
+	@property
+	def nacos_server(self) -> NacosServer:
+		return self._mcp_server
+
+	def _tool_uses_context(self, name: str) -> bool:
+		tool = self._tool_manager.get_tool(name)
+		return tool is not None and tool.context_kwarg is not None
+
+	def run(self,
+			transport: Literal["stdio", "sse", "streamable-http"] = "stdio",
+			mount_path: str | None = None) -> None:
+		"""Run the server, in several worker processes if configured.
+
+		With ``workers > 1`` the HTTP transports are served by pre-forked
+		worker processes:
+
+		- ``worker_registration="host"``: the workers share one listening
+		  socket and only the first worker registers the instance to nacos.
+		  Requests are spread over workers without affinity, so this needs
+		  ``stateless_http`` streamable HTTP.
+		- ``worker_registration="worker"``: worker ``i`` listens on
+		  ``port + i`` and registers its own instance, clients stick to the
+		  instance they connected to, which keeps SSE and stateful sessions
+		  working. A SERVICE_PORT is offset by the worker index as well.
+
+		METRICS_PORT can't be combined with several workers.
+		"""
+		if self._workers > 1 and transport in ("sse", "streamable-http"):
+			self._run_workers(transport, mount_path)
+			return
+		super().run(transport, mount_path)
+
 	async def run_stdio_async(self) -> None:
 		"""Run the server using stdio transport."""
 		async with stdio_server() as (read_stream, write_stream):
 			await self._mcp_server.register_to_nacos("stdio")
-			await self._mcp_server.run(
-					read_stream,
-					write_stream,
-					self._mcp_server.create_initialization_options(),
-			)
+			try:
+				await self._mcp_server.run(
+						read_stream,
+						write_stream,
+						self._mcp_server.create_initialization_options(),
+				)
+			finally:
+				await self._mcp_server.close()
 
 	async def run_sse_async(self, mount_path: str | None = None) -> None:
 		"""Run the server using SSE transport."""
-		import uvicorn
-
 		starlette_app = self.sse_app(mount_path)
-		await self._mcp_server.register_to_nacos("sse", self.settings.port,
-												 self.settings.sse_path)
-		config = uvicorn.Config(
-				starlette_app,
-				host=self.settings.host,
-				port=self.settings.port,
-				log_level=self.settings.log_level.lower(),
-		)
-		server = uvicorn.Server(config)
-		await server.serve()
+		await self._serve(starlette_app, "sse", self.settings.sse_path)
 
 	async def run_streamable_http_async(self) -> None:
 		"""Run the server using StreamableHTTP transport."""
+		starlette_app = self.streamable_http_app()
+		await self._serve(starlette_app, "streamable-http",
+						  self.settings.streamable_http_path)
+
+	def _check_workers_supported(self, transport: str):
+		if self._worker_registration not in ("host", "worker"):
+			raise ValueError(
+					f"unknown worker registration: {self._worker_registration}")
+		if self._worker_registration == "worker":
+			return
+		if transport == "sse" or not self.settings.stateless_http:
+			raise ValueError(
+					"sessions are bound to the worker that created them, "
+					"a shared listener needs stateless streamable-http, "
+					"use worker_registration='worker' for sse or stateful sessions")
+
+	def _run_workers(self, transport: str, mount_path: str | None) -> None:
+		import multiprocessing
+		import os
+		import signal
+
 		import uvicorn
 
-		starlette_app = self.streamable_http_app()
-		await self._mcp_server.register_to_nacos("streamable-http",
-												 self.settings.port,
-												 self.settings.streamable_http_path)
+		self._check_workers_supported(transport)
+		sock = None
+		if self._worker_registration == "host":
+			sock = uvicorn.Config(None, host=self.settings.host,
+								  port=self.settings.port).bind_socket()
+
+		context = multiprocessing.get_context("fork")
+		processes = []
+		for index in range(self._workers):
+			process = context.Process(target=self._run_worker,
+									  args=(transport, mount_path, index, sock),
+									  name=f"{self.name}-worker-{index}")
+			process.start()
+			processes.append(process)
+		if sock is not None:
+			sock.close()
+
+		def handle_exit(sig, frame):
+			for _process in processes:
+				if _process.is_alive():
+					os.kill(_process.pid, signal.SIGTERM)
+
+		signal.signal(signal.SIGINT, handle_exit)
+		signal.signal(signal.SIGTERM, handle_exit)
+		for process in processes:
+			process.join()
+
+	def _run_worker(self, transport: str, mount_path: str | None, index: int,
+			sock) -> None:
+		import signal
+
+		import anyio
+
+		# the parent forwards the interrupt of the terminal as SIGTERM
+		signal.signal(signal.SIGINT, signal.SIG_IGN)
+		anyio.run(self._serve_worker, transport, mount_path, index, sock)
+
+	async def _serve_worker(self, transport: str, mount_path: str | None,
+			index: int, sock) -> None:
+		if transport == "sse":
+			starlette_app = self.sse_app(mount_path)
+			path = self.settings.sse_path
+		else:
+			starlette_app = self.streamable_http_app()
+			path = self.settings.streamable_http_path
+		if sock is not None:
+			await self._serve(starlette_app, transport, path,
+							  sockets=[sock], register_instance=index == 0,
+							  worker=True)
+			return
+		service_port = self._mcp_server.nacos_settings.SERVICE_PORT
+		if service_port:
+			service_port += index
+		await self._serve(starlette_app, transport, path,
+						  port=self.settings.port + index,
+						  service_port=service_port, worker=True)
+
+	async def _serve(self, starlette_app, transport: str, path: str,
+			port: int | None = None, sockets: list | None = None,
+			register_instance: bool = True, worker: bool = False,
+			service_port: int | None = None) -> None:
+		"""Serve the app with uvicorn and register it to nacos.
+
+		By default registration finishes before uvicorn starts. When
+		REGISTER_IN_BACKGROUND is enabled, uvicorn binds first and the
+		instance is registered once the socket is accepting connections.
+		Use ``NacosServer.wait_until_registered`` to observe readiness.
+		On shutdown the instance is deregistered before uvicorn stops, see
+		``GracefulShutdown``.
+		"""
+		import uvicorn
+
+		if port is None:
+			port = self.settings.port
+		nacos_settings = self._mcp_server.nacos_settings
 		config = uvicorn.Config(
 				starlette_app,
 				host=self.settings.host,
-				port=self.settings.port,
+				port=port,
 				log_level=self.settings.log_level.lower(),
+				timeout_graceful_shutdown=nacos_settings.GRACEFUL_SHUTDOWN_TIMEOUT,
 		)
 		server = uvicorn.Server(config)
-		await server.serve()
+		shutdown = GracefulShutdown(server, [self._mcp_server],
+									drain_delay=nacos_settings.DRAIN_DELAY,
+									shared_instance=not register_instance,
+									worker=worker)
+		try:
+			if not nacos_settings.REGISTER_IN_BACKGROUND:
+				await self._mcp_server.register_to_nacos(
+						transport, port, path,
+						register_instance=register_instance,
+						service_port=service_port)
+				await server.serve(sockets=sockets)
+				return
+
+			serve_task = await start_serving(server, sockets)
+			register_task = None
+			if server.started:
+				register_task = asyncio.create_task(
+						self._mcp_server.register_to_nacos(
+								transport, port, path,
+								register_instance=register_instance,
+								service_port=service_port))
+			try:
+				await serve_task
+			finally:
+				if register_task is not None and not register_task.done():
+					register_task.cancel()
+		finally:
+			await shutdown.close()
+			self.shutdown_timings = shutdown.timings
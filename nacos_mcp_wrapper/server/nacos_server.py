@@ -1,30 +1,49 @@
+from __future__ import annotations
+
 import asyncio
-import json
+import contextvars
 import logging
+import random
+import time
+import weakref
 from contextlib import AbstractAsyncContextManager
-from typing import Literal, Callable, Any
+from dataclasses import dataclass
+from typing import Literal, Callable, Any, TYPE_CHECKING
 from importlib import metadata
 
-import jsonref
+import pydantic_core
 from mcp import types, Tool
 from mcp.server import Server
+from mcp.server.lowlevel import NotificationOptions
 from mcp.server.lowlevel.server import LifespanResultT, RequestT
-from mcp.server.lowlevel.server import lifespan
-
-from v2.nacos import RegisterInstanceParam, \
-	ClientConfigBuilder, NacosException, NacosNamingService
-from v2.nacos.ai.model.ai_param import GetMcpServerParam, \
-	RegisterMcpServerEndpointParam, ReleaseMcpServerParam, \
-	SubscribeMcpServerParam
-from v2.nacos.ai.model.mcp.mcp import McpToolMeta, McpServerDetailInfo, McpTool, \
-	McpServiceRef, McpToolSpecification, McpServerBasicInfo, \
-	McpServerRemoteServiceConfig, McpEndpointSpec
-from v2.nacos.ai.model.mcp.registry import ServerVersionDetail
-from v2.nacos.ai.nacos_ai_service import NacosAIService
+from mcp.server.lowlevel.server import lifespan, request_ctx
+
 
+from nacos_mcp_wrapper.server.cache import ServerDetailCache
+from nacos_mcp_wrapper.server.client_pool import client_pool, NacosClients
+from nacos_mcp_wrapper.server.load_report import LoadTracker, LoadReporter
+from nacos_mcp_wrapper.server.metrics import get_metrics
 from nacos_mcp_wrapper.server.nacos_settings import NacosSettings
+from nacos_mcp_wrapper.server.result_cache import ToolResultCache, \
+	cache_ttl_from_meta, result_cache_key
+from nacos_mcp_wrapper.server.scheduler import CoalescingScheduler
+from nacos_mcp_wrapper.server.single_flight import SingleFlight, \
+	single_flight_from_meta
+from nacos_mcp_wrapper.server.tool_policy import ToolPolicy, ToolLimiter, \
+	ToolAdmissionError
 from nacos_mcp_wrapper.server.utils import get_first_non_loopback_ip, \
-	jsonref_default, compare, pkg_version
+	resolve_refs, copy_json, pkg_version, content_digest, \
+	schema_fingerprint, diff_nodes, SchemaDiff
+
+# The nacos sdk pulls in grpc and the crypto stack, which dominates the
+# import time of this package. It is only imported once a server talks to
+# nacos, type-only names stay behind TYPE_CHECKING.
+if TYPE_CHECKING:
+	from v2.nacos import NacosNamingService, RegisterInstanceParam
+	from v2.nacos.ai.model.ai_param import ReleaseMcpServerParam
+	from v2.nacos.ai.model.mcp.mcp import McpToolMeta, McpServerDetailInfo, \
+		McpServiceRef
+	from v2.nacos.ai.nacos_ai_service import NacosAIService
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +54,40 @@ TRANSPORT_MAP = {
 }
 
 
+def _detached_context() -> contextvars.Context:
+	"""Copy of the current context without the request context, for work
+	shared by the requests of several sessions."""
+	context = contextvars.Context()
+	for var, value in contextvars.copy_context().items():
+		if var is not request_ctx:
+			context.run(var.set, value)
+	return context
+
+
+@dataclass(frozen=True)
+class ToolsSnapshot:
+	"""Immutable view of the enabled tools served by ``tools/list``."""
+
+	version: int
+	tools: tuple[Tool, ...]
+	result: types.ServerResult
+
+
+class IncompatibleServerError(Exception):
+	"""The mcp server in nacos does not match the local one, retrying won't help."""
+
+
+@dataclass
+class RegistrationState:
+	"""Progress of the registration to nacos and of its retries."""
+
+	status: Literal[
+		"pending", "registering", "registered", "retrying", "failed"] = "pending"
+	attempts: int = 0
+	last_error: str | None = None
+	next_retry_at: float | None = None
+
+
 class NacosServer(Server):
 	def __init__(
 			self,
@@ -64,25 +117,12 @@ class NacosServer(Server):
 			nacos_settings.NAMESPACE = "public"
 
 		self._nacos_settings = nacos_settings
-		if self._nacos_settings.SERVICE_IP is None:
-			self._nacos_settings.SERVICE_IP = get_first_non_loopback_ip()
 
 		self._type: str | None = None
-		ai_client_config_builder = ClientConfigBuilder()
-		ai_client_config_builder.server_address(
-				self._nacos_settings.SERVER_ADDR).namespace_id(
-				self._nacos_settings.NAMESPACE).access_key(
-				self._nacos_settings.ACCESS_KEY).secret_key(
-				self._nacos_settings.SECRET_KEY).username(
-				self._nacos_settings.USERNAME).password(
-				self._nacos_settings.PASSWORD).app_conn_labels(
-				self._nacos_settings.APP_CONN_LABELS)
-
-		if self._nacos_settings.CREDENTIAL_PROVIDER is not None:
-			ai_client_config_builder.credentials_provider(
-					self._nacos_settings.CREDENTIAL_PROVIDER)
-
-		self._ai_client_config = ai_client_config_builder.build()
+		self._register_instance_enabled = True
+		self._service_port: int | None = None
+		self._registered_instance: RegisterInstanceParam | None = None
+		self._clients: NacosClients | None = None
 
 		self._nacos_ai_service: NacosAIService | None = None
 
@@ -90,15 +130,119 @@ class NacosServer(Server):
 
 		self._tmp_tools: dict[str, Tool] = {}
 		self._tools_meta: dict[str, McpToolMeta] = {}
+		self._tools_fingerprint: dict[str, str | None] = {}
 		self._tmp_tools_list_handler = None
+		self._tools_snapshot: ToolsSnapshot | None = None
+		self._applied_tool_spec_digest: str | None = None
+		self._applied_tools_digest: dict[str, str] = {}
+		# sessions which listed the tools, notified on tools/list_changed
+		self._tools_sessions = weakref.WeakSet()
+		self._update_scheduler: CoalescingScheduler[McpServerDetailInfo] = CoalescingScheduler(
+				self._apply_server_detail,
+				quiet_window=self._nacos_settings.SUBSCRIBE_QUIET_WINDOW,
+				max_delay=self._nacos_settings.SUBSCRIBE_MAX_DELAY)
+		self._registered = asyncio.Event()
+		self._registration_state = RegistrationState()
+		self._reconcile_task: asyncio.Task | None = None
+		self._local_tools_ready = False
+		self._subscribed = False
+		self._detail_cache: ServerDetailCache | None = None
+		if self._nacos_settings.CACHE_DIR:
+			self._detail_cache = ServerDetailCache(
+					self._nacos_settings.CACHE_DIR,
+					self._nacos_settings.NAMESPACE, self.name, self.version)
+		self._schemas_cache: dict[str, dict[str, Any]] = {}
+		# the tools are served with the descriptions of the cached nacos info
+		self._serving_cached_detail = False
+		# digest of what this process would release, and of what was last
+		# released or checked against nacos, see _descriptor_digest
+		self._local_descriptor: str | None = None
+		self._published_descriptor: str | None = None
+		self._background_register_task: asyncio.Task | None = None
+		self._metrics = get_metrics(self._nacos_settings.METRICS,
+									self._nacos_settings.METRICS_PORT)
+		self._call_tool_handler = None
+		# admission control of the tools with a policy in their nacos meta
+		self._tool_limiters: dict[str, ToolLimiter] = {}
+		self._result_cache: ToolResultCache | None = None
+		if self._nacos_settings.TOOL_RESULT_CACHE_SIZE > 0:
+			self._result_cache = ToolResultCache(
+					self._nacos_settings.TOOL_RESULT_CACHE_SIZE)
+		# result TTL of the tools marked cacheable in their nacos meta
+		self._cache_ttls: dict[str, float] = {}
+		# tools marked singleFlight in their nacos meta
+		self._single_flight_tools: set[str] = set()
+		self._single_flight = SingleFlight(_detached_context)
+		# whether a tool needs the request context of its caller, such tools
+		# are never coalesced. Set by NacosMCP, which knows its tools.
+		self.uses_request_context: Callable[[str], bool] = lambda name: False
+		# loop time of the oldest subscription push not applied yet
+		self._push_received_at: float | None = None
+		self._load_tracker: LoadTracker | None = None
+		if self._nacos_settings.LOAD_REPORT_INTERVAL > 0:
+			self._load_tracker = LoadTracker()
+		self._load_reporter: LoadReporter | None = None
+
+	@property
+	def nacos_settings(self) -> NacosSettings:
+		return self._nacos_settings
+
+	@property
+	def is_registered(self) -> bool:
+		"""Whether the server has been registered to nacos successfully."""
+		return self._registered.is_set()
+
+	@property
+	def registration_state(self) -> RegistrationState:
+		return self._registration_state
+
+	async def wait_until_registered(self, timeout: float | None = None) -> bool:
+		"""Wait until registration to nacos is done.
+
+		Returns:
+			bool: True if registered, False if the timeout expired first
+		"""
+		try:
+			await asyncio.wait_for(self._registered.wait(), timeout)
+		except asyncio.TimeoutError:
+			return False
+		return True
 
 	async def _list_tmp_tools(self) -> list[Tool]:
 		"""List all available tools."""
-		return [
-			info for info in list(self._tmp_tools.values()) if
-			self.is_tool_enabled(
-					info.name)
-		]
+		if self._tools_snapshot is None:
+			self._refresh_tools_snapshot()
+		return list(self._tools_snapshot.tools)
+
+	async def _handle_list_tools(self, req: types.ListToolsRequest | None):
+		try:
+			self._tools_sessions.add(self.request_context.session)
+		except LookupError:
+			pass
+		if self._tools_snapshot is None:
+			self._refresh_tools_snapshot()
+		return self._tools_snapshot.result
+
+	def _refresh_tools_snapshot(self):
+		"""Rebuild the tools/list snapshot and swap it in.
+
+		Must be called whenever the local tools or the tools meta change.
+		"""
+		tools = tuple(
+				info for info in self._tmp_tools.values() if
+				self.is_tool_enabled(info.name)
+		)
+		version = 1 if self._tools_snapshot is None else self._tools_snapshot.version + 1
+		result = types.ServerResult(types.ListToolsResult(tools=list(tools)))
+		# The lowlevel server validates tool calls against this cache, it is
+		# normally refreshed by its own tools/list handler.
+		tool_cache = getattr(self, "_tool_cache", None)
+		if tool_cache is not None:
+			tool_cache.clear()
+			for tool in tools:
+				tool_cache[tool.name] = tool
+		self._tools_snapshot = ToolsSnapshot(version=version, tools=tools,
+											 result=result)
 
 	def is_tool_enabled(self, tool_name: str) -> bool:
 		if self._tools_meta is None:
@@ -110,7 +254,15 @@ class NacosServer(Server):
 					return False
 		return True
 
-	def update_tools(self, server_detail_info: McpServerDetailInfo):
+	def update_tools(self, server_detail_info: McpServerDetailInfo) -> set[str]:
+		"""Apply the tools meta and descriptions pushed by nacos.
+
+		The update is diffed against the last applied tool spec, only the
+		tools whose nacos definition or meta changed are touched.
+
+		Returns:
+			set[str]: Names of the local tools that changed
+		"""
 
 		def update_args_description(_local_args: dict[str, Any],
 				_nacos_args: dict[str, Any]):
@@ -121,68 +273,287 @@ class NacosServer(Server):
 
 		tool_spec = server_detail_info.toolSpec
 		if tool_spec is None:
-			return
-		if tool_spec.toolsMeta is None:
-			self._tools_meta = {}
-		else:
-			self._tools_meta = tool_spec.toolsMeta
-		if tool_spec.tools is None:
-			return
-		for tool in tool_spec.tools:
-			if tool.name in self._tmp_tools:
-				local_tool = self._tmp_tools[tool.name]
+			return set()
+		spec_digest = content_digest(tool_spec.model_dump_json(exclude_none=True))
+		if spec_digest == self._applied_tool_spec_digest:
+			return set()
+
+		tools_meta = {} if tool_spec.toolsMeta is None else tool_spec.toolsMeta
+		nacos_tools = {tool.name: tool for tool in tool_spec.tools or []}
+		tools_digest = {}
+		changed = set()
+		for name in self._tmp_tools:
+			tool = nacos_tools.get(name)
+			meta = tools_meta.get(name)
+			tools_digest[name] = content_digest(
+					None if tool is None else tool.model_dump_json(
+							exclude_none=True),
+					None if meta is None else meta.model_dump_json(
+							exclude_none=True))
+			if self._applied_tools_digest.get(name) != tools_digest[name]:
+				changed.add(name)
+
+		self._tools_meta = tools_meta
+		if tool_spec.tools is not None:
+			for name in changed:
+				tool = nacos_tools.get(name)
+				if tool is None:
+					continue
+				local_tool = self._tmp_tools[name]
 				if tool.description is not None:
 					local_tool.description = tool.description
 
-				local_args = local_tool.inputSchema["properties"]
-				nacos_args = tool.inputSchema["properties"]
-				update_args_description(local_args, nacos_args)
-				continue
+				local_args = local_tool.inputSchema.get("properties")
+				nacos_args = (tool.inputSchema or {}).get("properties")
+				if local_args is not None and nacos_args is not None:
+					update_args_description(local_args, nacos_args)
+		self._applied_tool_spec_digest = spec_digest
+		self._applied_tools_digest = tools_digest
+		self._update_tool_limiters(changed)
+		self._update_result_cache(changed)
+		for name in changed:
+			if not single_flight_from_meta(self._tools_meta.get(name)):
+				self._single_flight_tools.discard(name)
+			elif self.uses_request_context(name):
+				logger.warning(
+						f"Ignore singleFlight of tool {name}, it uses the request context")
+				self._single_flight_tools.discard(name)
+			else:
+				self._single_flight_tools.add(name)
+		if changed or self._tools_snapshot is None:
+			self._refresh_tools_snapshot()
+		return changed
+
+	def _update_tool_limiters(self, tool_names: set[str]):
+		for name in tool_names:
+			policy = ToolPolicy.from_meta(name, self._tools_meta.get(name))
+			limiter = self._tool_limiters.get(name)
+			if policy is None:
+				self._tool_limiters.pop(name, None)
+			elif limiter is None or limiter.policy != policy:
+				logger.info(f"Apply policy of tool {name}: {policy}")
+				self._tool_limiters[name] = ToolLimiter(name, policy)
+
+	def _update_result_cache(self, tool_names: set[str]):
+		if self._result_cache is None:
+			return
+		for name in tool_names:
+			# the description, schema or meta of the tool changed in nacos,
+			# results computed before don't hold anymore
+			self._result_cache.invalidate(name)
+			ttl = cache_ttl_from_meta(name, self._tools_meta.get(name),
+									  self._nacos_settings.TOOL_RESULT_CACHE_TTL)
+			if ttl is None:
+				self._cache_ttls.pop(name, None)
+			else:
+				self._cache_ttls[name] = ttl
+
+	@property
+	def result_cache(self) -> ToolResultCache | None:
+		return self._result_cache
+
+	async def notify_tools_changed(self):
+		"""Send tools/list_changed to the sessions which listed the tools."""
+		for session in list(self._tools_sessions):
+			try:
+				await session.send_tool_list_changed()
+			except Exception as e:
+				logger.debug("drop session from tools notification: %s", e)
+				self._tools_sessions.discard(session)
+
+	def create_initialization_options(
+			self,
+			notification_options: NotificationOptions | None = None,
+			experimental_capabilities: dict[str, dict[str, Any]] | None = None,
+	):
+		if notification_options is None:
+			notification_options = NotificationOptions(tools_changed=True)
+		return super().create_initialization_options(
+				notification_options, experimental_capabilities)
+
+	def call_tool(self, *args, **kwargs):
+		"""Register the tools/call handler, wrapped by ``_handle_call_tool``."""
+		register = super().call_tool(*args, **kwargs)
+
+		def decorator(func):
+			result = register(func)
+			self._call_tool_handler = self.request_handlers[
+				types.CallToolRequest]
+			self.request_handlers[
+				types.CallToolRequest] = self._handle_call_tool
+			return result
+
+		return decorator
+
+	async def _handle_call_tool(self, req: types.CallToolRequest):
+		load_tracker = self._load_tracker
+		if not self._metrics.enabled and load_tracker is None:
+			return await self._invoke_tool(req)
+		start = time.perf_counter()
+		error = True
+		if load_tracker is not None:
+			load_tracker.call_started()
+		try:
+			result = await self._invoke_tool(req)
+			error = bool(getattr(result.root, "isError", False))
+			return result
+		finally:
+			elapsed = time.perf_counter() - start
+			if load_tracker is not None:
+				load_tracker.call_finished(elapsed)
+			if self._metrics.enabled:
+				self._metrics.observe_tool_call(
+						self.name, self._tool_label(req.params.name), elapsed,
+						error)
+
+	def _tool_label(self, tool_name: str) -> str:
+		"""Metric label of a called tool. The name comes from the client,
+		unknown names share one label to keep the label set bounded."""
+		if tool_name in self._tmp_tools:
+			return tool_name
+		tool_cache = getattr(self, "_tool_cache", None)
+		if tool_cache is not None and tool_name in tool_cache:
+			return tool_name
+		return "unknown"
+
+	async def _invoke_tool(self, req: types.CallToolRequest):
+		ttl = self._cache_ttls.get(req.params.name)
+		if ttl is None:
+			return await self._coalesce_tool(req)
+		key = result_cache_key(req.params.name, req.params.arguments)
+		if key is None:
+			return await self._coalesce_tool(req)
+		result = self._result_cache.get(key)
+		if self._metrics.enabled:
+			self._metrics.observe_result_cache(self.name, req.params.name,
+											   result is not None)
+		if result is not None:
+			return result
+		result = await self._coalesce_tool(req, key)
+		if not getattr(result.root, "isError", False):
+			self._result_cache.put(key, result, ttl)
+		return result
+
+	async def _coalesce_tool(self, req: types.CallToolRequest, key=None):
+		"""Share one call between identical concurrent calls of the tools
+		marked singleFlight.
+
+		The shared call runs without request context, so a caller which
+		disconnects can't fail it for the others. Tools using the request
+		context (progress, logging) are not coalesced.
+		"""
+		if req.params.name not in self._single_flight_tools:
+			return await self._admit_tool(req)
+		if key is None:
+			key = result_cache_key(req.params.name, req.params.arguments)
+			if key is None:
+				return await self._admit_tool(req)
+		return await self._single_flight.run(key, self._admit_tool, req)
+
+	async def _admit_tool(self, req: types.CallToolRequest):
+		limiter = self._tool_limiters.get(req.params.name)
+		if limiter is None:
+			return await self._call_tool_handler(req)
+		try:
+			return await limiter.run(self._call_tool_handler, req)
+		except ToolAdmissionError as e:
+			logger.warning("%s", e)
+			return self._tool_error_result(str(e))
+
+	@staticmethod
+	def _tool_error_result(message: str) -> types.ServerResult:
+		return types.ServerResult(types.CallToolResult(
+				content=[types.TextContent(type="text", text=message)],
+				isError=True))
+
+	async def run(self, *args, **kwargs):
+		if not self._metrics.enabled:
+			return await super().run(*args, **kwargs)
+		self._metrics.add_active_sessions(self.name, 1)
+		try:
+			return await super().run(*args, **kwargs)
+		finally:
+			self._metrics.add_active_sessions(self.name, -1)
 
 	async def init_tools_tmp(self):
-		_tmp_tools = await self.request_handlers[
-			types.ListToolsRequest](
-				None)
+		if self._tmp_tools_list_handler is None:
+			self._tmp_tools_list_handler = self.request_handlers[
+				types.ListToolsRequest]
+		_tmp_tools = await self._tmp_tools_list_handler(None)
+		self._tmp_tools = {}
 		for _tmp_tool in _tmp_tools.root.tools:
 			self._tmp_tools[_tmp_tool.name] = _tmp_tool
-		self._tmp_tools_list_handler = self.request_handlers[
-			types.ListToolsRequest]
+		# the local descriptions are back, nacos ones must be applied again
+		self._applied_tool_spec_digest = None
+		self._applied_tools_digest = {}
 
+		cached_schemas = self._schemas_cache
+		self._schemas_cache = {}
 		for tool in self._tmp_tools.values():
-			resolved_data = jsonref.JsonRef.replace_refs(tool.inputSchema)
-			resolved_data = json.dumps(resolved_data, default=jsonref_default)
-			resolved_data = json.loads(resolved_data)
-			tool.inputSchema = resolved_data
+			if self._detail_cache is None:
+				# nothing to look up or to save, the digest would be wasted
+				resolved_data = resolve_refs(tool.inputSchema)
+				tool.inputSchema = resolved_data
+				self._tools_fingerprint[tool.name] = schema_fingerprint(
+						resolved_data)
+				continue
+			# the serialization keeps the key order, a schema which only
+			# reorders its keys misses the cache
+			schema_digest = content_digest(pydantic_core.to_json(
+					tool.inputSchema, fallback=str).decode("utf-8"))
+			cached_schema = cached_schemas.get(tool.name)
+			if cached_schema is not None and cached_schema.get(
+					"digest") == schema_digest:
+				resolved_data = cached_schema["schema"]
+				fingerprint = cached_schema.get("fingerprint")
+			else:
+				resolved_data = resolve_refs(tool.inputSchema)
+				fingerprint = None
+			if fingerprint is None:
+				fingerprint = schema_fingerprint(resolved_data)
+			# update_tools edits the descriptions of the served schema in
+			# place, the cache keeps the local one
+			self._schemas_cache[tool.name] = {"digest": schema_digest,
+											  "fingerprint": fingerprint,
+											  "schema": resolved_data}
+			tool.inputSchema = copy_json(resolved_data)
+			self._tools_fingerprint[tool.name] = fingerprint
 
-	def check_tools_compatible(self,
-			server_detail_info: McpServerDetailInfo) -> bool:
+	def diff_tools(self, server_detail_info: McpServerDetailInfo,
+			collect_all: bool = False) -> list[SchemaDiff]:
+		"""Diff the tools in nacos (expected) against the local tools (actual)."""
 		if (server_detail_info.toolSpec is None
 				or server_detail_info.toolSpec.tools is None or len(
 						server_detail_info.toolSpec.tools) == 0):
-			return True
+			return []
 		tools_spec = server_detail_info.toolSpec
 		tools_in_nacos = {}
 		for tool in tools_spec.tools:
 			tools_in_nacos[tool.name] = tool
 
-		tools_in_local = {}
-		for name, tool in self._tmp_tools.items():
-			tools_in_local[name] = McpTool(
-					name=tool.name,
-					description=tool.description,
-					inputSchema=tool.inputSchema,
-			)
-		if tools_in_nacos.keys() != tools_in_local.keys():
-			return False
+		diffs = []
+		for name in tools_in_nacos.keys() - self._tmp_tools.keys():
+			diffs.append(SchemaDiff(name, "tool", None))
+		for name in self._tmp_tools.keys() - tools_in_nacos.keys():
+			diffs.append(SchemaDiff(name, None, "tool"))
 
 		for name, tool in tools_in_nacos.items():
-			str_tools_in_nacos = tool.model_dump_json(exclude_none=True)
-			str_tools_in_local = tools_in_local[name].model_dump_json(
-					exclude_none=True)
-			if not compare(str_tools_in_nacos, str_tools_in_local):
-				return False
+			if diffs and not collect_all:
+				break
+			if name not in self._tmp_tools:
+				continue
+			local_fingerprint = self._tools_fingerprint.get(name)
+			if local_fingerprint is not None and local_fingerprint == schema_fingerprint(
+					tool.inputSchema):
+				continue
+			diffs.extend(diff_nodes(tool.inputSchema,
+									self._tmp_tools[name].inputSchema,
+									collect_all, path=name))
+		return diffs
 
-		return True
+	def check_tools_compatible(self,
+			server_detail_info: McpServerDetailInfo) -> bool:
+		return not self.diff_tools(server_detail_info)
 
 	def check_compatible(self, server_detail_info: McpServerDetailInfo) -> (
 			bool, str):
@@ -191,9 +562,12 @@ class NacosServer(Server):
 		if server_detail_info.protocol != self._type:
 			return False, f"protocol not compatible, local protocol:{self._type}, remote protocol:{server_detail_info.protocol}"
 		if types.ListToolsRequest in self.request_handlers:
-			check_tools_result = self.check_tools_compatible(server_detail_info)
-			if not check_tools_result:
-				return False, f"tools not compatible, local tools:{self._tmp_tools}, remote tools:{server_detail_info.toolSpec}"
+			diffs = self.diff_tools(server_detail_info, collect_all=True)
+			if diffs:
+				return False, f"tools not compatible, {'; '.join(str(diff) for diff in diffs)}"
+		if self._type == "stdio":
+			# a stdio server is released without service
+			return True, ""
 		mcp_service_ref = server_detail_info.remoteServerConfig.serviceRef
 		is_same_service, error_msg = self.is_service_ref_same(mcp_service_ref)
 		if not is_same_service:
@@ -217,170 +591,592 @@ class NacosServer(Server):
 		else:
 			return self.name + "::" + self.version
 
+	@property
+	def subscription_counters(self) -> dict[str, int]:
+		"""Subscription pushes received from nacos versus actually applied."""
+		return {
+			"received": self._update_scheduler.received,
+			"applied": self._update_scheduler.applied,
+		}
+
+	async def flush_subscription_updates(self):
+		"""Apply the subscription push still waiting for its quiet window,
+		if any."""
+		await self._update_scheduler.flush()
+
+	async def _apply_server_detail(self,
+			server_detail_info: McpServerDetailInfo):
+		if self._push_received_at is not None:
+			self._metrics.observe_subscription_applied(
+					self.name,
+					asyncio.get_running_loop().time() - self._push_received_at)
+			self._push_received_at = None
+		if self.update_tools(server_detail_info):
+			await self.notify_tools_changed()
+		await self._save_cache(server_detail_info)
+
 	async def _subscribe_call_back(self, mcp_id: str, namespace_id: str,
 			mcp_name: str, mcp_server_detail_info: McpServerDetailInfo):
-		logger.info(
-				f"mcp_id:{mcp_id}, namespace_id:{namespace_id},"
-				f" mcp_name:{mcp_name} changed, mcp_server_detail_info:{McpServerDetailInfo}")
-		self.update_tools(mcp_server_detail_info)
+		logger.info("mcp_id:%s, namespace_id:%s, mcp_name:%s changed",
+					mcp_id, namespace_id, mcp_name)
+		logger.debug("mcp_name:%s, mcp_server_detail_info:%s", mcp_name,
+					 mcp_server_detail_info)
+		if self._metrics.enabled:
+			self._metrics.observe_subscription_push(self.name)
+			if self._push_received_at is None:
+				self._push_received_at = asyncio.get_running_loop().time()
+		self._update_scheduler.submit(mcp_server_detail_info)
 
 	async def subscribe(self):
-		await self._nacos_ai_service.subscribe_mcp_server(
-				SubscribeMcpServerParam(
-						mcp_name=self.name,
-						version=self.version,
-						subscribe_callback=self._subscribe_call_back
-				))
+		from v2.nacos.ai.model.ai_param import SubscribeMcpServerParam
 
-	async def register_to_nacos(self,
-			transport: Literal["stdio", "sse", "streamable-http"] = "stdio",
-			port: int = 8000,
-			path: str = "/sse"):
+		if self._subscribed:
+			return
+		with self._timed("subscribe_mcp_server"):
+			await self._nacos_ai_service.subscribe_mcp_server(
+					SubscribeMcpServerParam(
+							mcp_name=self.name,
+							version=self.version,
+							subscribe_callback=self._subscribe_call_back
+					))
+		self._subscribed = True
+
+	def _need_register_instance(self) -> bool:
+		return self._register_instance_enabled and self._nacos_settings.SERVICE_REGISTER and (
+				self._type == "mcp-sse" or self._type == "mcp-streamable")
+
+	async def _fetch_mcp_server(self) -> McpServerDetailInfo | None:
+		from v2.nacos.ai.model.ai_param import GetMcpServerParam
+
+		await self._create_ai_service()
 		try:
-			self._type = TRANSPORT_MAP.get(transport, None)
-			self._nacos_ai_service = await NacosAIService.create_ai_service(
-					self._ai_client_config
-			)
-			self._nacos_naming_service = await NacosNamingService.create_naming_service(
-					self._ai_client_config
-			)
-			server_detail_info = None
-			try:
-				server_detail_info = await self._nacos_ai_service.get_mcp_server(
+			with self._timed("get_mcp_server"):
+				return await self._nacos_ai_service.get_mcp_server(
 						GetMcpServerParam(
 								mcp_name=self.name,
 								version=self.version
 						))
-			except Exception as e:
-				logger.info(
-						f"can not found McpServer info from nacos,{self.name},version:{self.version}")
+		except Exception as e:
+			logger.info(
+					f"can not found McpServer info from nacos,{self.name},version:{self.version}")
+			return None
 
-			if types.ListToolsRequest in self.request_handlers:
-				await self.init_tools_tmp()
-				self.list_tools()(self._list_tmp_tools)
-
-			if server_detail_info is not None:
-				is_compatible, error_msg = self.check_compatible(
-						server_detail_info)
-				if not is_compatible:
-					logger.error(
-							f"mcp server info is not compatible,{self.name},version:{self.version},reason:{error_msg}")
-					raise NacosException(
-							f"mcp server info is not compatible,{self.name},version:{self.version},reason:{error_msg}"
-					)
-				if types.ListToolsRequest in self.request_handlers:
-					self.update_tools(server_detail_info)
-				if self._nacos_settings.SERVICE_REGISTER and (
-						self._type == "mcp-sse"
-						or self._type == "mcp-streamable"):
-					version = metadata.version('nacos-mcp-wrapper-python')
-					service_meta_data = {
-						"source": f"nacos-mcp-wrapper-python-{version}",
-						**self._nacos_settings.SERVICE_META_DATA}
-					await self._nacos_naming_service.register_instance(
-							request=RegisterInstanceParam(
-									group_name=server_detail_info.remoteServerConfig.serviceRef.groupName,
-									service_name=server_detail_info.remoteServerConfig.serviceRef.serviceName,
-									ip=self._nacos_settings.SERVICE_IP,
-									port=self._nacos_settings.SERVICE_PORT if self._nacos_settings.SERVICE_PORT else port,
-									ephemeral=self._nacos_settings.SERVICE_EPHEMERAL,
-									metadata=service_meta_data
-							)
-					)
-				await self.subscribe()
-				logger.info(
-						f"Register to nacos success,{self.name},version:{self.version}")
-				return
+	async def _create_ai_service(self):
+		if self._nacos_ai_service is not None:
+			return
+		with self._timed("create_ai_service"):
+			self._nacos_ai_service = await self._acquire_clients().ai_service()
 
-			mcp_tool_specification = None
-			if types.ListToolsRequest in self.request_handlers:
-				tool_spec = [
-					McpTool(
-							name=tool.name,
-							description=tool.description,
-							inputSchema=tool.inputSchema,
-					)
-					for tool in list(self._tmp_tools.values())
-				]
-				mcp_tool_specification = McpToolSpecification(
-						tools=tool_spec
+	async def _create_naming_service(self):
+		if not self._need_register_instance() or self._nacos_naming_service is not None:
+			return
+		with self._timed("create_naming_service"):
+			self._nacos_naming_service = await self._acquire_clients().naming_service()
+
+	def _timed(self, operation: str):
+		return self._metrics.nacos_operation(self.name, operation)
+
+	async def _resolve_service_ip(self):
+		if not self._need_register_instance() or self._nacos_settings.SERVICE_IP is not None:
+			return
+		# interface enumeration and the DNS fallback may block
+		self._nacos_settings.SERVICE_IP = await asyncio.to_thread(
+				get_first_non_loopback_ip,
+				self._nacos_settings.SERVICE_IP_PREFERENCE)
+
+	def _acquire_clients(self) -> NacosClients:
+		if self._clients is None:
+			self._clients = client_pool.acquire_for(self._nacos_settings)
+		return self._clients
+
+	async def _init_local_tools(self):
+		if self._local_tools_ready:
+			return
+		cached = {}
+		if self._detail_cache is not None:
+			cached = await asyncio.to_thread(self._detail_cache.load) or {}
+		self._published_descriptor = cached.get("descriptor")
+		if types.ListToolsRequest not in self.request_handlers:
+			self._local_descriptor = self._descriptor_digest()
+			self._local_tools_ready = True
+			return
+		self._schemas_cache = cached.get("schemas") or {}
+		cached_detail = cached.get("server_detail_info")
+		await self.init_tools_tmp()
+		self._local_descriptor = self._descriptor_digest()
+		self._refresh_tools_snapshot()
+		self.request_handlers[
+			types.ListToolsRequest] = self._handle_list_tools
+		self._local_tools_ready = True
+		if cached_detail is not None:
+			self._serving_cached_detail = self._apply_cached_detail(
+					cached_detail)
+
+	def _descriptor_digest(self) -> str:
+		"""Digest of the local server as released to nacos.
+
+		Covers the version, the protocol, the instructions and, for each
+		tool, its local description and input schema fingerprint. Must be
+		computed before nacos descriptions are applied to the tools.
+		"""
+		parts = [self.version, self._type, self.instructions]
+		for name in sorted(self._tmp_tools):
+			fingerprint = self._tools_fingerprint.get(name)
+			if fingerprint is None:
+				fingerprint = self._schemas_cache.get(name, {}).get("digest")
+			parts.extend((name, self._tmp_tools[name].description, fingerprint))
+		return content_digest(*parts)
+
+	def _apply_cached_detail(self, cached_detail: dict[str, Any]) -> bool:
+		"""Serve the cached nacos descriptions until nacos is revalidated."""
+		from v2.nacos.ai.model.mcp.mcp import McpServerDetailInfo
+
+		try:
+			server_detail_info = McpServerDetailInfo.model_validate(
+					cached_detail)
+		except Exception as e:
+			logger.warning(f"Ignore invalid mcp server cache of {self.name}: {e}")
+			return False
+		if self.diff_tools(server_detail_info):
+			logger.info(
+					f"Ignore mcp server cache of {self.name}, local tools changed")
+			return False
+		self.update_tools(server_detail_info)
+		return True
+
+	async def _save_cache(self, server_detail_info: McpServerDetailInfo | None):
+		if self._detail_cache is None:
+			return
+		data = {
+			"schemas": self._schemas_cache,
+			"descriptor": self._published_descriptor,
+		}
+		if server_detail_info is not None:
+			data["server_detail_info"] = server_detail_info.model_dump(
+					mode="json", exclude_none=True)
+		await asyncio.to_thread(self._detail_cache.save, data)
+
+	def _ensure_compatible(self, server_detail_info: McpServerDetailInfo):
+		is_compatible, error_msg = self.check_compatible(server_detail_info)
+		if not is_compatible:
+			logger.error(
+					f"mcp server info is not compatible,{self.name},version:{self.version},reason:{error_msg}")
+			raise IncompatibleServerError(
+					f"mcp server info is not compatible,{self.name},version:{self.version},reason:{error_msg}"
+			)
+
+	def _build_release_param(self, path: str) -> ReleaseMcpServerParam:
+		from v2.nacos.ai.model.ai_param import ReleaseMcpServerParam
+		from v2.nacos.ai.model.mcp.mcp import McpTool, McpToolSpecification, \
+			McpServerBasicInfo, McpServerRemoteServiceConfig, McpEndpointSpec
+		from v2.nacos.ai.model.mcp.registry import ServerVersionDetail
+
+		mcp_tool_specification = None
+		if types.ListToolsRequest in self.request_handlers:
+			tool_spec = [
+				McpTool(
+						name=tool.name,
+						description=tool.description,
+						inputSchema=tool.inputSchema,
 				)
+				for tool in list(self._tmp_tools.values())
+			]
+			mcp_tool_specification = McpToolSpecification(
+					tools=tool_spec
+			)
 
-			server_version_detail = ServerVersionDetail()
-			server_version_detail.version = self.version
-			server_basic_info = McpServerBasicInfo()
-			server_basic_info.name = self.name
-			server_basic_info.versionDetail = server_version_detail
-			server_basic_info.description = self.instructions or self.name
-
-			endpoint_spec = McpEndpointSpec()
-			if self._type == "stdio":
-				server_basic_info.protocol = self._type
-				server_basic_info.frontProtocol = self._type
-			else:
-				endpoint_spec.type = "REF"
-				data = {
-					"serviceName": self.get_register_service_name(),
-					"groupName": "DEFAULT_GROUP" if self._nacos_settings.SERVICE_GROUP is None else self._nacos_settings.SERVICE_GROUP,
-					"namespaceId": self._nacos_settings.NAMESPACE,
-				}
-				endpoint_spec.data = data
-
-				remote_server_config_info = McpServerRemoteServiceConfig()
-				remote_server_config_info.exportPath = path
-				server_basic_info.remoteServerConfig = remote_server_config_info
-				server_basic_info.protocol = self._type
-				server_basic_info.frontProtocol = self._type
+		server_version_detail = ServerVersionDetail()
+		server_version_detail.version = self.version
+		server_basic_info = McpServerBasicInfo()
+		server_basic_info.name = self.name
+		server_basic_info.versionDetail = server_version_detail
+		server_basic_info.description = self.instructions or self.name
+
+		endpoint_spec = McpEndpointSpec()
+		if self._type == "stdio":
+			server_basic_info.protocol = self._type
+			server_basic_info.frontProtocol = self._type
+		else:
+			endpoint_spec.type = "REF"
+			data = {
+				"serviceName": self.get_register_service_name(),
+				"groupName": self._get_register_group_name(),
+				"namespaceId": self._nacos_settings.NAMESPACE,
+			}
+			endpoint_spec.data = data
+
+			remote_server_config_info = McpServerRemoteServiceConfig()
+			remote_server_config_info.exportPath = path
+			server_basic_info.remoteServerConfig = remote_server_config_info
+			server_basic_info.protocol = self._type
+			server_basic_info.frontProtocol = self._type
+		return ReleaseMcpServerParam(
+				server_spec=server_basic_info,
+				tool_spec=mcp_tool_specification,
+				mcp_endpoint_spec=endpoint_spec
+		)
+
+	async def _release(self, path: str):
+		from v2.nacos import NacosException
+		from v2.nacos.ai.model.ai_param import GetMcpServerParam
+
+		try:
+			with self._timed("release_mcp_server"):
+				await self._nacos_ai_service.release_mcp_server(
+						self._build_release_param(path))
+		except Exception as e:
+			# Another instance may have released the same version after our
+			# lookup, accept it if it is compatible with the local server.
 			_server = None
 			try:
-				_server = await self._nacos_ai_service.get_mcp_server(
-						GetMcpServerParam(
-								mcp_name=self.name,
-								version=self.version
-						))
-			except NacosException as e:
-				pass
-			try:
-				if _server is None:
-					await self._nacos_ai_service.release_mcp_server(
-							ReleaseMcpServerParam(
-									server_spec=server_basic_info,
-									tool_spec=mcp_tool_specification,
-									mcp_endpoint_spec=endpoint_spec
+				with self._timed("get_mcp_server"):
+					_server = await self._nacos_ai_service.get_mcp_server(
+							GetMcpServerParam(
+									mcp_name=self.name,
+									version=self.version
 							))
-				else:
-					_is_compatible, error_msg = self.check_compatible(
-							_server)
-					if not _is_compatible:
-						logger.error(
-								f"mcp server info is not compatible,{self.name},version:{self.version},reason:{error_msg}")
-						raise NacosException(
-								f"mcp server info is not compatible,{self.name},version:{self.version},reason:{error_msg}"
-						)
-			except Exception as e:
+			except NacosException:
+				pass
+			if _server is None:
 				logger.error(
 						f"Release mcp server {self.name} to Nacos Failed,try to update it")
 				raise RuntimeError(
 						f"Release mcp server {self.name} to Nacos Failed")
-			if self._nacos_settings.SERVICE_REGISTER and (
-					self._type == "mcp-sse"
-					or self._type == "mcp-streamable"):
-				version = metadata.version('nacos-mcp-wrapper-python')
-				service_meta_data = {
-					"source": f"nacos-mcp-wrapper-python-{version}",
-					**self._nacos_settings.SERVICE_META_DATA}
-				await self._nacos_naming_service.register_instance(
-						request=RegisterInstanceParam(
-								group_name="DEFAULT_GROUP" if self._nacos_settings.SERVICE_GROUP is None else self._nacos_settings.SERVICE_GROUP,
-								service_name=self.get_register_service_name(),
-								ip=self._nacos_settings.SERVICE_IP,
-								port=self._nacos_settings.SERVICE_PORT if self._nacos_settings.SERVICE_PORT else port,
-								ephemeral=self._nacos_settings.SERVICE_EPHEMERAL,
-								metadata=service_meta_data
-						)
-				)
-			await self.subscribe()
+			self._ensure_compatible(_server)
+
+	def _get_register_group_name(self) -> str:
+		if self._nacos_settings.SERVICE_GROUP is None:
+			return "DEFAULT_GROUP"
+		return self._nacos_settings.SERVICE_GROUP
+
+	async def _register_instance(self, group_name: str, service_name: str,
+			port: int):
+		from v2.nacos import RegisterInstanceParam
+
+		if not self._need_register_instance():
+			return
+		version = metadata.version('nacos-mcp-wrapper-python')
+		service_meta_data = {
+			"source": f"nacos-mcp-wrapper-python-{version}",
+			**self._nacos_settings.SERVICE_META_DATA}
+		instance = RegisterInstanceParam(
+				group_name=group_name,
+				service_name=service_name,
+				ip=self._nacos_settings.SERVICE_IP,
+				port=self._service_port or self._nacos_settings.SERVICE_PORT or port,
+				ephemeral=self._nacos_settings.SERVICE_EPHEMERAL,
+				metadata=service_meta_data
+		)
+		with self._timed("register_instance"):
+			await self._nacos_naming_service.register_instance(request=instance)
+		self._registered_instance = instance
+
+	async def deregister_from_nacos(self) -> bool:
+		"""Deregister the instance registered by register_to_nacos, if any.
+
+		Returns:
+			bool: True if an instance was deregistered
+		"""
+		from v2.nacos import DeregisterInstanceParam
+
+		self._stop_reconcile()
+		instance = self._registered_instance
+		if instance is None or self._nacos_naming_service is None:
+			return False
+		self._registered_instance = None
+		with self._timed("deregister_instance"):
+			await self._nacos_naming_service.deregister_instance(
+					request=DeregisterInstanceParam(
+							group_name=instance.group_name,
+							service_name=instance.service_name,
+							ip=instance.ip,
+							port=instance.port,
+							ephemeral=instance.ephemeral
+					)
+			)
+		logger.info(
+				f"Deregister from nacos success,{self.name},version:{self.version}")
+		return True
+
+	async def close(self):
+		"""Stop applying subscription pushes and release the nacos clients.
+
+		The clients are shared with the other servers of the process using the
+		same nacos config, they are shut down with the last one.
+		"""
+		self._stop_reconcile()
+		if self._background_register_task is not None:
+			self._background_register_task.cancel()
+			self._background_register_task = None
+		self._update_scheduler.close()
+		clients, self._clients = self._clients, None
+		if clients is None:
+			return
+		if self._subscribed and clients.refs > 1:
+			from v2.nacos.ai.model.ai_param import SubscribeMcpServerParam
+
+			try:
+				await self._nacos_ai_service.unsubscribe_mcp_server(
+						SubscribeMcpServerParam(
+								mcp_name=self.name,
+								version=self.version,
+								subscribe_callback=self._subscribe_call_back
+						))
+			except Exception as e:
+				logger.warning(f"Failed to unsubscribe {self.name} from Nacos: {e}")
+		self._subscribed = False
+		self._nacos_ai_service = None
+		self._nacos_naming_service = None
+		await client_pool.release(clients)
+
+	async def register_to_nacos(self,
+			transport: Literal["stdio", "sse", "streamable-http"] = "stdio",
+			port: int = 8000,
+			path: str = "/sse",
+			register_instance: bool = True,
+			service_port: int | None = None):
+		"""Release the mcp server to nacos and register this instance.
+
+		With ``register_instance=False`` the server is released, checked and
+		subscribed, but no instance is added to the naming service, which is
+		used by workers sharing an instance registered by another process.
+		``service_port`` is registered instead of SERVICE_PORT, used by
+		workers which each register their own port.
+
+		If nacos can't be reached, the registration is retried in background
+		with capped exponential backoff and full jitter, see
+		``registration_state``. Once registered, the instance is checked
+		every RECONCILE_INTERVAL seconds and registered again if nacos lost it.
+
+		With CACHE_DIR, a server whose tools match the nacos info cached by
+		its last run serves the cached descriptions and returns right away,
+		the nacos info is revalidated in background. The instance of a http
+		server may then be registered while uvicorn is still starting.
+
+		With STDIO_FAST_PATH, a stdio server whose descriptor matches the one
+		it last released or checked, as recorded in CACHE_DIR, returns right
+		away and only subscribes in background.
+		"""
+		self._type = TRANSPORT_MAP.get(transport, None)
+		self._register_instance_enabled = register_instance
+		self._service_port = service_port
+		if await self._can_skip_release():
+			logger.info(
+					f"Descriptor of {self.name} unchanged, skip the release to nacos")
+			self._background_register_task = asyncio.create_task(
+					self._subscribe_in_background(port, path))
+			return
+		if await self._can_serve_cached_detail():
 			logger.info(
-					f"Register to nacos success,{self.name},version:{self.version}")
+					f"Serve {self.name} from the nacos cache, revalidate in background")
+			self._background_register_task = asyncio.create_task(
+					self._register(port, path))
+			return
+		await self._register(port, path)
+
+	async def _register(self, port: int, path: str):
+		try:
+			with self._timed("register_to_nacos"):
+				await self._register_once(port, path)
+		except IncompatibleServerError as e:
+			self._registration_failed(e, "failed")
+			return
 		except Exception as e:
-			logger.error(f"Failed to register MCP server to Nacos: {e}")
+			self._registration_failed(e, "retrying")
+			if not self._nacos_settings.REGISTER_RETRY:
+				self._registration_state.status = "failed"
+				return
+		self._start_reconcile(port, path)
+
+	def _registration_failed(self, e: Exception,
+			status: Literal["retrying", "failed"]):
+		logger.error(f"Failed to register MCP server to Nacos: {e}")
+		self._registration_state.status = status
+		self._registration_state.last_error = str(e)
+
+	async def _can_skip_release(self) -> bool:
+		if (self._type != "stdio"
+				or not self._nacos_settings.STDIO_FAST_PATH
+				or self._detail_cache is None):
+			return False
+		await self._init_local_tools()
+		return (self._published_descriptor is not None
+				and self._published_descriptor == self._local_descriptor)
+
+	async def _can_serve_cached_detail(self) -> bool:
+		if self._detail_cache is None:
+			return False
+		await self._init_local_tools()
+		return self._serving_cached_detail
+
+	async def _subscribe_in_background(self, port: int, path: str):
+		self._registration_state.status = "registering"
+		self._registration_state.attempts += 1
+		try:
+			await self._create_ai_service()
+			await self.subscribe()
+		except Exception as e:
+			# fall back to the full registration, retried in background
+			self._registration_failed(e, "retrying")
+			if not self._nacos_settings.REGISTER_RETRY:
+				self._registration_state.status = "failed"
+				return
+			self._start_reconcile(port, path)
+			return
+		self._registration_succeeded()
+
+	def _registration_succeeded(self):
+		self._registration_state.status = "registered"
+		self._registration_state.last_error = None
+		self._registration_state.next_retry_at = None
+		self._registered.set()
+		self._start_load_report()
+		logger.info(
+				f"Register to nacos success,{self.name},version:{self.version}")
+
+	async def _register_once(self, port: int, path: str):
+		self._registration_state.status = "registering"
+		self._registration_state.attempts += 1
+		# The nacos lookup, the naming client and the local tool schemas
+		# do not depend on each other, resolve them together.
+		server_detail_info, _, _, _ = await asyncio.gather(
+				self._fetch_mcp_server(),
+				self._create_naming_service(),
+				self._init_local_tools(),
+				self._resolve_service_ip(),
+		)
+
+		if server_detail_info is not None:
+			self._ensure_compatible(server_detail_info)
+			self._published_descriptor = self._local_descriptor
+			if types.ListToolsRequest in self.request_handlers:
+				if self.update_tools(server_detail_info):
+					await self.notify_tools_changed()
+			await self._save_cache(server_detail_info)
+			group_name, service_name = None, None
+			if self._need_register_instance():
+				service_ref = server_detail_info.remoteServerConfig.serviceRef
+				group_name = service_ref.groupName
+				service_name = service_ref.serviceName
+		else:
+			await self._release(path)
+			self._published_descriptor = self._local_descriptor
+			await self._save_cache(None)
+			group_name = self._get_register_group_name()
+			service_name = self.get_register_service_name()
+
+		await asyncio.gather(
+				self._register_instance(group_name, service_name, port),
+				self.subscribe(),
+		)
+		self._registration_succeeded()
+
+	def _start_reconcile(self, port: int, path: str):
+		if self._reconcile_task is not None and not self._reconcile_task.done():
+			return
+		if self._registered.is_set() and (
+				self._registered_instance is None
+				or self._nacos_settings.RECONCILE_INTERVAL <= 0):
+			return
+		self._reconcile_task = asyncio.create_task(self._reconcile(port, path))
+
+	def _stop_reconcile(self):
+		if self._reconcile_task is not None:
+			self._reconcile_task.cancel()
+			self._reconcile_task = None
+		if self._load_reporter is not None:
+			self._load_reporter.stop()
+			self._load_reporter = None
+
+	def _start_load_report(self):
+		if (self._load_tracker is None or self._registered_instance is None
+				or self._load_reporter is not None):
+			return
+		settings = self._nacos_settings
+		self._load_reporter = LoadReporter(
+				self._load_tracker, self._update_instance_load,
+				base_weight=self._registered_instance.weight,
+				interval=settings.LOAD_REPORT_INTERVAL,
+				min_update_interval=settings.LOAD_REPORT_MIN_UPDATE_INTERVAL,
+				hysteresis=settings.LOAD_REPORT_HYSTERESIS,
+				in_flight_target=settings.LOAD_REPORT_IN_FLIGHT_TARGET,
+				loop_lag_target=settings.LOAD_REPORT_LOOP_LAG_TARGET,
+				latency_target=settings.LOAD_REPORT_LATENCY_TARGET)
+		self._load_reporter.start()
+
+	async def _update_instance_load(self, weight: float,
+			load_metadata: dict[str, str]):
+		instance = self._registered_instance
+		if instance is None:
+			return
+		metadata = {key: value for key, value in instance.metadata.items()
+					if not key.startswith("load.")}
+		metadata.update(load_metadata)
+		instance = instance.model_copy(
+				update={"weight": weight, "metadata": metadata})
+		with self._timed("update_instance"):
+			await self._nacos_naming_service.update_instance(request=instance)
+		# a later reconcile registers the instance with its current load
+		if self._registered_instance is not None:
+			self._registered_instance = instance
+
+	async def _backoff(self, delay: float):
+		# full jitter, instances recovering from the same nacos outage don't
+		# come back in lockstep
+		sleep = random.uniform(0, delay)
+		self._registration_state.next_retry_at = time.time() + sleep
+		await asyncio.sleep(sleep)
+
+	async def _reconcile(self, port: int, path: str):
+		base_delay = self._nacos_settings.REGISTER_RETRY_BASE_DELAY
+		max_delay = self._nacos_settings.REGISTER_RETRY_MAX_DELAY
+		delay = base_delay
+		while True:
+			if not self._registered.is_set():
+				await self._backoff(delay)
+				try:
+					await self._register_once(port, path)
+					delay = base_delay
+				except IncompatibleServerError as e:
+					self._registration_failed(e, "failed")
+					return
+				except Exception as e:
+					self._registration_failed(e, "retrying")
+					delay = min(delay * 2, max_delay)
+				continue
+
+			interval = self._nacos_settings.RECONCILE_INTERVAL
+			if self._registered_instance is None or interval <= 0:
+				return
+			await asyncio.sleep(interval * random.uniform(0.8, 1.2))
+			try:
+				if await self._is_instance_registered():
+					continue
+				logger.warning(
+						f"Instance of {self.name} lost by nacos, register it again")
+				with self._timed("register_instance"):
+					await self._nacos_naming_service.register_instance(
+							request=self._registered_instance)
+				delay = base_delay
+			except Exception as e:
+				logger.error(f"Failed to check MCP server instance in Nacos: {e}")
+				await self._backoff(delay)
+				delay = min(delay * 2, max_delay)
+
+	async def _is_instance_registered(self) -> bool:
+		from v2.nacos import ListInstanceParam
+
+		instance = self._registered_instance
+		if instance is None:
+			return True
+		with self._timed("list_instances"):
+			instances = await self._nacos_naming_service.list_instances(
+					ListInstanceParam(
+							service_name=instance.service_name,
+							group_name=instance.group_name,
+							# False would list the unhealthy instances only
+							healthy_only=None,
+							subscribe=False
+					))
+		return any(item.ip == instance.ip and item.port == instance.port
+				   for item in instances or [])
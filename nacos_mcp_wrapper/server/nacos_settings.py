@@ -1,9 +1,8 @@
-from typing import Optional
+from typing import Any, Literal, Optional
 
 
 from pydantic import Field
 from pydantic_settings import BaseSettings
-from v2.nacos.common.auth import CredentialsProvider
 
 
 class NacosSettings(BaseSettings):
@@ -36,6 +35,10 @@ class NacosSettings(BaseSettings):
 			description="nacos service ip",
 			default=None)
 
+	SERVICE_IP_PREFERENCE : Optional[str] = Field(
+			description="comma separated interface names (glob allowed) or CIDRs preferred when discovering the service ip, e.g. eth0,10.0.0.0/8",
+			default=None)
+
 	SERVICE_PORT : Optional[int] = Field(
 			description="nacos service port",
 			default=None)
@@ -56,7 +59,9 @@ class NacosSettings(BaseSettings):
 			description="nacos secret key for aliyun ram authentication",
 			default=None)
 
-	CREDENTIAL_PROVIDER : Optional[CredentialsProvider] = Field(
+	# a v2.nacos.common.auth.CredentialsProvider, typed loosely so that
+	# loading the settings does not import the nacos sdk
+	CREDENTIAL_PROVIDER : Optional[Any] = Field(
 			description="nacos credential provider for aliyun authentication",
 			default=None)
 
@@ -68,6 +73,90 @@ class NacosSettings(BaseSettings):
 			description="nacos service metadata",
 			default={})
 
+	REGISTER_IN_BACKGROUND : bool = Field(
+			description="whether to register to nacos in background after the server starts listening",
+			default=False)
+
+	SUBSCRIBE_QUIET_WINDOW : float = Field(
+			description="seconds without new subscription push before the latest one is applied, 0 applies pushes right away",
+			default=0.2)
+
+	SUBSCRIBE_MAX_DELAY : float = Field(
+			description="maximum seconds a subscription push may be delayed by a burst of pushes",
+			default=1.0)
+
+	DRAIN_DELAY : float = Field(
+			description="seconds to keep serving after deregistration on shutdown, while it propagates to callers, e.g. 3; 0 stops right away",
+			default=0.0)
+
+	GRACEFUL_SHUTDOWN_TIMEOUT : Optional[float] = Field(
+			description="seconds uvicorn waits for open connections to close on shutdown, None waits forever",
+			default=None)
+
+	CACHE_DIR : Optional[str] = Field(
+			description="directory of the local cache of the mcp server info from nacos, None disables it",
+			default=None)
+
+	STDIO_FAST_PATH : bool = Field(
+			description="for stdio servers, skip the release to nacos when the local descriptor matches the last released one recorded in CACHE_DIR, and only subscribe in background",
+			default=False)
+
+	REGISTER_RETRY : bool = Field(
+			description="whether to keep retrying the registration to nacos in background when it fails",
+			default=True)
+
+	REGISTER_RETRY_BASE_DELAY : float = Field(
+			description="initial backoff in seconds between two registration attempts",
+			default=1.0)
+
+	REGISTER_RETRY_MAX_DELAY : float = Field(
+			description="maximum backoff in seconds between two registration attempts",
+			default=60.0)
+
+	RECONCILE_INTERVAL : float = Field(
+			description="seconds between two checks that nacos still has the registered instance, 0 disables them",
+			default=30.0)
+
+	TOOL_RESULT_CACHE_SIZE : int = Field(
+			description="maximum results cached for the tools marked cacheable in their nacos meta, 0 disables the cache",
+			default=0)
+
+	TOOL_RESULT_CACHE_TTL : float = Field(
+			description="seconds a cached tool result is served when the nacos meta of the tool sets no cacheTtl",
+			default=60.0)
+
+	LOAD_REPORT_INTERVAL : float = Field(
+			description="seconds between two load samples adapting the weight of the registered instance, 0 disables load reporting",
+			default=0.0)
+
+	LOAD_REPORT_MIN_UPDATE_INTERVAL : float = Field(
+			description="minimum seconds between two updates of the instance weight and load metadata in nacos",
+			default=30.0)
+
+	LOAD_REPORT_HYSTERESIS : float = Field(
+			description="relative weight change below which the instance is not updated in nacos",
+			default=0.2)
+
+	LOAD_REPORT_IN_FLIGHT_TARGET : int = Field(
+			description="in-flight tool calls the instance handles at full weight",
+			default=32)
+
+	LOAD_REPORT_LOOP_LAG_TARGET : float = Field(
+			description="event loop lag in seconds the instance tolerates at full weight",
+			default=0.05)
+
+	LOAD_REPORT_LATENCY_TARGET : Optional[float] = Field(
+			description="p95 tool call latency in seconds the instance tolerates at full weight, None ignores latency",
+			default=None)
+
+	METRICS : Optional[Literal["prometheus", "opentelemetry"]] = Field(
+			description="metrics backend of registration, subscription and tool calls, None disables metrics",
+			default=None)
+
+	METRICS_PORT : Optional[int] = Field(
+			description="port of the prometheus metrics http endpoint, None leaves exposing them to the application",
+			default=None)
+
 	class Config:
 		env_prefix = "NACOS_MCP_SERVER_"
 
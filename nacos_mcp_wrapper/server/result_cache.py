@@ -0,0 +1,89 @@
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+def cache_ttl_from_meta(tool_name: str, tool_meta,
+		default_ttl: float) -> float | None:
+	"""TTL in seconds of the results of a tool, None if not cacheable.
+
+	Read from the invokeContext of the nacos tools meta: ``cacheable`` opts
+	the tool in and ``cacheTtl`` sets the TTL, ``default_ttl`` if unset.
+	"""
+	invoke_context = getattr(tool_meta, "invokeContext", None)
+	if not invoke_context:
+		return None
+	cacheable = invoke_context.get("cacheable")
+	if isinstance(cacheable, str):
+		cacheable = cacheable.lower() == "true"
+	if not cacheable:
+		return None
+	ttl = invoke_context.get("cacheTtl", default_ttl)
+	try:
+		ttl = float(ttl)
+	except (TypeError, ValueError):
+		logger.warning(f"Ignore invalid cacheTtl of tool {tool_name}: {ttl!r}")
+		return None
+	return ttl if ttl > 0 else None
+
+
+def result_cache_key(tool_name: str, arguments: dict[str, Any] | None) -> Hashable | None:
+	"""Key of a call, None if its arguments are not plain JSON."""
+	try:
+		canonical = json.dumps(arguments or {}, sort_keys=True,
+							   separators=(",", ":"), ensure_ascii=False)
+	except (TypeError, ValueError):
+		return None
+	return tool_name, canonical
+
+
+class ToolResultCache:
+	"""Bounded LRU cache of tool results with a TTL per entry.
+
+	Entries are evicted least recently used first once ``max_entries`` is
+	reached, expired entries are dropped when they are looked up.
+	"""
+
+	def __init__(self, max_entries: int):
+		self.max_entries = max_entries
+		self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+		self.hits = 0
+		self.misses = 0
+
+	def __len__(self) -> int:
+		return len(self._entries)
+
+	@property
+	def hit_ratio(self) -> float:
+		lookups = self.hits + self.misses
+		return self.hits / lookups if lookups else 0.0
+
+	def get(self, key: Hashable) -> Any | None:
+		entry = self._entries.get(key)
+		if entry is not None:
+			expires_at, value = entry
+			if expires_at > time.monotonic():
+				self._entries.move_to_end(key)
+				self.hits += 1
+				return value
+			del self._entries[key]
+		self.misses += 1
+		return None
+
+	def put(self, key: Hashable, value: Any, ttl: float):
+		self._entries[key] = (time.monotonic() + ttl, value)
+		self._entries.move_to_end(key)
+		while len(self._entries) > self.max_entries:
+			self._entries.popitem(last=False)
+
+	def invalidate(self, tool_name: str):
+		"""Drop the results of a tool, keys start with the tool name."""
+		for key in [key for key in self._entries if key[0] == tool_name]:
+			del self._entries[key]
+
+	def clear(self):
+		self._entries.clear()
@@ -0,0 +1,87 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Generic, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CoalescingScheduler(Generic[T]):
+	"""Coalesce bursts of updates and apply only the latest one.
+
+	An update is applied once no newer update arrived for ``quiet_window``
+	seconds, and at the latest ``max_delay`` seconds after the first update
+	of the burst. Applies never overlap, updates submitted while one runs
+	are coalesced into the next apply.
+	"""
+
+	def __init__(self, apply: Callable[[T], Awaitable[None]],
+			quiet_window: float = 0.0, max_delay: float = 0.0):
+		self._apply = apply
+		self._quiet_window = max(quiet_window, 0.0)
+		self._max_delay = max(max_delay, self._quiet_window)
+		self._pending: T | None = None
+		self._has_pending = False
+		self._burst_started_at: float | None = None
+		self._timer: asyncio.TimerHandle | None = None
+		self._flush_task: asyncio.Task | None = None
+		self.received = 0
+		self.applied = 0
+
+	@property
+	def has_pending(self) -> bool:
+		return self._has_pending
+
+	def submit(self, item: T):
+		self.received += 1
+		self._pending = item
+		loop = asyncio.get_running_loop()
+		now = loop.time()
+		if not self._has_pending:
+			self._has_pending = True
+			self._burst_started_at = now
+		if self._timer is not None:
+			self._timer.cancel()
+			self._timer = None
+		if self._quiet_window <= 0:
+			self._on_timer()
+			return
+		deadline = min(now + self._quiet_window,
+					   self._burst_started_at + self._max_delay)
+		self._timer = loop.call_at(deadline, self._on_timer)
+
+	def _on_timer(self):
+		self._timer = None
+		if self._flush_task is None or self._flush_task.done():
+			self._flush_task = asyncio.ensure_future(self._flush())
+
+	async def _flush(self):
+		while self._has_pending and self._timer is None:
+			item = self._pending
+			self._pending = None
+			self._has_pending = False
+			self._burst_started_at = None
+			try:
+				await self._apply(item)
+			except Exception:
+				logger.exception("Failed to apply coalesced update")
+			self.applied += 1
+
+	async def flush(self):
+		"""Apply the pending update now, if any."""
+		if self._timer is not None:
+			self._timer.cancel()
+			self._timer = None
+		if self._flush_task is not None and not self._flush_task.done():
+			await self._flush_task
+		await self._flush()
+
+	def close(self):
+		if self._timer is not None:
+			self._timer.cancel()
+			self._timer = None
+		if self._flush_task is not None and not self._flush_task.done():
+			self._flush_task.cancel()
+		self._pending = None
+		self._has_pending = False
@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import signal
+import time
+
+from nacos_mcp_wrapper.server.nacos_server import NacosServer
+
+logger = logging.getLogger(__name__)
+
+
+async def start_serving(server, sockets: list | None = None) -> asyncio.Task:
+	"""Run ``server.serve`` in a task and return it once uvicorn listens.
+
+	Returns as soon as the startup of uvicorn bound its sockets, or earlier
+	if the server stopped without starting, e.g. the port was in use, in
+	which case ``server.started`` is False.
+	"""
+	started = asyncio.Event()
+	startup = server.startup
+
+	async def _startup(*args, **kwargs):
+		try:
+			await startup(*args, **kwargs)
+		finally:
+			started.set()
+
+	server.startup = _startup
+	serve_task = asyncio.create_task(server.serve(sockets=sockets))
+	serve_task.add_done_callback(lambda _: started.set())
+	try:
+		await started.wait()
+	except BaseException:
+		serve_task.cancel()
+		raise
+	return serve_task
+
+
+class GracefulShutdown:
+	"""Shutdown sequence of a uvicorn server hosting nacos registered servers.
+
+	On the first exit signal the instances are deregistered from nacos,
+	then uvicorn keeps serving in-flight and newly routed requests for
+	``drain_delay`` seconds while the deregistration propagates to the
+	callers, and only then uvicorn is asked to stop. A second signal skips
+	the remaining delay. Workers ignore SIGINT, the interrupt of the
+	terminal reaches them directly and their parent forwards it as SIGTERM.
+	Once uvicorn stopped, ``close`` releases the nacos
+	clients. The duration of each phase is kept in ``timings``, in seconds.
+	"""
+
+	def __init__(self, server, nacos_servers: list[NacosServer],
+			drain_delay: float = 0.0, shared_instance: bool = False,
+			worker: bool = False):
+		"""
+		Args:
+			server: The uvicorn server
+			nacos_servers: The nacos servers served by it
+			drain_delay: Seconds to keep serving after deregistration
+			shared_instance: Whether the instance is registered by another
+				process, in which case draining is needed even though
+				nothing is deregistered here
+			worker: Whether the server is a worker process whose parent
+				forwards the exit signals
+		"""
+		self._server = server
+		self._nacos_servers = nacos_servers
+		self._drain_delay = drain_delay
+		self._shared_instance = shared_instance
+		self._worker = worker
+		self._loop = asyncio.get_running_loop()
+		self._handle_exit = server.handle_exit
+		self._shutdown_task: asyncio.Task | None = None
+		self._stop_requested_at: float | None = None
+		self.timings: dict[str, float] = {}
+		server.handle_exit = self.handle_exit
+
+	def handle_exit(self, sig, frame):
+		if self._worker and sig == signal.SIGINT:
+			return
+		if self._shutdown_task is not None or self._server.should_exit:
+			self._handle_exit(sig, frame)
+			return
+		self._loop.call_soon_threadsafe(self._start)
+
+	def _start(self):
+		if self._shutdown_task is None:
+			self._shutdown_task = self._loop.create_task(self.shutdown())
+
+	async def shutdown(self):
+		start = time.perf_counter()
+		deregistered = False
+		for nacos_server in self._nacos_servers:
+			try:
+				deregistered = await nacos_server.deregister_from_nacos() or deregistered
+			except Exception as e:
+				logger.error(f"Failed to deregister MCP server from Nacos: {e}")
+		self.timings["deregister"] = time.perf_counter() - start
+
+		start = time.perf_counter()
+		if (deregistered or self._shared_instance) and self._drain_delay > 0:
+			await asyncio.sleep(self._drain_delay)
+		self.timings["drain"] = time.perf_counter() - start
+		self._stop_requested_at = time.perf_counter()
+		self._server.should_exit = True
+
+	async def close(self):
+		"""Record the uvicorn stop phase and release the nacos clients."""
+		if self._stop_requested_at is not None:
+			self.timings["stop"] = time.perf_counter() - self._stop_requested_at
+		start = time.perf_counter()
+		for nacos_server in self._nacos_servers:
+			try:
+				await nacos_server.deregister_from_nacos()
+				await nacos_server.close()
+			except Exception as e:
+				logger.error(f"Failed to close Nacos clients: {e}")
+		self.timings["close"] = time.perf_counter() - start
+		logger.info("Shutdown timings: %s", ", ".join(
+				f"{phase} {seconds * 1000:.0f}ms"
+				for phase, seconds in self.timings.items()))
@@ -0,0 +1,79 @@
+import asyncio
+import contextvars
+from typing import Any, Awaitable, Callable, Hashable
+
+
+def single_flight_from_meta(tool_meta) -> bool:
+	"""Whether the invokeContext of the nacos tools meta sets singleFlight."""
+	invoke_context = getattr(tool_meta, "invokeContext", None)
+	if not invoke_context:
+		return False
+	single_flight = invoke_context.get("singleFlight")
+	if isinstance(single_flight, str):
+		return single_flight.lower() == "true"
+	return bool(single_flight)
+
+
+class _Flight:
+	__slots__ = ("task", "waiters")
+
+	def __init__(self, task: asyncio.Task):
+		self.task = task
+		self.waiters = 0
+
+
+class SingleFlight:
+	"""Share one in-flight call between concurrent callers with the same key.
+
+	The call runs in its own task, each caller awaits it through a shield:
+	a caller which is cancelled, e.g. because its client disconnected,
+	leaves the call running for the others. The call is cancelled when its
+	last caller is, and a call which completed is never reused.
+
+	The call task is created in the context returned by ``context_factory``
+	if given, the context of the caller which started it otherwise.
+	"""
+
+	def __init__(self,
+			context_factory: Callable[[], contextvars.Context] | None = None):
+		self._flights: dict[Hashable, _Flight] = {}
+		self._context_factory = context_factory
+		self.coalesced = 0
+
+	def __len__(self) -> int:
+		return len(self._flights)
+
+	def waiters(self, key: Hashable) -> int:
+		flight = self._flights.get(key)
+		return 0 if flight is None else flight.waiters
+
+	async def run(self, key: Hashable, func: Callable[..., Awaitable[Any]],
+			*args) -> Any:
+		flight = self._flights.get(key)
+		if flight is None:
+			if self._context_factory is None:
+				task = asyncio.ensure_future(func(*args))
+			else:
+				# the task copies the context current at its creation
+				task = self._context_factory().run(asyncio.ensure_future,
+												   func(*args))
+			flight = _Flight(task)
+			self._flights[key] = flight
+			flight.task.add_done_callback(
+					lambda _task: self._forget(key, flight))
+		else:
+			self.coalesced += 1
+		flight.waiters += 1
+		try:
+			return await asyncio.shield(flight.task)
+		finally:
+			flight.waiters -= 1
+			if flight.waiters == 0 and not flight.task.done():
+				# every caller is gone, new callers must not join a call
+				# being cancelled
+				self._forget(key, flight)
+				flight.task.cancel()
+
+	def _forget(self, key: Hashable, flight: _Flight):
+		if self._flights.get(key) is flight:
+			del self._flights[key]
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ToolAdmissionError(Exception):
+	"""A tool call was not run to completion because of its tool policy."""
+
+
+class ToolRejectedError(ToolAdmissionError):
+	"""All slots of the tool are busy and its queue is full."""
+
+
+class ToolTimeoutError(ToolAdmissionError):
+	"""The tool call, queueing included, exceeded the tool timeout."""
+
+
+def _positive(value: Any, convert: Callable[[Any], T], key: str,
+		tool_name: str) -> T | None:
+	if value is None:
+		return None
+	try:
+		value = convert(value)
+	except (TypeError, ValueError):
+		logger.warning(f"Ignore invalid {key} of tool {tool_name}: {value!r}")
+		return None
+	return value if value > 0 else None
+
+
+@dataclass(frozen=True)
+class ToolPolicy:
+	"""Admission control of one tool, read from the invokeContext of its
+	nacos tools meta:
+
+	- ``maxConcurrency``: calls running at once, unlimited if unset
+	- ``maxQueue``: calls waiting for a slot, further calls are rejected
+	  right away; unbounded if unset, 0 rejects as soon as all slots are
+	  busy
+	- ``timeout``: seconds a call may take, queueing included
+	"""
+
+	max_concurrency: int | None = None
+	max_queue: int | None = None
+	timeout: float | None = None
+
+	@classmethod
+	def from_meta(cls, tool_name: str, tool_meta) -> "ToolPolicy | None":
+		invoke_context = getattr(tool_meta, "invokeContext", None)
+		if not invoke_context:
+			return None
+		max_queue = invoke_context.get("maxQueue")
+		try:
+			max_queue = None if max_queue is None else max(int(max_queue), 0)
+		except (TypeError, ValueError):
+			logger.warning(
+					f"Ignore invalid maxQueue of tool {tool_name}: {max_queue!r}")
+			max_queue = None
+		policy = cls(
+				max_concurrency=_positive(invoke_context.get("maxConcurrency"),
+										  int, "maxConcurrency", tool_name),
+				max_queue=max_queue,
+				timeout=_positive(invoke_context.get("timeout"), float,
+								  "timeout", tool_name),
+		)
+		if policy.max_concurrency is None and policy.timeout is None:
+			return None
+		return policy
+
+
+class ToolLimiter:
+	"""Enforce a ToolPolicy around the calls of one tool.
+
+	When nacos changes the policy a new limiter replaces this one, calls
+	already admitted finish under the old limits.
+	"""
+
+	def __init__(self, tool_name: str, policy: ToolPolicy):
+		self.tool_name = tool_name
+		self.policy = policy
+		self._semaphore = None
+		if policy.max_concurrency is not None:
+			self._semaphore = asyncio.Semaphore(policy.max_concurrency)
+		# calls admitted and not finished yet, running or queued. Counted
+		# before the first await, wait_for only starts the call later.
+		self.admitted = 0
+		self.in_flight = 0
+		self.rejected = 0
+		self.timed_out = 0
+
+	@property
+	def waiting(self) -> int:
+		return self.admitted - self.in_flight
+
+	async def run(self, func: Callable[..., Awaitable[T]], *args) -> T:
+		policy = self.policy
+		if (policy.max_concurrency is not None
+				and policy.max_queue is not None
+				and self.admitted >= policy.max_concurrency + policy.max_queue):
+			self.rejected += 1
+			raise ToolRejectedError(
+					f"Tool {self.tool_name} is busy, "
+					f"{self.in_flight} calls running and "
+					f"{self.waiting} queued")
+		self.admitted += 1
+		try:
+			if policy.timeout is None:
+				return await self._run(func, *args)
+			try:
+				return await asyncio.wait_for(self._run(func, *args),
+											  policy.timeout)
+			except asyncio.TimeoutError:
+				self.timed_out += 1
+				raise ToolTimeoutError(
+						f"Tool {self.tool_name} timed out after {policy.timeout}s")
+		finally:
+			self.admitted -= 1
+
+	async def _run(self, func: Callable[..., Awaitable[T]], *args) -> T:
+		if self._semaphore is None:
+			return await self._call(func, *args)
+		async with self._semaphore:
+			return await self._call(func, *args)
+
+	async def _call(self, func: Callable[..., Awaitable[T]], *args) -> T:
+		self.in_flight += 1
+		try:
+			return await func(*args)
+		finally:
+			self.in_flight -= 1
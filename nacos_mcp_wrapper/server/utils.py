@@ -1,30 +1,99 @@
 import asyncio
+import fnmatch
+import hashlib
 import ipaddress
 import os
+import re
 import socket
 import threading
+import urllib.parse
+from dataclasses import dataclass
 from enum import Enum
 import json
-from typing import Optional
+from typing import Any, Optional
 
-import jsonref
-import psutil
 
-def get_first_non_loopback_ip() -> Optional[str]:
+# (use_ipv6, preferences) -> discovered ip, host discovery runs once per process
+_discovered_ips: dict[tuple[bool, Optional[str]], Optional[str]] = {}
+_discovered_ips_lock = threading.Lock()
+
+
+def get_first_non_loopback_ip(preferences: Optional[str] = None) -> Optional[str]:
     """Get the first non-loopback IP address from network interfaces.
 
     - Selects the interface with the lowest index
     - Only considers interfaces that are up
     - Supports IPv4/IPv6 based on environment variable
     - Falls back to socket.gethostbyname() if no address found
+    - The result is cached per process
+
+    Args:
+        preferences: Comma separated interface names (glob patterns
+            allowed) or CIDRs, tried in order before the full scan. Only
+            interfaces that are up match.
 
     Returns:
         str | None: The first non-loopback IP address, or None if not found
     """
+    use_ipv6 = os.environ.get("USE_IPV6", "false").lower() == "true"
+    key = (use_ipv6, preferences)
+    with _discovered_ips_lock:
+        if key in _discovered_ips:
+            return _discovered_ips[key]
+        result = None
+        if preferences:
+            result = _find_preferred_ip(use_ipv6, preferences)
+        if result is None:
+            result = _scan_first_non_loopback_ip(use_ipv6)
+        _discovered_ips[key] = result
+        return result
+
+
+def _find_preferred_ip(use_ipv6: bool, preferences: str) -> Optional[str]:
+    import psutil
+
+    target_family = socket.AF_INET6 if use_ipv6 else socket.AF_INET
+    net_if_addrs = psutil.net_if_addrs()
+    # the stats are only read once an interface matches
+    net_if_stats = None
+    for preference in preferences.split(","):
+        preference = preference.strip()
+        if not preference:
+            continue
+        try:
+            network = ipaddress.ip_network(preference, strict=False)
+        except ValueError:
+            network = None
+        for interface, addrs in net_if_addrs.items():
+            if network is None and not fnmatch.fnmatchcase(interface,
+                                                           preference):
+                continue
+            for addr in addrs:
+                if addr.family != target_family:
+                    continue
+                try:
+                    ip_obj = ipaddress.ip_address(addr.address.split("%")[0])
+                except ValueError:
+                    continue
+                if ip_obj.is_loopback:
+                    continue
+                if network is not None and ip_obj not in network:
+                    continue
+                if net_if_stats is None:
+                    net_if_stats = psutil.net_if_stats()
+                stats = net_if_stats.get(interface)
+                if stats is None or not stats.isup:
+                    break
+                return addr.address
+    return None
+
+
+def _scan_first_non_loopback_ip(use_ipv6: bool) -> Optional[str]:
+    import psutil
+
     result = None
     lowest_index = float("inf")
 
-    use_ipv6 = os.environ.get("USE_IPV6", "false").lower() == "true"
     target_family = socket.AF_INET6 if use_ipv6 else socket.AF_INET
 
     net_if_stats = psutil.net_if_stats()
@@ -78,17 +147,270 @@ def pkg_version(package: str) -> str:
 	return "1.0.0"
 
 def jsonref_default(obj):
+	import jsonref
+
 	if isinstance(obj, jsonref.JsonRef):
 		return obj.__subject__
 	raise TypeError(
 			f"Object of type {obj.__class__.__name__} is not JSON serializable")
 
+_DEFS_KEYWORDS = ("$defs", "definitions")
+_DEFS_POINTER_PREFIXES = ("#/$defs/", "#/definitions/")
+# the definition pointers of a schema serialized with separators=(",", ":")
+_DEF_REF_PATTERN = re.compile(r'"\$ref":("#/(?:\$defs|definitions)/(?:[^"\\]|\\.)*")')
+_RESOLVED_DEFS_CACHE_SIZE = 1024
+# (ref pointer, digest of the definition and of the definitions it reaches)
+# -> resolved definition, shared by every schema of the process which
+# embeds the same definition.
+_resolved_defs_cache: dict[tuple[str, str], Any] = {}
+_resolved_defs_lock = threading.Lock()
+_MISSING = object()
+
+
+def copy_json(node):
+	"""Deep copy of a JSON compatible structure of dicts and lists."""
+	if isinstance(node, dict):
+		return {key: copy_json(value) for key, value in node.items()}
+	if isinstance(node, list):
+		return [copy_json(item) for item in node]
+	return node
+
+
+def _collect_refs(node, refs: list[str]) -> list[str]:
+	if isinstance(node, dict):
+		ref = node.get("$ref")
+		if isinstance(ref, str):
+			refs.append(ref)
+			return refs
+		for value in node.values():
+			_collect_refs(value, refs)
+	elif isinstance(node, list):
+		for item in node:
+			_collect_refs(item, refs)
+	return refs
+
+
+class _RefInliner:
+
+	def __init__(self, document: dict):
+		self._document = document
+		self._local_refs: dict[str, Any] = {}
+		self._def_digests: dict[str, Optional[str]] = {}
+		self._def_refs: dict[str, list[str]] = {}
+		self._closure_digests: dict[str, str] = {}
+		self._resolving = {"#"}
+		# False once the current definition depends on something other than
+		# the $defs section, such a result can't be shared across schemas.
+		self._pure = True
+
+	def inline(self, node):
+		if isinstance(node, dict):
+			ref = node.get("$ref")
+			if isinstance(ref, str):
+				return self._inline_ref(ref, node)
+			return {key: self.inline(value) for key, value in node.items()}
+		if isinstance(node, list):
+			return [self.inline(item) for item in node]
+		return node
+
+	def _inline_ref(self, ref: str, node: dict):
+		is_def = ref.startswith(_DEFS_POINTER_PREFIXES)
+		if not is_def:
+			self._pure = False
+		resolved = self._local_refs.get(ref, _MISSING)
+		cache_key = None
+		if resolved is _MISSING and is_def:
+			cache_key = (ref, self._closure_digest(ref))
+			with _resolved_defs_lock:
+				resolved = _resolved_defs_cache.get(cache_key, _MISSING)
+		if resolved is not _MISSING:
+			return copy_json(resolved)
+
+		if ref in self._resolving:
+			# cyclic reference, keep it as a reference
+			self._pure = False
+			return copy_json(node)
+		target = self._lookup(ref)
+		if target is _MISSING:
+			return copy_json(node)
+
+		outer_pure = self._pure
+		self._pure = True
+		self._resolving.add(ref)
+		try:
+			resolved = self.inline(target)
+		finally:
+			self._resolving.discard(ref)
+		self._local_refs[ref] = resolved
+		if cache_key is not None and self._pure:
+			with _resolved_defs_lock:
+				if len(_resolved_defs_cache) >= _RESOLVED_DEFS_CACHE_SIZE:
+					_resolved_defs_cache.clear()
+				_resolved_defs_cache[cache_key] = resolved
+		self._pure = outer_pure and self._pure
+		return copy_json(resolved)
+
+	def _scan_def(self, ref: str):
+		"""Digest of a definition and the definitions it references."""
+		target = self._lookup(ref)
+		if target is _MISSING:
+			self._def_digests[ref] = None
+			self._def_refs[ref] = []
+			return
+		serialized = json.dumps(target, sort_keys=True, separators=(",", ":"),
+								default=str)
+		self._def_digests[ref] = hashlib.sha1(
+				serialized.encode("utf-8")).hexdigest()
+		self._def_refs[ref] = [json.loads(other) for other in
+							   _DEF_REF_PATTERN.findall(serialized)]
+
+	def _closure_digest(self, ref: str) -> str:
+		"""Digest of a definition and of every definition it reaches, what
+		its resolution depends on."""
+		digest = self._closure_digests.get(ref)
+		if digest is not None:
+			return digest
+		reached = {}
+		pending = [ref]
+		while pending:
+			other = pending.pop()
+			if other in reached:
+				continue
+			if other not in self._def_digests:
+				self._scan_def(other)
+			reached[other] = self._def_digests[other]
+			pending.extend(self._def_refs[other])
+		digest = self._closure_digests[ref] = content_digest(
+				*(part for other in sorted(reached)
+				  for part in (other, reached[other])))
+		return digest
+
+	def _lookup(self, ref: str):
+		if not ref.startswith("#/"):
+			return _MISSING
+		node = self._document
+		for token in ref[2:].split("/"):
+			token = urllib.parse.unquote(token).replace("~1", "/").replace(
+					"~0", "~")
+			if isinstance(node, dict) and token in node:
+				node = node[token]
+			elif isinstance(node, list) and token.isdigit() and int(
+					token) < len(node):
+				node = node[int(token)]
+			else:
+				return _MISSING
+		return node
+
+
+def resolve_refs(schema: dict) -> dict:
+	"""Inline the local ``$ref`` of a JSON schema in a single traversal.
+
+	Produces the same document as ``jsonref.JsonRef.replace_refs`` followed
+	by a json dump and load, without the serialization round trip. Resolved
+	definitions are memoized per process, keyed by their content and the
+	content of the definitions they reach, so models shared by several
+	tools are resolved once. Cyclic references are left as ``$ref`` instead
+	of failing, and the definitions they point to are kept.
+
+	Returns:
+		dict: A new schema that shares no objects with the input
+	"""
+	if not isinstance(schema, dict):
+		return copy_json(schema)
+	inliner = _RefInliner(schema)
+	resolved = inliner.inline(schema)
+	if (isinstance(schema.get("$ref"), str) and isinstance(resolved, dict)
+			and _collect_refs(resolved, [])):
+		# a root $ref is replaced by its target, without the definitions
+		# its remaining references point to
+		for key in _DEFS_KEYWORDS:
+			if key in schema and key not in resolved:
+				resolved[key] = inliner.inline(schema[key])
+	return resolved
+
+
 class ConfigSuffix(Enum):
 	TOOLS = "-mcp-tools.json"
 	PROMPTS = "-mcp-prompt.json"
 	RESOURCES = "-mcp-resource.json"
 	MCP_SERVER = "-mcp-server.json"
 
+def content_digest(*parts: Optional[str]) -> str:
+	"""Digest of a sequence of serialized payloads, None parts included."""
+	digest = hashlib.sha1()
+	for part in parts:
+		if part is None:
+			digest.update(b"\1")
+			continue
+		# length prefixed, so no part can run into the next one
+		encoded = part.encode("utf-8")
+		digest.update(b"\0" + len(encoded).to_bytes(8, "big"))
+		digest.update(encoded)
+	return digest.hexdigest()
+
+
+class _NotFingerprintable(Exception):
+	pass
+
+
+def _canonical_node(node):
+	if node is None:
+		return None
+	if not isinstance(node, dict):
+		raise _NotFingerprintable()
+
+	canonical_properties = None
+	properties = node.get("properties")
+	if properties is not None:
+		if not isinstance(properties, dict):
+			raise _NotFingerprintable()
+		canonical_properties = {}
+		for key, value_node in properties.items():
+			# compare_nodes only checks the presence of untyped properties
+			if not isinstance(value_node, dict) or not isinstance(
+					value_node.get("type"), str):
+				canonical_properties[key] = None
+				continue
+			type_ = value_node["type"]
+			if type_ == "object":
+				canonical_properties[key] = [type_,
+											 _canonical_node(value_node)]
+			elif type_ == "array":
+				canonical_properties[key] = [type_, _canonical_node(
+						value_node.get("items"))]
+			else:
+				canonical_properties[key] = [type_]
+
+	required = node.get("required")
+	if required is not None:
+		if not isinstance(required, list) or not all(
+				isinstance(item, str) for item in required):
+			raise _NotFingerprintable()
+		required = sorted(required)
+
+	return [canonical_properties, required]
+
+
+def schema_fingerprint(schema) -> Optional[str]:
+	"""Structural fingerprint of a tool inputSchema.
+
+	Only the fields checked by ``compare_nodes`` (property names, types,
+	nested objects, array items and required) take part in the hash, so
+	two schemas with the same fingerprint always compare as compatible.
+
+	Returns:
+		str | None: The fingerprint, or None if the schema is malformed and
+		must go through the full comparison
+	"""
+	try:
+		canonical = _canonical_node(schema)
+	except _NotFingerprintable:
+		return None
+	data = json.dumps(canonical, sort_keys=True, separators=(",", ":"),
+					  ensure_ascii=False)
+	return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+
 def compare(origin: str, target: str) -> bool:
 	try:
 		origin_node = json.loads(origin)
@@ -99,82 +421,115 @@ def compare(origin: str, target: str) -> bool:
 		return False
 
 
-def compare_nodes(origin_node, target_node) -> bool:
-	if origin_node is None and target_node is None:
-		return True
-	if origin_node is None or target_node is None:
-		return False
-
-	origin_properties = origin_node.get("properties")
-	target_properties = target_node.get("properties")
-
-	if (origin_properties is None and target_properties is not None) or (
-		origin_properties is not None and target_properties is None
-	):
-		return False
-
-	if origin_properties is not None and target_properties is not None:
-		# 遍历原始 properties
-		for key, value_node in origin_properties.items():
-			if not isinstance(value_node, dict):
-				continue  # 只处理 object 类型
-
-			type_node = value_node.get("type")
-			if not isinstance(type_node, str):
+@dataclass(frozen=True)
+class SchemaDiff:
+	"""A single incompatibility between two tool inputSchemas."""
+
+	path: str
+	expected: Any
+	actual: Any
+
+	def __str__(self) -> str:
+		return f"{self.path}: expected {self.expected!r}, actual {self.actual!r}"
+
+
+def _node_kind(node) -> Optional[str]:
+	if node is None:
+		return None
+	if isinstance(node, dict):
+		return "schema"
+	return type(node).__name__
+
+
+def diff_nodes(origin_node, target_node, collect_all: bool = False,
+		path: str = "") -> list[SchemaDiff]:
+	"""Compare two inputSchema dicts without recursion.
+
+	Args:
+		origin_node: The expected schema, e.g. the one stored in nacos
+		target_node: The actual schema, e.g. the local one
+		collect_all: Collect every difference instead of stopping at the
+			first one
+		path: Prefix of the JSON pointer reported in the diffs
+
+	Returns:
+		list[SchemaDiff]: The differences, empty if the schemas are compatible
+	"""
+	diffs: list[SchemaDiff] = []
+	stack = [(path, origin_node, target_node)]
+	while stack and (collect_all or not diffs):
+		node_path, origin, target = stack.pop()
+		if origin is None and target is None:
+			continue
+		if not isinstance(origin, dict) or not isinstance(target, dict):
+			diffs.append(SchemaDiff(node_path or "/", _node_kind(origin),
+									_node_kind(target)))
+			continue
+
+		origin_properties = origin.get("properties")
+		target_properties = target.get("properties")
+		properties_path = f"{node_path}/properties"
+		if origin_properties is not None or target_properties is not None:
+			if not isinstance(origin_properties, dict) or not isinstance(
+					target_properties, dict):
+				diffs.append(SchemaDiff(properties_path,
+										_node_kind(origin_properties),
+										_node_kind(target_properties)))
 				continue
+			for key, value_node in origin_properties.items():
+				# only typed object properties take part in the comparison
+				if not isinstance(value_node, dict):
+					continue
+				type_ = value_node.get("type")
+				if not isinstance(type_, str):
+					continue
+				key_path = f"{properties_path}/{key}"
+				if key not in target_properties:
+					diffs.append(SchemaDiff(key_path, type_, None))
+					continue
+				target_value_node = target_properties[key]
+				if not isinstance(target_value_node, dict):
+					diffs.append(SchemaDiff(key_path, type_,
+											_node_kind(target_value_node)))
+					continue
+				target_type = target_value_node.get("type")
+				if not isinstance(target_type, str):
+					target_type = ""
+				if type_ != target_type:
+					diffs.append(SchemaDiff(f"{key_path}/type", type_,
+											target_type))
+				elif type_ == "object":
+					stack.append((key_path, value_node, target_value_node))
+				elif type_ == "array":
+					origin_items = value_node.get("items")
+					target_items = target_value_node.get("items")
+					if origin_items is not None and target_items is not None:
+						stack.append((f"{key_path}/items", origin_items,
+									  target_items))
+			for key in target_properties:
+				if key not in origin_properties:
+					diffs.append(SchemaDiff(f"{properties_path}/{key}", None,
+											_node_kind(target_properties[key])))
+
+		origin_required = origin.get("required")
+		target_required = target.get("required")
+		if origin_required is None and target_required is None:
+			continue
+		if not isinstance(origin_required, list) or not isinstance(
+				target_required, list) or not all(
+				isinstance(item, str) for item in origin_required) or not all(
+				isinstance(item, str) for item in target_required):
+			diffs.append(SchemaDiff(f"{node_path}/required", origin_required,
+									target_required))
+		elif len(origin_required) != len(target_required) or set(
+				origin_required) != set(target_required):
+			diffs.append(SchemaDiff(f"{node_path}/required",
+									sorted(origin_required),
+									sorted(target_required)))
+	if not collect_all:
+		return diffs[:1]
+	return diffs
 
-			type_ = type_node
-
-			if key not in target_properties:
-				return False
-
-			target_value_node = target_properties[key]
-			target_type_node = target_value_node.get("type")
-			target_type = target_type_node if isinstance(target_type_node, str) else ""
-
-			if type_ != target_type:
-				return False
 
-			# 如果是 object 类型，递归比较
-			if type_ == "object":
-				if not compare_nodes(value_node, target_value_node):
-					return False
-			# 如果是 array 类型，比较 items 内容
-			elif type_ == "array":
-				origin_items = value_node.get("items")
-				target_items = target_value_node.get("items")
-				if origin_items is not None and target_items is not None:
-					if not compare_nodes(origin_items, target_items):
-						return False
-
-		# 检查新增字段
-		for key in target_properties:
-			if key not in origin_properties:
-				return False
-
-	origin_required = origin_node.get("required")
-	target_required = target_node.get("required")
-
-	if origin_required is not None and target_required is not None:
-		if not isinstance(origin_required, list) or not isinstance(target_required, list):
-			return False
-		if len(origin_required) != len(target_required):
-			return False
-
-		origin_set = set()
-		for node in origin_required:
-			if isinstance(node, str):
-				origin_set.add(node)
-			else:
-				return False
-
-		target_set = set()
-		for node in target_required:
-			if isinstance(node, str):
-				target_set.add(node)
-			else:
-				return False
-
-		return origin_set == target_set
-	else:
-		return origin_required is None and target_required is None
\ No newline at end of file
+def compare_nodes(origin_node, target_node) -> bool:
+	return not diff_nodes(origin_node, target_node)
@@ -0,0 +1,446 @@
+"""In-process stand-in for a nacos server.
+
+``FakeNacos`` keeps mcp servers and service instances in memory and serves
+the parts of ``NacosAIService`` and ``NacosNamingService`` used by
+``NacosServer`` and ``NacosMCPClient``, so the registration path can be
+benchmarked and tested without a nacos server::
+
+	fake = FakeNacos(latency=0.005)
+	fake.fail("release_mcp_server", times=2)
+	with fake.install():
+		await server.register_to_nacos(transport="sse", port=8000)
+	await fake.push_storm("my-server", count=100)
+
+Every operation waits for its latency, then raises the failures injected
+for it, then runs. ``calls`` counts the operations by name.
+"""
+
+import asyncio
+import contextlib
+import logging
+import uuid
+from collections import Counter, defaultdict
+from typing import Awaitable, Callable, Iterator
+
+from v2.nacos import ClientConfig, DeregisterInstanceParam, Instance, \
+	ListInstanceParam, NacosException, RegisterInstanceParam, \
+	SubscribeServiceParam
+from v2.nacos.ai.model.ai_constant import AIConstants
+from v2.nacos.ai.model.ai_param import GetMcpServerParam, \
+	ReleaseMcpServerParam, SubscribeMcpServerParam
+from v2.nacos.ai.model.mcp.mcp import McpServerDetailInfo, \
+	McpServerRemoteServiceConfig, McpServiceRef, McpToolMeta
+from v2.nacos.common.nacos_exception import INVALID_PARAM, NOT_FOUND, \
+	SERVER_ERROR
+
+from nacos_mcp_wrapper.server.client_pool import NacosClients, client_pool
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_NAMESPACE = "public"
+DEFAULT_GROUP = "DEFAULT_GROUP"
+
+McpServerCallback = Callable[[str, str, str, McpServerDetailInfo],
+							 Awaitable[None]]
+InstancesCallback = Callable[[list[Instance]], Awaitable[None]]
+
+
+class FakeNacos:
+	"""MCP servers and service instances of a nacos server, in memory.
+
+	Args:
+		latency: seconds each operation takes, the round trip to nacos
+		latencies: latency of some operations by name, e.g.
+			``{"release_mcp_server": 0.05}``, overriding ``latency``
+	"""
+
+	def __init__(self, latency: float = 0.0,
+			latencies: dict[str, float] | None = None):
+		self.latency = latency
+		self.latencies = dict(latencies or {})
+		self.calls: Counter[str] = Counter()
+		self._failures: dict[str, list[list]] = defaultdict(list)
+		# (namespace, name) -> version -> detail, in release order
+		self._servers: dict[tuple[str, str], dict[str, McpServerDetailInfo]] = {}
+		self._mcp_subscribers: dict[
+			tuple[str, str, str | None], list[McpServerCallback]] = defaultdict(list)
+		# (namespace, group, service) -> (ip, port) -> instance
+		self._instances: dict[
+			tuple[str, str, str], dict[tuple[str, int], Instance]] = defaultdict(dict)
+		self._naming_subscribers: dict[
+			tuple[str, str, str], list[InstancesCallback]] = defaultdict(list)
+
+	@contextlib.contextmanager
+	def install(self) -> Iterator["FakeNacos"]:
+		"""Serve the nacos clients created by the client pool meanwhile.
+
+		Clients the pool created before are still used by the servers which
+		share them.
+		"""
+		previous = client_pool.clients_factory
+		client_pool.clients_factory = lambda client_config: FakeNacosClients(
+				self, client_config)
+		try:
+			yield self
+		finally:
+			client_pool.clients_factory = previous
+
+	def fail(self, operation: str, times: int = 1,
+			error: Exception | None = None):
+		"""Raise ``error`` from the next ``times`` calls of ``operation``,
+		a nacos server error by default."""
+		if error is None:
+			error = NacosException(SERVER_ERROR,
+								   f"injected failure of {operation}")
+		self._failures[operation].append([times, error])
+
+	async def _operation(self, operation: str):
+		self.calls[operation] += 1
+		latency = self.latencies.get(operation, self.latency)
+		if latency > 0:
+			await asyncio.sleep(latency)
+		failures = self._failures.get(operation)
+		if failures:
+			failure = failures[0]
+			failure[0] -= 1
+			if failure[0] <= 0:
+				failures.pop(0)
+			raise failure[1]
+
+	# mcp servers
+
+	def add_mcp_server(self, server_detail_info: McpServerDetailInfo,
+			namespace: str = DEFAULT_NAMESPACE):
+		"""Store a server as if it had been released, without latency."""
+		server_detail_info = server_detail_info.model_copy(deep=True)
+		server_detail_info.namespaceId = namespace
+		if server_detail_info.version is None and server_detail_info.versionDetail:
+			server_detail_info.version = server_detail_info.versionDetail.version
+		if server_detail_info.id is None:
+			server_detail_info.id = uuid.uuid4().hex
+		self._servers.setdefault((namespace, server_detail_info.name), {})[
+			server_detail_info.version] = server_detail_info
+
+	def mcp_server(self, name: str, version: str | None = None,
+			namespace: str = DEFAULT_NAMESPACE) -> McpServerDetailInfo | None:
+		"""The stored server, the latest version if ``version`` is None."""
+		versions = self._servers.get((namespace, name))
+		if not versions:
+			return None
+		if version is None:
+			version = next(reversed(versions))
+		return versions.get(version)
+
+	async def get_mcp_server(self, namespace: str,
+			param: GetMcpServerParam) -> McpServerDetailInfo:
+		await self._operation("get_mcp_server")
+		server_detail_info = self.mcp_server(param.mcp_name, param.version,
+											 namespace)
+		if server_detail_info is None:
+			raise NacosException(
+					NOT_FOUND,
+					f"mcp server {param.mcp_name} version {param.version} not found")
+		return server_detail_info.model_copy(deep=True)
+
+	async def release_mcp_server(self, namespace: str,
+			param: ReleaseMcpServerParam) -> str:
+		await self._operation("release_mcp_server")
+		server_spec = param.server_spec
+		version = server_spec.versionDetail.version
+		if self.mcp_server(server_spec.name, version, namespace) is not None:
+			raise NacosException(
+					INVALID_PARAM,
+					f"mcp server {server_spec.name} version {version} already exists")
+		server_detail_info = McpServerDetailInfo.model_validate(
+				server_spec.model_dump())
+		server_detail_info.id = uuid.uuid4().hex
+		server_detail_info.version = version
+		server_detail_info.versionDetail.is_latest = True
+		if param.tool_spec is not None:
+			server_detail_info.toolSpec = param.tool_spec.model_copy(deep=True)
+		endpoint_spec = param.mcp_endpoint_spec
+		if (endpoint_spec is not None
+				and endpoint_spec.type == AIConstants.MCP_ENDPOINT_TYPE_REF):
+			data = endpoint_spec.data
+			if server_detail_info.remoteServerConfig is None:
+				server_detail_info.remoteServerConfig = McpServerRemoteServiceConfig()
+			server_detail_info.remoteServerConfig.serviceRef = McpServiceRef(
+					namespaceId=data.get("namespaceId", namespace),
+					groupName=data.get("groupName", DEFAULT_GROUP),
+					serviceName=data.get("serviceName"),
+					transportProtocol=server_detail_info.protocol)
+		for released in self._servers.get((namespace, server_spec.name),
+										  {}).values():
+			if released.versionDetail is not None:
+				released.versionDetail.is_latest = False
+		self.add_mcp_server(server_detail_info, namespace)
+		return server_detail_info.id
+
+	async def subscribe_mcp_server(self, namespace: str,
+			param: SubscribeMcpServerParam) -> McpServerDetailInfo | None:
+		await self._operation("subscribe_mcp_server")
+		subscribers = self._mcp_subscribers[
+			(namespace, param.mcp_name, param.version)]
+		first = not subscribers
+		subscribers.append(param.subscribe_callback)
+		server_detail_info = self.mcp_server(param.mcp_name, param.version,
+											 namespace)
+		if server_detail_info is None:
+			return None
+		if first:
+			# the sdk queries the server on the first subscription and
+			# notifies the subscribers before returning it
+			await self.push(param.mcp_name, server_detail_info.version,
+							namespace)
+		return server_detail_info.model_copy(deep=True)
+
+	async def unsubscribe_mcp_server(self, namespace: str,
+			param: SubscribeMcpServerParam):
+		await self._operation("unsubscribe_mcp_server")
+		key = (namespace, param.mcp_name, param.version)
+		self._mcp_subscribers[key] = [
+			callback for callback in self._mcp_subscribers[key]
+			if callback != param.subscribe_callback]
+
+	async def push(self, name: str, version: str | None = None,
+			namespace: str = DEFAULT_NAMESPACE) -> int:
+		"""Push the stored server to its subscribers, as nacos does when it
+		changes. Returns the number of callbacks called."""
+		server_detail_info = self.mcp_server(name, version, namespace)
+		if server_detail_info is None:
+			raise KeyError(f"mcp server {name} version {version} not found")
+		callbacks = list(self._mcp_subscribers.get(
+				(namespace, name, server_detail_info.version), ()))
+		if server_detail_info is self.mcp_server(name, None, namespace):
+			callbacks.extend(self._mcp_subscribers.get((namespace, name, None),
+													   ()))
+		for callback in callbacks:
+			try:
+				await callback(server_detail_info.id, namespace, name,
+							   server_detail_info.model_copy(deep=True))
+			except Exception as e:
+				logger.warning(f"Subscriber of mcp server {name} failed: {e}")
+		return len(callbacks)
+
+	async def update_mcp_server(self, name: str,
+			change: Callable[[McpServerDetailInfo], None],
+			version: str | None = None,
+			namespace: str = DEFAULT_NAMESPACE) -> int:
+		"""Apply ``change`` to the stored server, then push it, like an edit
+		in the nacos console."""
+		server_detail_info = self.mcp_server(name, version, namespace)
+		if server_detail_info is None:
+			raise KeyError(f"mcp server {name} version {version} not found")
+		change(server_detail_info)
+		return await self.push(name, server_detail_info.version, namespace)
+
+	async def set_tool_meta(self, name: str, tool_name: str,
+			invoke_context: dict[str, str] | None = None,
+			enabled: bool = True, version: str | None = None,
+			namespace: str = DEFAULT_NAMESPACE) -> int:
+		"""Set the tools meta of one tool and push the server."""
+
+		def change(server_detail_info: McpServerDetailInfo):
+			tool_spec = server_detail_info.toolSpec
+			if tool_spec.toolsMeta is None:
+				tool_spec.toolsMeta = {}
+			tool_spec.toolsMeta[tool_name] = McpToolMeta(
+					invokeContext=invoke_context, enabled=enabled)
+
+		return await self.update_mcp_server(name, change, version, namespace)
+
+	async def push_storm(self, name: str, count: int,
+			interval: float = 0.0,
+			change: Callable[[McpServerDetailInfo, int], None] | None = None,
+			version: str | None = None,
+			namespace: str = DEFAULT_NAMESPACE):
+		"""Push the server ``count`` times, ``interval`` seconds apart.
+
+		``change`` is called with the stored server and the push index
+		before each push, e.g. to edit a tool description each time.
+		"""
+		for index in range(count):
+			if change is not None:
+				await self.update_mcp_server(
+						name, lambda detail: change(detail, index), version,
+						namespace)
+			else:
+				await self.push(name, version, namespace)
+			await asyncio.sleep(interval)
+
+	# service instances
+
+	def instances(self, service_name: str, group_name: str = DEFAULT_GROUP,
+			namespace: str = DEFAULT_NAMESPACE) -> list[Instance]:
+		"""The registered instances of a service, without latency."""
+		return [instance.model_copy(deep=True) for instance in self._instances[
+			(namespace, group_name, service_name)].values()]
+
+	async def _notify_instances(self, key: tuple[str, str, str]):
+		callbacks = list(self._naming_subscribers.get(key, ()))
+		for callback in callbacks:
+			try:
+				await callback(self.instances(key[2], key[1], key[0]))
+			except Exception as e:
+				logger.warning(f"Subscriber of service {key[2]} failed: {e}")
+
+	async def set_instance(self, instance: Instance, service_name: str,
+			group_name: str = DEFAULT_GROUP,
+			namespace: str = DEFAULT_NAMESPACE):
+		"""Add or replace an instance, e.g. to mark it unhealthy, and notify
+		the subscribers of the service."""
+		key = (namespace, group_name, service_name)
+		instance = instance.model_copy(deep=True)
+		instance.serviceName = service_name
+		self._instances[key][(instance.ip, instance.port)] = instance
+		await self._notify_instances(key)
+
+	async def remove_instance(self, ip: str, port: int, service_name: str,
+			group_name: str = DEFAULT_GROUP,
+			namespace: str = DEFAULT_NAMESPACE) -> bool:
+		"""Drop an instance, as nacos does when its client is gone."""
+		key = (namespace, group_name, service_name)
+		if self._instances[key].pop((ip, port), None) is None:
+			return False
+		await self._notify_instances(key)
+		return True
+
+	@staticmethod
+	def _instance_of(request: RegisterInstanceParam) -> Instance:
+		return Instance(ip=request.ip, port=request.port,
+						weight=request.weight, healthy=request.healthy,
+						enabled=request.enabled, ephemeral=request.ephemeral,
+						clusterName=request.cluster_name,
+						metadata=dict(request.metadata or {}))
+
+	async def register_instance(self, namespace: str,
+			request: RegisterInstanceParam) -> bool:
+		await self._operation("register_instance")
+		await self.set_instance(self._instance_of(request),
+								request.service_name,
+								request.group_name or DEFAULT_GROUP, namespace)
+		return True
+
+	async def update_instance(self, namespace: str,
+			request: RegisterInstanceParam) -> bool:
+		await self._operation("update_instance")
+		await self.set_instance(self._instance_of(request),
+								request.service_name,
+								request.group_name or DEFAULT_GROUP, namespace)
+		return True
+
+	async def deregister_instance(self, namespace: str,
+			request: DeregisterInstanceParam) -> bool:
+		await self._operation("deregister_instance")
+		await self.remove_instance(request.ip, request.port,
+								   request.service_name,
+								   request.group_name or DEFAULT_GROUP,
+								   namespace)
+		return True
+
+	async def list_instances(self, namespace: str,
+			request: ListInstanceParam) -> list[Instance]:
+		await self._operation("list_instances")
+		instances = self.instances(request.service_name,
+								   request.group_name or DEFAULT_GROUP,
+								   namespace)
+		# same filter as the nacos sdk, False lists the unhealthy ones
+		if request.healthy_only is not None:
+			instances = [instance for instance in instances
+						 if instance.healthy == request.healthy_only
+						 and instance.enabled and instance.weight > 0]
+		return instances
+
+	async def subscribe(self, namespace: str, request: SubscribeServiceParam):
+		await self._operation("subscribe")
+		self._naming_subscribers[
+			(namespace, request.group_name or DEFAULT_GROUP,
+			 request.service_name)].append(request.subscribe_callback)
+
+	async def unsubscribe(self, namespace: str,
+			request: SubscribeServiceParam):
+		await self._operation("unsubscribe")
+		key = (namespace, request.group_name or DEFAULT_GROUP,
+			   request.service_name)
+		self._naming_subscribers[key] = [
+			callback for callback in self._naming_subscribers[key]
+			if callback != request.subscribe_callback]
+
+
+class FakeAIService:
+	"""The ``NacosAIService`` methods used by the wrapper, served by a
+	FakeNacos in the namespace of the client config."""
+
+	def __init__(self, nacos: FakeNacos, namespace: str):
+		self._nacos = nacos
+		self.namespace_id = namespace
+
+	async def get_mcp_server(self,
+			param: GetMcpServerParam) -> McpServerDetailInfo:
+		return await self._nacos.get_mcp_server(self.namespace_id, param)
+
+	async def release_mcp_server(self, param: ReleaseMcpServerParam) -> str:
+		endpoint_spec = param.mcp_endpoint_spec
+		# checked by the sdk before the request is sent
+		if (endpoint_spec is not None
+				and endpoint_spec.type == AIConstants.MCP_ENDPOINT_TYPE_REF):
+			if "namespaceId" not in endpoint_spec.data:
+				endpoint_spec.data["namespaceId"] = self.namespace_id
+			elif endpoint_spec.data["namespaceId"] != self.namespace_id:
+				raise NacosException(
+						INVALID_PARAM,
+						"mcpEndpointSpec.data.namespaceId is not match")
+		return await self._nacos.release_mcp_server(self.namespace_id, param)
+
+	async def subscribe_mcp_server(self,
+			param: SubscribeMcpServerParam) -> McpServerDetailInfo | None:
+		return await self._nacos.subscribe_mcp_server(self.namespace_id, param)
+
+	async def unsubscribe_mcp_server(self, param: SubscribeMcpServerParam):
+		await self._nacos.unsubscribe_mcp_server(self.namespace_id, param)
+
+	async def shutdown(self):
+		pass
+
+
+class FakeNamingService:
+	"""The ``NacosNamingService`` methods used by the wrapper, served by a
+	FakeNacos in the namespace of the client config."""
+
+	def __init__(self, nacos: FakeNacos, namespace: str):
+		self._nacos = nacos
+		self.namespace_id = namespace
+
+	async def register_instance(self, request: RegisterInstanceParam) -> bool:
+		return await self._nacos.register_instance(self.namespace_id, request)
+
+	async def update_instance(self, request: RegisterInstanceParam) -> bool:
+		return await self._nacos.update_instance(self.namespace_id, request)
+
+	async def deregister_instance(self,
+			request: DeregisterInstanceParam) -> bool:
+		return await self._nacos.deregister_instance(self.namespace_id,
+													 request)
+
+	async def list_instances(self,
+			request: ListInstanceParam) -> list[Instance]:
+		return await self._nacos.list_instances(self.namespace_id, request)
+
+	async def subscribe(self, request: SubscribeServiceParam):
+		await self._nacos.subscribe(self.namespace_id, request)
+
+	async def unsubscribe(self, request: SubscribeServiceParam):
+		await self._nacos.unsubscribe(self.namespace_id, request)
+
+	async def shutdown(self):
+		pass
+
+
+class FakeNacosClients(NacosClients):
+	"""Pool entry whose services are served by a FakeNacos."""
+
+	def __init__(self, nacos: FakeNacos, client_config: ClientConfig):
+		super().__init__(client_config)
+		namespace = client_config.namespace_id or DEFAULT_NAMESPACE
+		self._ai_service = FakeAIService(nacos, namespace)
+		self._naming_service = FakeNamingService(nacos, namespace)
@@ -15,6 +15,10 @@ setup(
 	url="https://github.com/nacos-group/nacos-mcp-wrapper-python",
     license="Apache License 2.0",
 	install_requires=read_requirements(),
+	extras_require={
+		"prometheus": ["prometheus-client"],
+		"opentelemetry": ["opentelemetry-api"],
+	},
     author='nacos',
     description='Python sdk support mcp server auto register to nacos',  # 项目的简短描述
     long_description=open('README.md').read(),  # 项目的详细描述
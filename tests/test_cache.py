@@ -0,0 +1,91 @@
+import asyncio
+import os
+import threading
+
+import mcp.types as types
+import pytest
+
+from nacos_mcp_wrapper.server.cache import ServerDetailCache
+from nacos_mcp_wrapper.server.nacos_server import NacosServer
+from nacos_mcp_wrapper.server.nacos_settings import NacosSettings
+from nacos_mcp_wrapper.testing.fake_nacos import FakeNacos
+
+
+def test_concurrent_saves_leave_a_complete_snapshot(tmp_path):
+	cache = ServerDetailCache(str(tmp_path), "public", "cached", "1.0.0")
+	payloads = [{"writer": index, "schemas": {"tool": "x" * 50000}}
+				for index in range(8)]
+
+	def save(data):
+		for _ in range(20):
+			cache.save(data)
+
+	threads = [threading.Thread(target=save, args=(data,))
+			   for data in payloads]
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join()
+
+	assert cache.load() in payloads
+	assert os.listdir(tmp_path) == [os.path.basename(cache.path)]
+
+
+def test_load_ignores_a_corrupt_snapshot(tmp_path):
+	cache = ServerDetailCache(str(tmp_path), "public", "cached", "1.0.0")
+	with open(cache.path, "w", encoding="utf-8") as f:
+		f.write("{\"schemas\": ")
+
+	assert cache.load() is None
+
+
+def make_server(cache_dir: str) -> NacosServer:
+	nacos_settings = NacosSettings()
+	nacos_settings.SERVER_ADDR = "127.0.0.1:8848"
+	nacos_settings.RECONCILE_INTERVAL = 0
+	nacos_settings.SUBSCRIBE_QUIET_WINDOW = 0
+	nacos_settings.CACHE_DIR = cache_dir
+	server = NacosServer("cached", nacos_settings=nacos_settings,
+						 version="1.0.0")
+
+	@server.list_tools()
+	async def list_tools() -> list[types.Tool]:
+		return [types.Tool(name="get", description="Local description",
+						   inputSchema={"type": "object", "properties": {
+							   "id": {"$ref": "#/$defs/Id"}},
+										"$defs": {"Id": {"type": "string"}}})]
+
+	return server
+
+
+@pytest.mark.anyio
+async def test_cached_descriptions_are_served_before_nacos_answers(tmp_path):
+	fake = FakeNacos()
+	with fake.install():
+		server = make_server(str(tmp_path))
+		await server.register_to_nacos("stdio")
+		assert await server.wait_until_registered(5)
+
+		def change(server_detail_info):
+			server_detail_info.toolSpec.tools[0].description = "From nacos"
+
+		await fake.update_mcp_server("cached", change)
+		await server.flush_subscription_updates()
+		await server.close()
+
+		fake.latencies["get_mcp_server"] = 1.0
+		server = make_server(str(tmp_path))
+		try:
+			loop = asyncio.get_running_loop()
+			start = loop.time()
+			await server.register_to_nacos("stdio")
+
+			assert loop.time() - start < 0.5
+			tool = server._tmp_tools["get"]
+			assert tool.description == "From nacos"
+			assert tool.inputSchema["properties"]["id"] == {"type": "string"}
+			assert not await server.wait_until_registered(0.1)
+			assert await server.wait_until_registered(5)
+			assert fake.calls["get_mcp_server"] == 2
+		finally:
+			await server.close()
@@ -0,0 +1,89 @@
+import asyncio
+import gc
+import weakref
+
+import pytest
+
+from nacos_mcp_wrapper.server.client_pool import NacosClientPool, NacosClients
+from nacos_mcp_wrapper.server.nacos_settings import NacosSettings
+
+
+class RecordingClients(NacosClients):
+
+	def __init__(self, client_config):
+		super().__init__(client_config)
+		self.shutdowns = 0
+		# like the nacos clients, whose tasks reference their loop
+		self.loop = asyncio.get_running_loop()
+
+	async def shutdown(self):
+		self.shutdowns += 1
+
+
+def make_pool() -> NacosClientPool:
+	pool = NacosClientPool()
+	pool.clients_factory = RecordingClients
+	return pool
+
+
+def make_settings(namespace: str = "public") -> NacosSettings:
+	nacos_settings = NacosSettings()
+	nacos_settings.SERVER_ADDR = "127.0.0.1:8848"
+	nacos_settings.NAMESPACE = namespace
+	return nacos_settings
+
+
+@pytest.mark.anyio
+async def test_servers_with_the_same_settings_share_clients():
+	pool = make_pool()
+
+	first = pool.acquire_for(make_settings())
+	second = pool.acquire_for(make_settings())
+	other = pool.acquire_for(make_settings("other"))
+
+	assert first is second
+	assert other is not first
+	assert pool.stats() == {"entries": 2, "refs": 3}
+
+
+@pytest.mark.anyio
+async def test_clients_are_shut_down_with_their_last_server():
+	pool = make_pool()
+	first = pool.acquire_for(make_settings())
+	pool.acquire_for(make_settings())
+
+	await pool.release(first)
+	assert first.shutdowns == 0
+	await pool.release(first)
+
+	assert first.shutdowns == 1
+	assert pool.stats() == {"entries": 0, "refs": 0}
+	assert pool._entries == {}
+	assert pool.acquire_for(make_settings()) is not first
+
+
+def test_each_event_loop_gets_its_own_clients():
+	pool = make_pool()
+
+	async def acquire():
+		return pool.acquire_for(make_settings())
+
+	first = asyncio.run(acquire())
+	second = asyncio.run(acquire())
+
+	assert first is not second
+
+
+def test_entries_of_a_closed_loop_are_dropped():
+	pool = make_pool()
+
+	async def acquire():
+		pool.acquire_for(make_settings())
+		return weakref.ref(asyncio.get_running_loop())
+
+	closed_loop = asyncio.run(acquire())
+
+	# a new loop may get the id of the closed one, it must not get its clients
+	assert pool.stats() == {"entries": 0, "refs": 0}
+	gc.collect()
+	assert closed_loop() is None
@@ -0,0 +1,35 @@
+from v2.nacos.ai.model.mcp.mcp import McpServerDetailInfo, \
+	McpServerRemoteServiceConfig, McpServiceRef
+
+from nacos_mcp_wrapper.server.nacos_server import NacosServer
+from nacos_mcp_wrapper.server.nacos_settings import NacosSettings
+
+
+def make_server(transport_type: str) -> NacosServer:
+	server = NacosServer("compat", nacos_settings=NacosSettings(),
+						 version="1.0.0")
+	server._type = transport_type
+	return server
+
+
+def test_stdio_server_released_without_service_is_compatible():
+	server = make_server("stdio")
+	detail = McpServerDetailInfo(name="compat", version="1.0.0",
+								 protocol="stdio")
+
+	assert server.check_compatible(detail) == (True, "")
+
+
+def test_remote_server_checks_service_ref():
+	server = make_server("mcp-sse")
+	detail = McpServerDetailInfo(
+			name="compat", version="1.0.0", protocol="mcp-sse",
+			remoteServerConfig=McpServerRemoteServiceConfig(
+					serviceRef=McpServiceRef(namespaceId="other",
+											 groupName="DEFAULT_GROUP",
+											 serviceName="compat::1.0.0")))
+
+	is_compatible, error_msg = server.check_compatible(detail)
+
+	assert not is_compatible
+	assert "namespace id not compatible" in error_msg
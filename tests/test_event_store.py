@@ -0,0 +1,103 @@
+import pytest
+from mcp.types import JSONRPCMessage, JSONRPCNotification
+
+from nacos_mcp_wrapper.server import event_store
+from nacos_mcp_wrapper.server.event_store import SqliteEventStore
+
+
+def message(index: int) -> JSONRPCMessage:
+	return JSONRPCMessage(JSONRPCNotification(
+			jsonrpc="2.0", method="notifications/progress",
+			params={"progress": index}))
+
+
+async def replay(store: SqliteEventStore, last_event_id: str):
+	replayed = []
+
+	async def send_callback(event):
+		replayed.append((event.event_id, event.message.root.params["progress"]))
+
+	stream_id = await store.replay_events_after(last_event_id, send_callback)
+	return stream_id, replayed
+
+
+@pytest.mark.anyio
+async def test_replay_returns_the_later_events_of_the_same_stream():
+	store = SqliteEventStore()
+	priming = await store.store_event("a", None)
+	ids = []
+	for index in range(6):
+		ids.append(await store.store_event("ab"[index % 2], message(index)))
+
+	assert ids == sorted(ids)
+	assert await replay(store, priming) == (
+		"a", [(ids[0], 0), (ids[2], 2), (ids[4], 4)])
+	assert await replay(store, ids[1]) == ("b", [(ids[3], 3), (ids[5], 5)])
+	assert await replay(store, ids[5]) == ("b", [])
+	store.close()
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("last_event_id", ["00000000000000000042", "abc", ""])
+async def test_replay_of_an_unknown_event_returns_none(last_event_id):
+	store = SqliteEventStore()
+	await store.store_event("a", message(0))
+
+	assert await replay(store, last_event_id) == (None, [])
+	store.close()
+
+
+@pytest.mark.anyio
+async def test_oldest_events_are_evicted_past_max_events():
+	store = SqliteEventStore(max_events=3, evict_interval=1)
+	ids = [await store.store_event("a", message(index)) for index in range(5)]
+
+	assert await replay(store, ids[0]) == (None, [])
+	assert await replay(store, ids[1]) == (None, [])
+	assert await replay(store, ids[2]) == ("a", [(ids[3], 3), (ids[4], 4)])
+	store.close()
+
+
+@pytest.mark.anyio
+async def test_events_older_than_the_ttl_are_evicted(monkeypatch):
+	now = 1000.0
+	monkeypatch.setattr(event_store.time, "time", lambda: now)
+	store = SqliteEventStore(ttl=60, evict_interval=1)
+	old = await store.store_event("a", message(0))
+	now += 30
+	kept = await store.store_event("a", message(1))
+	now += 40
+	await store.store_event("a", message(2))
+
+	assert await replay(store, old) == (None, [])
+	assert (await replay(store, kept))[0] == "a"
+	store.close()
+
+
+@pytest.mark.anyio
+async def test_events_survive_reopening_the_database(tmp_path):
+	path = str(tmp_path / "events.db")
+	store = SqliteEventStore(path)
+	first = await store.store_event("a", message(0))
+	second = await store.store_event("a", message(1))
+	store.close()
+
+	reopened = SqliteEventStore(path)
+	third = await reopened.store_event("a", message(2))
+
+	assert third > second
+	assert await replay(reopened, first) == ("a", [(second, 1), (third, 2)])
+	reopened.close()
+
+
+@pytest.mark.anyio
+async def test_two_stores_share_one_database(tmp_path):
+	path = str(tmp_path / "events.db")
+	writer = SqliteEventStore(path)
+	reader = SqliteEventStore(path)
+	first = await writer.store_event("a", message(0))
+	second = await writer.store_event("a", message(1))
+
+	assert await replay(reader, first) == ("a", [(second, 1)])
+	writer.close()
+	reader.close()
@@ -0,0 +1,44 @@
+import pytest
+from v2.nacos.ai.model.ai_param import SubscribeMcpServerParam
+from v2.nacos.ai.model.mcp.mcp import McpServerDetailInfo
+
+from nacos_mcp_wrapper.testing.fake_nacos import FakeNacos
+
+
+def subscribe_param(callback, version=None) -> SubscribeMcpServerParam:
+	return SubscribeMcpServerParam(mcp_name="fake", version=version,
+								   subscribe_callback=callback)
+
+
+@pytest.mark.anyio
+async def test_subscribe_notifies_the_subscriber_like_the_sdk():
+	fake = FakeNacos()
+	fake.add_mcp_server(McpServerDetailInfo(name="fake", version="1.0.0",
+											protocol="stdio"))
+	pushed = []
+
+	async def callback(mcp_id, namespace_id, mcp_name, server_detail_info):
+		pushed.append((namespace_id, mcp_name, server_detail_info.version))
+
+	server_detail_info = await fake.subscribe_mcp_server(
+			"public", subscribe_param(callback))
+
+	assert server_detail_info.version == "1.0.0"
+	assert pushed == [("public", "fake", "1.0.0")]
+
+	# the sdk serves the next subscriptions from its cache
+	await fake.subscribe_mcp_server("public", subscribe_param(callback))
+	assert len(pushed) == 1
+
+
+@pytest.mark.anyio
+async def test_subscribe_to_unknown_server_notifies_nothing():
+	fake = FakeNacos()
+	pushed = []
+
+	async def callback(*args):
+		pushed.append(args)
+
+	assert await fake.subscribe_mcp_server(
+			"public", subscribe_param(callback)) is None
+	assert pushed == []
@@ -0,0 +1,139 @@
+import mcp.types as types
+import pytest
+
+from nacos_mcp_wrapper.server import load_report
+from nacos_mcp_wrapper.server.load_report import LoadReporter, LoadTracker, \
+	MIN_WEIGHT
+from nacos_mcp_wrapper.server.nacos_server import NacosServer
+from nacos_mcp_wrapper.server.nacos_settings import NacosSettings
+from nacos_mcp_wrapper.testing.fake_nacos import FakeNacos
+
+
+class Clock:
+
+	def __init__(self):
+		self.now = 100.0
+
+	def __call__(self) -> float:
+		return self.now
+
+
+def make_reporter(monkeypatch, **options) -> tuple[LoadReporter, list, Clock]:
+	clock = Clock()
+	monkeypatch.setattr(load_report.time, "monotonic", clock)
+	updates = []
+
+	async def update(weight, metadata):
+		updates.append(weight)
+
+	options.setdefault("smoothing", 0)
+	reporter = LoadReporter(LoadTracker(), update, in_flight_target=10,
+							**options)
+	return reporter, updates, clock
+
+
+async def report(reporter: LoadReporter, in_flight: int):
+	reporter._tracker.in_flight = in_flight
+	await reporter.report(0.0)
+
+
+@pytest.mark.anyio
+async def test_weight_stays_at_base_up_to_the_targets(monkeypatch):
+	reporter, updates, _ = make_reporter(monkeypatch, base_weight=2.0)
+
+	for in_flight in (0, 5, 10):
+		await report(reporter, in_flight)
+
+	assert reporter.pressure == 1.0
+	assert (reporter.weight, updates) == (2.0, [])
+
+
+@pytest.mark.anyio
+async def test_small_moves_are_suppressed_by_hysteresis(monkeypatch):
+	reporter, updates, _ = make_reporter(monkeypatch, hysteresis=0.2)
+
+	await report(reporter, 12)
+	assert updates == []
+	await report(reporter, 20)
+
+	assert updates == [0.5]
+	assert reporter.weight == 0.5
+
+
+@pytest.mark.anyio
+async def test_updates_are_rate_limited(monkeypatch):
+	reporter, updates, clock = make_reporter(monkeypatch,
+											 min_update_interval=30)
+
+	await report(reporter, 20)
+	clock.now += 10
+	await report(reporter, 40)
+	assert updates == [0.5]
+	clock.now += 20
+	await report(reporter, 40)
+
+	assert updates == [0.5, 0.25]
+
+
+@pytest.mark.anyio
+async def test_return_to_base_weight_bypasses_hysteresis(monkeypatch):
+	reporter, updates, _ = make_reporter(monkeypatch, hysteresis=0.2,
+										 min_update_interval=0)
+
+	await report(reporter, 20)
+	await report(reporter, 11)
+	await report(reporter, 10)
+
+	assert updates == [0.5, 0.91, 1.0]
+
+
+@pytest.mark.anyio
+async def test_weight_never_drops_below_the_floor(monkeypatch):
+	reporter, updates, _ = make_reporter(monkeypatch)
+
+	await report(reporter, 10000)
+
+	assert updates == [MIN_WEIGHT]
+
+
+def test_take_p95_clears_the_samples():
+	tracker = LoadTracker()
+	for index in range(1, 21):
+		tracker.call_started()
+		tracker.call_finished(index / 100)
+
+	assert tracker.take_p95() == 0.19
+	assert tracker.take_p95() == 0.0
+	assert tracker.in_flight == 0
+
+
+@pytest.mark.anyio
+async def test_load_metadata_replaces_the_previous_load():
+	nacos_settings = NacosSettings()
+	nacos_settings.SERVER_ADDR = "127.0.0.1:8848"
+	nacos_settings.SERVICE_IP = "127.0.0.1"
+	nacos_settings.RECONCILE_INTERVAL = 0
+	nacos_settings.SERVICE_META_DATA = {"zone": "a"}
+	server = NacosServer("loaded", nacos_settings=nacos_settings,
+						 version="1.0.0")
+
+	@server.list_tools()
+	async def list_tools() -> list[types.Tool]:
+		return []
+
+	fake = FakeNacos()
+	with fake.install():
+		await server.register_to_nacos("sse", port=18000)
+		try:
+			assert await server.wait_until_registered(5)
+			await server._update_instance_load(0.5, {"load.inFlight": "40",
+													 "load.old": "1"})
+			await server._update_instance_load(0.8, {"load.inFlight": "12"})
+
+			[instance] = fake.instances("loaded::1.0.0")
+			assert instance.weight == 0.8
+			assert {key: value for key, value in instance.metadata.items()
+					if key == "zone" or key.startswith("load.")} == {
+				"zone": "a", "load.inFlight": "12"}
+		finally:
+			await server.close()
@@ -0,0 +1,48 @@
+import mcp.types as types
+import pytest
+
+from nacos_mcp_wrapper.server.metrics import Metrics
+from nacos_mcp_wrapper.server.nacos_server import NacosServer
+from nacos_mcp_wrapper.server.nacos_settings import NacosSettings
+
+
+class RecordingMetrics(Metrics):
+	enabled = True
+
+	def __init__(self):
+		self.tool_calls = []
+
+	def observe_tool_call(self, server: str, tool: str, seconds: float,
+			error: bool):
+		self.tool_calls.append((tool, error))
+
+
+def call(name: str) -> types.CallToolRequest:
+	return types.CallToolRequest(
+			method="tools/call",
+			params=types.CallToolRequestParams(name=name, arguments={}))
+
+
+@pytest.mark.anyio
+async def test_unknown_tool_names_share_one_label():
+	server = NacosServer("metrics", nacos_settings=NacosSettings(),
+						 version="1.0.0")
+	metrics = server._metrics = RecordingMetrics()
+
+	@server.list_tools()
+	async def list_tools() -> list[types.Tool]:
+		return [types.Tool(name="echo", inputSchema={"type": "object"})]
+
+	@server.call_tool()
+	async def call_tool(name: str, arguments: dict):
+		if name != "echo":
+			raise ValueError(f"Unknown tool: {name}")
+		return [types.TextContent(type="text", text="echo")]
+
+	await server.init_tools_tmp()
+	handler = server.request_handlers[types.CallToolRequest]
+	await handler(call("echo"))
+	for index in range(3):
+		await handler(call(f"random-{index}"))
+
+	assert metrics.tool_calls == [("echo", False)] + [("unknown", True)] * 3
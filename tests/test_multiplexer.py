@@ -0,0 +1,101 @@
+import asyncio
+import socket
+
+import pytest
+import uvicorn
+
+from nacos_mcp_wrapper.server.multiplexer import NacosMCPMultiplexer
+from nacos_mcp_wrapper.server.nacos_mcp import NacosMCP
+from nacos_mcp_wrapper.server.nacos_settings import NacosSettings
+from nacos_mcp_wrapper.testing.fake_nacos import FakeNacos
+
+
+class RecordingServer(uvicorn.Server):
+	"""Records the uvicorn servers and what was registered at their start."""
+
+	servers: list["RecordingServer"] = []
+
+	def __init__(self, config):
+		super().__init__(config)
+		self.registered_at_startup = None
+		RecordingServer.servers.append(self)
+
+	async def startup(self, sockets=None):
+		self.registered_at_startup = self.snapshot()
+		await super().startup(sockets)
+
+
+def free_port() -> int:
+	with socket.socket() as sock:
+		sock.bind(("127.0.0.1", 0))
+		return sock.getsockname()[1]
+
+
+def make_mcp(name: str, nacos_settings: NacosSettings) -> NacosMCP:
+	mcp = NacosMCP(name, nacos_settings=nacos_settings.model_copy(),
+				   version="1.0.0")
+
+	@mcp.tool()
+	def echo(text: str) -> str:
+		"""Echo the text"""
+		return text
+
+	return mcp
+
+
+async def serve(multiplexer: NacosMCPMultiplexer, fake: FakeNacos,
+		monkeypatch) -> tuple[RecordingServer, asyncio.Task]:
+	RecordingServer.servers = []
+	RecordingServer.snapshot = staticmethod(lambda: [
+		name for name in ("calculator", "greeter")
+		if fake.instances(f"{name}::1.0.0")])
+	monkeypatch.setattr(uvicorn, "Server", RecordingServer)
+	task = asyncio.create_task(multiplexer.run_async())
+	while not RecordingServer.servers or not RecordingServer.servers[0].started:
+		assert not task.done()
+		await asyncio.sleep(0.01)
+	return RecordingServer.servers[0], task
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("in_background", [False, True])
+async def test_mounted_servers_are_registered_with_their_export_path(
+		in_background, monkeypatch):
+	nacos_settings = NacosSettings()
+	nacos_settings.SERVER_ADDR = "127.0.0.1:8848"
+	nacos_settings.SERVICE_IP = "127.0.0.1"
+	nacos_settings.RECONCILE_INTERVAL = 0
+	nacos_settings.REGISTER_IN_BACKGROUND = in_background
+	calculator = make_mcp("calculator", nacos_settings)
+	greeter = make_mcp("greeter", nacos_settings)
+	port = free_port()
+	multiplexer = NacosMCPMultiplexer(port=port, log_level="warning",
+									  nacos_settings=nacos_settings)
+	multiplexer.mount("/calculator", calculator)
+	multiplexer.mount("/greeter", greeter, transport="sse")
+
+	fake = FakeNacos()
+	with fake.install():
+		server, task = await serve(multiplexer, fake, monkeypatch)
+		try:
+			for mcp in (calculator, greeter):
+				assert await mcp.nacos_server.wait_until_registered(5)
+			if not in_background:
+				assert server.registered_at_startup == ["calculator",
+														  "greeter"]
+
+			for name, export_path in (("calculator", "/calculator/mcp"),
+									  ("greeter", "/greeter/sse")):
+				released = fake.mcp_server(name)
+				assert released.remoteServerConfig.exportPath == export_path
+				assert [(instance.ip, instance.port) for instance in
+						fake.instances(f"{name}::1.0.0")] == [
+					("127.0.0.1", port)]
+			assert calculator.nacos_server._clients is \
+				greeter.nacos_server._clients
+			assert fake.calls["subscribe_mcp_server"] == 2
+		finally:
+			server.should_exit = True
+			await task
+
+	assert fake.instances("calculator::1.0.0") == []
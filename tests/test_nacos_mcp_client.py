@@ -0,0 +1,121 @@
+import asyncio
+import contextlib
+import socket
+
+import httpx
+import pytest
+import uvicorn
+from mcp import McpError
+from mcp.server.fastmcp import FastMCP
+from v2.nacos import Instance
+from v2.nacos.ai.model.mcp.mcp import McpServerDetailInfo, \
+	McpServerRemoteServiceConfig, McpServiceRef
+
+from nacos_mcp_wrapper.client.nacos_mcp_client import NacosMCPClient
+from nacos_mcp_wrapper.server.nacos_settings import NacosSettings
+from nacos_mcp_wrapper.testing.fake_nacos import FakeNacos
+
+SERVER_NAME = "client-test"
+SERVICE_NAME = "client-test::1.0.0"
+
+
+def make_app(release: asyncio.Event):
+	mcp = FastMCP(SERVER_NAME)
+
+	@mcp.tool()
+	async def slow() -> str:
+		await release.wait()
+		return "slow"
+
+	@mcp.tool()
+	async def fast() -> str:
+		return "fast"
+
+	return mcp.streamable_http_app()
+
+
+@contextlib.asynccontextmanager
+async def serve(app):
+	sock = socket.socket()
+	sock.bind(("127.0.0.1", 0))
+	server = uvicorn.Server(uvicorn.Config(app, log_level="warning"))
+	task = asyncio.create_task(server.serve(sockets=[sock]))
+	while not server.started:
+		await asyncio.sleep(0.01)
+	try:
+		yield server, task, sock.getsockname()[1]
+	finally:
+		server.should_exit = True
+		await task
+
+
+async def make_fake(port: int) -> FakeNacos:
+	fake = FakeNacos()
+	fake.add_mcp_server(McpServerDetailInfo(
+			name=SERVER_NAME, version="1.0.0", protocol="mcp-streamable",
+			remoteServerConfig=McpServerRemoteServiceConfig(
+					exportPath="/mcp",
+					serviceRef=McpServiceRef(namespaceId="public",
+											 groupName="DEFAULT_GROUP",
+											 serviceName=SERVICE_NAME))))
+	await fake.set_instance(Instance(ip="127.0.0.1", port=port),
+							SERVICE_NAME)
+	return fake
+
+
+def make_settings() -> NacosSettings:
+	nacos_settings = NacosSettings()
+	nacos_settings.SERVER_ADDR = "127.0.0.1:8848"
+	return nacos_settings
+
+
+@pytest.mark.anyio
+async def test_timed_out_call_does_not_break_the_shared_session():
+	release = asyncio.Event()
+	async with serve(make_app(release)) as (_, _, port):
+		fake = await make_fake(port)
+		with fake.install():
+			async with NacosMCPClient(SERVER_NAME, nacos_settings=make_settings(),
+									  timeout=0.5) as client:
+				await client.list_tools()
+				endpoint = client._endpoints[("127.0.0.1", port)]
+				session = endpoint.sessions[0]
+
+				slow = asyncio.create_task(client.call_tool("slow"))
+				await asyncio.sleep(0.1)
+				fast = await client.call_tool("fast")
+				with pytest.raises(McpError) as exc_info:
+					await slow
+				release.set()
+
+				assert fast.content[0].text == "fast"
+				assert exc_info.value.error.code == httpx.codes.REQUEST_TIMEOUT
+				assert endpoint.ejected_until == 0.0
+				assert endpoint.failures == 0
+				assert endpoint.sessions == [session]
+				assert session.alive
+				assert (await client.call_tool("fast")).content[0].text == "fast"
+				assert endpoint.sessions == [session]
+
+
+@pytest.mark.anyio
+async def test_broken_session_ejects_the_instance():
+	release = asyncio.Event()
+	release.set()
+	async with serve(make_app(release)) as (server, task, port):
+		fake = await make_fake(port)
+		with fake.install():
+			async with NacosMCPClient(SERVER_NAME, nacos_settings=make_settings(),
+									  timeout=0.5, max_attempts=1) as client:
+				await client.list_tools()
+				endpoint = client._endpoints[("127.0.0.1", port)]
+				server.force_exit = True
+				server.should_exit = True
+				await task
+
+				with pytest.raises(Exception):
+					await client.call_tool("fast", idempotent=True)
+
+				assert endpoint.ejected_until > 0
+				assert endpoint.failures == 1
+				assert endpoint.sessions == [] or not endpoint.sessions[0].alive
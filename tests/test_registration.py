@@ -0,0 +1,106 @@
+import mcp.types as types
+import pytest
+
+from nacos_mcp_wrapper.server.nacos_server import NacosServer
+from nacos_mcp_wrapper.server.nacos_settings import NacosSettings
+from nacos_mcp_wrapper.testing.fake_nacos import FakeNacos
+
+SERVER_NAME = "registration"
+SERVICE_NAME = "registration::1.0.0"
+
+
+def make_settings(**settings) -> NacosSettings:
+	nacos_settings = NacosSettings()
+	nacos_settings.SERVER_ADDR = "127.0.0.1:8848"
+	nacos_settings.SERVICE_IP = "127.0.0.1"
+	nacos_settings.REGISTER_RETRY_BASE_DELAY = 0.01
+	nacos_settings.RECONCILE_INTERVAL = 0
+	nacos_settings.SUBSCRIBE_QUIET_WINDOW = 0
+	for key, value in settings.items():
+		setattr(nacos_settings, key, value)
+	return nacos_settings
+
+
+def make_server(nacos_settings: NacosSettings,
+		description: str = "Get an item") -> NacosServer:
+	server = NacosServer(SERVER_NAME, nacos_settings=nacos_settings,
+						 version="1.0.0")
+
+	@server.list_tools()
+	async def list_tools() -> list[types.Tool]:
+		return [types.Tool(name="get", description=description,
+						   inputSchema={"type": "object",
+										"properties": {"id": {"type": "string"}},
+										"required": ["id"]})]
+
+	return server
+
+
+def record_backoff(server: NacosServer) -> list[float]:
+	delays = []
+
+	async def backoff(delay: float):
+		delays.append(delay)
+
+	server._backoff = backoff
+	return delays
+
+
+@pytest.mark.anyio
+async def test_first_registration_releases_and_registers_the_instance():
+	fake = FakeNacos()
+	server = make_server(make_settings())
+	with fake.install():
+		await server.register_to_nacos("sse", port=18000)
+		try:
+			assert await server.wait_until_registered(5)
+			released = fake.mcp_server(SERVER_NAME)
+			assert released.protocol == "mcp-sse"
+			assert [tool.name for tool in released.toolSpec.tools] == ["get"]
+			assert [(instance.ip, instance.port)
+					for instance in fake.instances(SERVICE_NAME)] == [
+				("127.0.0.1", 18000)]
+			assert server.registration_state.status == "registered"
+			assert server.registration_state.attempts == 1
+		finally:
+			await server.close()
+
+
+@pytest.mark.anyio
+async def test_failed_registration_is_retried_with_exponential_backoff():
+	fake = FakeNacos()
+	fake.fail("register_instance", times=3)
+	server = make_server(make_settings(REGISTER_RETRY_BASE_DELAY=1.0,
+									   REGISTER_RETRY_MAX_DELAY=3.0))
+	delays = record_backoff(server)
+	with fake.install():
+		await server.register_to_nacos("sse", port=18000)
+		try:
+			assert server.registration_state.status == "retrying"
+			assert "injected failure" in server.registration_state.last_error
+			assert await server.wait_until_registered(5)
+			assert delays == [1.0, 2.0, 3.0]
+			assert server.registration_state.attempts == 4
+			assert server.registration_state.last_error is None
+			assert fake.calls["register_instance"] == 4
+			assert fake.calls["release_mcp_server"] == 1
+			assert len(fake.instances(SERVICE_NAME)) == 1
+		finally:
+			await server.close()
+
+
+@pytest.mark.anyio
+async def test_failed_registration_without_retry_gives_up():
+	fake = FakeNacos()
+	fake.fail("release_mcp_server")
+	server = make_server(make_settings(REGISTER_RETRY=False))
+	delays = record_backoff(server)
+	with fake.install():
+		await server.register_to_nacos("sse", port=18000)
+		try:
+			assert server.registration_state.status == "failed"
+			assert not await server.wait_until_registered(0.1)
+			assert delays == []
+			assert fake.calls["release_mcp_server"] == 1
+		finally:
+			await server.close()
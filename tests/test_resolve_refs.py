@@ -0,0 +1,148 @@
+import copy
+import json
+from typing import Optional
+
+import jsonref
+import pytest
+from pydantic import BaseModel
+
+from nacos_mcp_wrapper.server import utils
+from nacos_mcp_wrapper.server.utils import jsonref_default, resolve_refs
+
+
+class Address(BaseModel):
+	street: str
+	city: str
+	zip_code: Optional[str] = None
+
+
+class Item(BaseModel):
+	sku: str
+	quantity: int
+
+
+class Order(BaseModel):
+	shipping: Address
+	billing: Optional[Address] = None
+	items: list[Item]
+	notes: dict[str, Address] = {}
+
+
+def jsonref_resolve(schema: dict) -> dict:
+	"""The resolution formerly done by NacosServer.init_tools_tmp."""
+	resolved = jsonref.JsonRef.replace_refs(schema)
+	return json.loads(json.dumps(resolved, default=jsonref_default))
+
+
+SCHEMAS = {
+	"pydantic": Order.model_json_schema(),
+	"no refs": {"type": "object", "properties": {"a": {"type": "string"}}},
+	"definitions": {
+		"type": "object",
+		"properties": {"a": {"$ref": "#/definitions/a"},
+					   "b": {"type": "array",
+							 "items": {"$ref": "#/definitions/a"}}},
+		"definitions": {"a": {"type": "object",
+							  "properties": {"c": {"$ref": "#/definitions/c"}}},
+						"c": {"type": "integer"}},
+	},
+	"ref in combinators": {
+		"type": "object",
+		"properties": {"v": {"anyOf": [{"$ref": "#/$defs/x"}, {"type": "null"}],
+							 "default": None}},
+		"$defs": {"x": {"type": "string", "enum": ["a", "b"]}},
+	},
+}
+
+
+@pytest.mark.parametrize("name", sorted(SCHEMAS))
+def test_resolve_refs_matches_jsonref(name):
+	schema = SCHEMAS[name]
+	original = copy.deepcopy(schema)
+
+	resolved = resolve_refs(schema)
+
+	assert resolved == jsonref_resolve(schema)
+	assert schema == original
+	# resolving twice goes through the memoized definitions
+	assert resolve_refs(schema) == resolved
+
+
+def test_resolved_schema_shares_no_objects():
+	schema = SCHEMAS["definitions"]
+	first = resolve_refs(schema)
+	second = resolve_refs(schema)
+
+	first["properties"]["a"]["properties"]["c"]["type"] = "string"
+	first["properties"]["b"]["items"]["type"] = "array"
+
+	assert second == jsonref_resolve(schema)
+	assert first["properties"]["b"]["items"]["properties"]["c"] == {
+		"type": "integer"}
+
+
+def test_resolve_refs_keeps_cyclic_refs():
+	schema = {
+		"type": "object",
+		"properties": {"root": {"$ref": "#/$defs/node"}},
+		"$defs": {"node": {"type": "object", "properties": {
+			"children": {"type": "array", "items": {"$ref": "#/$defs/node"}}}}},
+	}
+
+	resolved = resolve_refs(schema)
+
+	children = resolved["properties"]["root"]["properties"]["children"]
+	assert children["items"] == {"$ref": "#/$defs/node"}
+	json.dumps(resolved)
+
+
+def test_definitions_shared_by_schemas_are_resolved_once(monkeypatch):
+	monkeypatch.setattr(utils, "_resolved_defs_cache", {})
+	address = {"type": "object", "properties": {
+		"city": {"type": "string"}, "zone": {"$ref": "#/$defs/Zone"}}}
+	zone = {"type": "string", "enum": ["a", "b"]}
+
+	def schema(other: dict) -> dict:
+		return {"type": "object",
+				"properties": {"address": {"$ref": "#/$defs/Address"},
+							   "other": {"$ref": "#/$defs/Other"}},
+				"$defs": {"Address": copy.deepcopy(address),
+						  "Zone": copy.deepcopy(zone), "Other": other}}
+
+	first = schema({"type": "integer"})
+	second = schema({"type": "boolean"})
+	assert resolve_refs(first) == jsonref_resolve(first)
+	assert resolve_refs(second) == jsonref_resolve(second)
+
+	# Address and Zone once, each Other on its own
+	assert sorted(ref for ref, _ in utils._resolved_defs_cache) == [
+		"#/$defs/Address", "#/$defs/Other", "#/$defs/Other", "#/$defs/Zone"]
+
+
+def test_definition_is_not_shared_when_what_it_reaches_differs():
+	def schema(zone: dict) -> dict:
+		return {"type": "object",
+				"properties": {"address": {"$ref": "#/$defs/Address"}},
+				"$defs": {"Address": {"type": "object", "properties": {
+					"zone": {"$ref": "#/$defs/Zone"}}}, "Zone": zone}}
+
+	for zone in ({"type": "string"}, {"type": "integer"}):
+		assert resolve_refs(schema(zone)) == jsonref_resolve(schema(zone))
+
+
+def test_root_ref_keeps_the_definitions_of_its_cyclic_refs():
+	schema = {
+		"$ref": "#/$defs/node",
+		"$defs": {"node": {"type": "object", "properties": {
+			"children": {"type": "array", "items": {"$ref": "#/$defs/node"}}}}},
+	}
+
+	resolved = resolve_refs(schema)
+
+	assert resolved["properties"]["children"]["items"] == {
+		"$ref": "#/$defs/node"}
+	assert "node" in resolved["$defs"]
+
+	acyclic = {"$ref": "#/$defs/x", "$defs": {"x": {"type": "string"}}}
+	assert resolve_refs(acyclic) == jsonref_resolve(acyclic) == {
+		"type": "string"}
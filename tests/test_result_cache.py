@@ -0,0 +1,78 @@
+from v2.nacos.ai.model.mcp.mcp import McpToolMeta
+
+from nacos_mcp_wrapper.server import result_cache
+from nacos_mcp_wrapper.server.result_cache import ToolResultCache, \
+	cache_ttl_from_meta, result_cache_key
+
+
+class Clock:
+
+	def __init__(self):
+		self.now = 100.0
+
+	def __call__(self) -> float:
+		return self.now
+
+
+def test_entries_expire_after_their_ttl(monkeypatch):
+	clock = Clock()
+	monkeypatch.setattr(result_cache.time, "monotonic", clock)
+	cache = ToolResultCache(max_entries=10)
+	key = result_cache_key("get", {"id": 1})
+
+	cache.put(key, "value", ttl=5)
+	clock.now += 4
+	assert cache.get(key) == "value"
+	clock.now += 2
+	assert cache.get(key) is None
+
+	assert len(cache) == 0
+	assert (cache.hits, cache.misses) == (1, 1)
+	assert cache.hit_ratio == 0.5
+
+
+def test_least_recently_used_entry_is_evicted():
+	cache = ToolResultCache(max_entries=2)
+	cache.put("a", 1, ttl=60)
+	cache.put("b", 2, ttl=60)
+	assert cache.get("a") == 1
+
+	cache.put("c", 3, ttl=60)
+
+	assert cache.get("b") is None
+	assert cache.get("a") == 1
+	assert cache.get("c") == 3
+
+
+def test_invalidate_drops_the_results_of_one_tool():
+	cache = ToolResultCache(max_entries=10)
+	cache.put(result_cache_key("get", {"id": 1}), 1, ttl=60)
+	cache.put(result_cache_key("get", {"id": 2}), 2, ttl=60)
+	cache.put(result_cache_key("put", {"id": 1}), 3, ttl=60)
+
+	cache.invalidate("get")
+
+	assert len(cache) == 1
+	assert cache.get(result_cache_key("put", {"id": 1})) == 3
+
+
+def test_key_ignores_argument_order_and_rejects_non_json():
+	assert result_cache_key("get", {"a": 1, "b": 2}) == result_cache_key(
+			"get", {"b": 2, "a": 1})
+	assert result_cache_key("get", None) == result_cache_key("get", {})
+	assert result_cache_key("get", {"a": object()}) is None
+
+
+def test_ttl_is_read_from_the_invoke_context():
+	def meta(**invoke_context):
+		return McpToolMeta(invokeContext=invoke_context)
+
+	assert cache_ttl_from_meta("get", meta(cacheable="true"), 30) == 30
+	assert cache_ttl_from_meta("get", meta(cacheable="true", cacheTtl="5"),
+							   30) == 5
+	assert cache_ttl_from_meta("get", meta(cacheable="false"), 30) is None
+	assert cache_ttl_from_meta("get", meta(cacheable="true", cacheTtl="x"),
+							   30) is None
+	assert cache_ttl_from_meta("get", meta(cacheable="true", cacheTtl="0"),
+							   30) is None
+	assert cache_ttl_from_meta("get", None, 30) is None
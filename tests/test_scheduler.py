@@ -0,0 +1,132 @@
+import asyncio
+
+import mcp.types as types
+import pytest
+
+from nacos_mcp_wrapper.server.nacos_server import NacosServer
+from nacos_mcp_wrapper.server.nacos_settings import NacosSettings
+from nacos_mcp_wrapper.server.scheduler import CoalescingScheduler
+from nacos_mcp_wrapper.testing.fake_nacos import FakeNacos
+
+SCHEMA = {"type": "object",
+		  "properties": {"id": {"type": "string", "description": "Id"}}}
+
+
+def make_server(nacos_settings: NacosSettings) -> NacosServer:
+	server = NacosServer("updates", nacos_settings=nacos_settings,
+						 version="1.0.0")
+
+	@server.list_tools()
+	async def list_tools() -> list[types.Tool]:
+		return [types.Tool(name=name, description=f"Local {name}",
+						   inputSchema=SCHEMA) for name in ("get", "put")]
+
+	return server
+
+
+@pytest.mark.anyio
+async def test_scheduler_applies_the_latest_update_of_a_burst():
+	applied = []
+
+	async def apply(item):
+		applied.append(item)
+
+	scheduler = CoalescingScheduler(apply, quiet_window=0.05, max_delay=1.0)
+	for item in range(10):
+		scheduler.submit(item)
+	assert scheduler.has_pending
+	await asyncio.sleep(0.2)
+
+	assert applied == [9]
+	assert (scheduler.received, scheduler.applied) == (10, 1)
+
+
+@pytest.mark.anyio
+async def test_scheduler_applies_a_long_burst_after_max_delay():
+	applied = []
+
+	async def apply(item):
+		applied.append(item)
+
+	scheduler = CoalescingScheduler(apply, quiet_window=0.05, max_delay=0.1)
+	for item in range(20):
+		scheduler.submit(item)
+		await asyncio.sleep(0.02)
+	await scheduler.flush()
+
+	assert 2 <= len(applied) < 20
+	assert applied[-1] == 19
+	scheduler.close()
+
+
+@pytest.mark.anyio
+async def test_scheduler_applies_do_not_overlap():
+	running = 0
+	overlapped = False
+	applied = []
+
+	async def apply(item):
+		nonlocal running, overlapped
+		running += 1
+		overlapped = overlapped or running > 1
+		await asyncio.sleep(0.02)
+		applied.append(item)
+		running -= 1
+
+	scheduler = CoalescingScheduler(apply)
+	for item in range(5):
+		scheduler.submit(item)
+		await asyncio.sleep(0.005)
+	await scheduler.flush()
+
+	assert not overlapped
+	assert applied[0] == 0 and applied[-1] == 4
+	assert len(applied) < 5
+
+
+@pytest.mark.anyio
+async def test_scheduler_keeps_applying_after_a_failure():
+	applied = []
+
+	async def apply(item):
+		if item == "bad":
+			raise ValueError(item)
+		applied.append(item)
+
+	scheduler = CoalescingScheduler(apply)
+	scheduler.submit("bad")
+	await scheduler.flush()
+	scheduler.submit("good")
+	await scheduler.flush()
+
+	assert applied == ["good"]
+	assert scheduler.applied == 2
+
+
+@pytest.mark.anyio
+async def test_push_storm_is_applied_once():
+	nacos_settings = NacosSettings()
+	nacos_settings.SERVER_ADDR = "127.0.0.1:8848"
+	nacos_settings.RECONCILE_INTERVAL = 0
+	nacos_settings.SUBSCRIBE_QUIET_WINDOW = 0.05
+	nacos_settings.SUBSCRIBE_MAX_DELAY = 5.0
+	server = make_server(nacos_settings)
+	fake = FakeNacos()
+	with fake.install():
+		await server.register_to_nacos("stdio")
+		try:
+			await server.flush_subscription_updates()
+			before = server.subscription_counters
+
+			def change(server_detail_info, index):
+				server_detail_info.toolSpec.tools[0].description = f"revision {index}"
+
+			await fake.push_storm("updates", 20, change=change)
+			await server.flush_subscription_updates()
+
+			counters = server.subscription_counters
+			assert counters["received"] - before["received"] == 20
+			assert counters["applied"] - before["applied"] == 1
+			assert server._tmp_tools["get"].description == "revision 19"
+		finally:
+			await server.close()
@@ -0,0 +1,211 @@
+import copy
+import json
+import random
+
+import pytest
+
+from nacos_mcp_wrapper.server.utils import compare, compare_nodes, diff_nodes
+
+
+def baseline_compare_nodes(origin_node, target_node) -> bool:
+	"""compare_nodes as first released, recursive."""
+	if origin_node is None and target_node is None:
+		return True
+	if origin_node is None or target_node is None:
+		return False
+
+	origin_properties = origin_node.get("properties")
+	target_properties = target_node.get("properties")
+	if (origin_properties is None) != (target_properties is None):
+		return False
+
+	if origin_properties is not None and target_properties is not None:
+		for key, value_node in origin_properties.items():
+			if not isinstance(value_node, dict):
+				continue
+			type_ = value_node.get("type")
+			if not isinstance(type_, str):
+				continue
+			if key not in target_properties:
+				return False
+			target_value_node = target_properties[key]
+			target_type = target_value_node.get("type")
+			if not isinstance(target_type, str):
+				target_type = ""
+			if type_ != target_type:
+				return False
+			if type_ == "object":
+				if not baseline_compare_nodes(value_node, target_value_node):
+					return False
+			elif type_ == "array":
+				origin_items = value_node.get("items")
+				target_items = target_value_node.get("items")
+				if origin_items is not None and target_items is not None:
+					if not baseline_compare_nodes(origin_items, target_items):
+						return False
+		for key in target_properties:
+			if key not in origin_properties:
+				return False
+
+	origin_required = origin_node.get("required")
+	target_required = target_node.get("required")
+	if origin_required is not None and target_required is not None:
+		if not isinstance(origin_required, list) or not isinstance(
+				target_required, list):
+			return False
+		if len(origin_required) != len(target_required):
+			return False
+		if not all(isinstance(node, str) for node in origin_required):
+			return False
+		if not all(isinstance(node, str) for node in target_required):
+			return False
+		return set(origin_required) == set(target_required)
+	return origin_required is None and target_required is None
+
+
+def baseline_compare(origin_node, target_node) -> bool:
+	# compare() turned the errors of malformed schemas into False
+	try:
+		return baseline_compare_nodes(origin_node, target_node)
+	except Exception:
+		return False
+
+
+BASE = {
+	"type": "object",
+	"properties": {
+		"query": {"type": "string"},
+		"limit": {"type": "integer"},
+		"filters": {"type": "object",
+					"properties": {"tags": {"type": "array",
+											"items": {"type": "string"}}},
+					"required": ["tags"]},
+		"points": {"type": "array",
+				   "items": {"type": "object",
+							 "properties": {"x": {"type": "number"}}}},
+		"anything": {},
+	},
+	"required": ["query", "limit"],
+}
+
+
+def mutations() -> list[tuple[str, dict]]:
+	cases = [("identical", copy.deepcopy(BASE))]
+
+	def mutate(name, change):
+		schema = copy.deepcopy(BASE)
+		change(schema)
+		cases.append((name, schema))
+
+	properties = lambda schema: schema["properties"]
+	mutate("type changed",
+		   lambda s: properties(s)["limit"].update(type="number"))
+	mutate("property removed", lambda s: properties(s).pop("query"))
+	mutate("property added",
+		   lambda s: properties(s).update(extra={"type": "string"}))
+	mutate("untyped property removed", lambda s: properties(s).pop("anything"))
+	mutate("nested type changed", lambda s: properties(s)["filters"][
+		"properties"]["tags"].update(type="string"))
+	mutate("array items changed", lambda s: properties(s)["points"]["items"][
+		"properties"]["x"].update(type="string"))
+	mutate("array items removed", lambda s: properties(s)["points"].pop("items"))
+	mutate("required reordered", lambda s: s.update(required=["limit", "query"]))
+	mutate("required changed", lambda s: s.update(required=["query"]))
+	mutate("required removed", lambda s: s.pop("required"))
+	mutate("required not a list", lambda s: s.update(required="query"))
+	mutate("required not strings", lambda s: s.update(required=["query", 1]))
+	mutate("nested required changed",
+		   lambda s: properties(s)["filters"].update(required=[]))
+	mutate("properties removed", lambda s: s.pop("properties"))
+	mutate("property not a schema",
+		   lambda s: properties(s).update(limit="integer"))
+	mutate("description changed", lambda s: properties(s)["query"].update(
+			description="The query"))
+	return cases
+
+
+@pytest.mark.parametrize("name,target", mutations(),
+						 ids=[name for name, _ in mutations()])
+def test_diff_nodes_agrees_with_the_baseline_compare(name, target):
+	for origin_node, target_node in ((BASE, target), (target, BASE)):
+		expected = baseline_compare(origin_node, target_node)
+
+		assert compare_nodes(origin_node, target_node) == expected
+		assert (not diff_nodes(origin_node, target_node,
+							   collect_all=True)) == expected
+		assert compare(json.dumps({"inputSchema": origin_node}),
+					   json.dumps({"inputSchema": target_node})) == expected
+
+
+def random_schema(rng: random.Random, depth: int = 0) -> dict:
+	node = {}
+	if rng.random() < 0.9:
+		node["properties"] = {}
+		for index in range(rng.randint(0, 3)):
+			type_ = rng.choice(["string", "integer", "object", "array", None])
+			if type_ is None:
+				value_node = {}
+			elif type_ == "object" and depth < 3:
+				value_node = random_schema(rng, depth + 1)
+				value_node["type"] = "object"
+			elif type_ == "array" and depth < 3:
+				value_node = {"type": "array"}
+				if rng.random() < 0.8:
+					value_node["items"] = random_schema(rng, depth + 1)
+			else:
+				value_node = {"type": type_ if type_ not in ("object", "array")
+							  else "string"}
+			node["properties"][f"p{index}"] = value_node
+	if rng.random() < 0.7 and node.get("properties"):
+		node["required"] = rng.sample(sorted(node["properties"]),
+									  rng.randint(0, len(node["properties"])))
+	return node
+
+
+def random_mutation(rng: random.Random, schema: dict) -> dict:
+	schema = copy.deepcopy(schema)
+	nodes = [schema]
+	for node in nodes:
+		for value_node in (node.get("properties") or {}).values():
+			nodes.append(value_node)
+			if isinstance(value_node.get("items"), dict):
+				nodes.append(value_node["items"])
+	node = rng.choice(nodes)
+	change = rng.randrange(4)
+	properties = node.get("properties")
+	if change == 0 and properties:
+		properties.pop(rng.choice(sorted(properties)))
+	elif change == 1 and properties:
+		properties[rng.choice(sorted(properties))]["type"] = "boolean"
+	elif change == 2:
+		node.setdefault("properties", {})["new"] = {"type": "string"}
+	else:
+		node["required"] = list(reversed(node.get("required") or []))
+	return schema
+
+
+def test_diff_nodes_agrees_with_the_baseline_compare_on_random_schemas():
+	rng = random.Random(20240501)
+	for _ in range(500):
+		origin_node = random_schema(rng)
+		target_node = random_mutation(rng, origin_node)
+		expected = baseline_compare(origin_node, target_node)
+
+		assert compare_nodes(origin_node, target_node) == expected
+		assert compare_nodes(target_node, origin_node) == baseline_compare(
+				target_node, origin_node)
+		assert compare_nodes(origin_node, copy.deepcopy(origin_node))
+
+
+def test_diff_nodes_reports_every_difference_with_its_path():
+	target = copy.deepcopy(BASE)
+	target["properties"]["limit"]["type"] = "number"
+	target["properties"]["filters"]["properties"]["tags"]["type"] = "string"
+
+	diffs = diff_nodes(BASE, target, collect_all=True)
+
+	assert sorted(str(diff) for diff in diffs) == [
+		"/properties/filters/properties/tags/type: expected 'array', actual 'string'",
+		"/properties/limit/type: expected 'integer', actual 'number'",
+	]
+	assert len(diff_nodes(BASE, target)) == 1
@@ -0,0 +1,51 @@
+import copy
+
+import pytest
+
+from nacos_mcp_wrapper.server.utils import compare_nodes, schema_fingerprint
+
+BASE = {
+	"type": "object",
+	"properties": {
+		"query": {"type": "string", "description": "The query"},
+		"filters": {"type": "object",
+					"properties": {"tags": {"type": "array",
+											"items": {"type": "string"}}},
+					"required": ["tags"]},
+	},
+	"required": ["query", "filters"],
+}
+
+
+def changed(change) -> dict:
+	schema = copy.deepcopy(BASE)
+	change(schema)
+	return schema
+
+
+def test_fingerprint_ignores_what_compare_ignores():
+	fingerprint = schema_fingerprint(BASE)
+
+	assert fingerprint is not None
+	assert schema_fingerprint(copy.deepcopy(BASE)) == fingerprint
+	for target in (
+			changed(lambda s: s["properties"]["query"].pop("description")),
+			changed(lambda s: s.update(required=["filters", "query"])),
+			changed(lambda s: s.update(title="Search")),
+	):
+		assert compare_nodes(BASE, target)
+		assert schema_fingerprint(target) == fingerprint
+
+
+@pytest.mark.parametrize("change", [
+	lambda s: s["properties"]["query"].update(type="integer"),
+	lambda s: s["properties"].pop("query"),
+	lambda s: s["properties"]["filters"]["properties"]["tags"].update(
+			type="string"),
+	lambda s: s.update(required=["query"]),
+])
+def test_fingerprint_changes_with_incompatible_schemas(change):
+	target = changed(change)
+
+	assert not compare_nodes(BASE, target)
+	assert schema_fingerprint(target) != schema_fingerprint(BASE)
@@ -0,0 +1,106 @@
+import socket
+from types import SimpleNamespace
+
+import mcp.types as types
+import psutil
+import pytest
+
+from nacos_mcp_wrapper.server import nacos_server, utils
+from nacos_mcp_wrapper.server.nacos_server import NacosServer
+from nacos_mcp_wrapper.server.nacos_settings import NacosSettings
+from nacos_mcp_wrapper.server.utils import get_first_non_loopback_ip
+from nacos_mcp_wrapper.testing.fake_nacos import FakeNacos
+
+
+class Interfaces:
+	"""Stands in for the interface queries of psutil."""
+
+	def __init__(self, interfaces: dict[str, tuple[str, bool]]):
+		self.interfaces = interfaces
+		self.queries = 0
+
+	def net_if_addrs(self):
+		self.queries += 1
+		return {name: [SimpleNamespace(family=socket.AF_INET, address=ip)]
+				for name, (ip, _) in self.interfaces.items()}
+
+	def net_if_stats(self):
+		return {name: SimpleNamespace(isup=isup)
+				for name, (_, isup) in self.interfaces.items()}
+
+
+@pytest.fixture
+def interfaces(monkeypatch) -> Interfaces:
+	interfaces = Interfaces({
+		"lo": ("127.0.0.1", True),
+		"eth0": ("10.0.0.5", True),
+		"eth1": ("192.168.1.5", True),
+		"docker0": ("172.17.0.1", True),
+	})
+	monkeypatch.delenv("USE_IPV6", raising=False)
+	monkeypatch.setattr(utils, "_discovered_ips", {})
+	monkeypatch.setattr(psutil, "net_if_addrs", interfaces.net_if_addrs)
+	monkeypatch.setattr(psutil, "net_if_stats", interfaces.net_if_stats)
+	return interfaces
+
+
+@pytest.mark.parametrize("preferences,expected", [
+	(None, "10.0.0.5"),
+	("eth1", "192.168.1.5"),
+	("eth1,eth0", "192.168.1.5"),
+	("wlan*, docker*", "172.17.0.1"),
+	("172.16.0.0/12,eth1", "172.17.0.1"),
+	("10.0.0.0/8", "10.0.0.5"),
+	("wlan0,lo", "10.0.0.5"),
+])
+def test_preferences_are_tried_in_order(interfaces, preferences, expected):
+	assert get_first_non_loopback_ip(preferences) == expected
+
+
+def test_preferred_interfaces_that_are_down_are_skipped(interfaces):
+	interfaces.interfaces["eth1"] = ("192.168.1.5", False)
+
+	assert get_first_non_loopback_ip("eth1,eth0") == "10.0.0.5"
+
+
+def test_discovered_ip_is_cached_per_process(interfaces):
+	assert get_first_non_loopback_ip("eth1") == "192.168.1.5"
+	interfaces.interfaces["eth1"] = ("192.168.1.6", True)
+
+	assert get_first_non_loopback_ip("eth1") == "192.168.1.5"
+	assert get_first_non_loopback_ip("eth0") == "10.0.0.5"
+	assert interfaces.queries == 2
+
+
+@pytest.mark.anyio
+async def test_service_ip_is_set_once_resolved(monkeypatch):
+	preferences = []
+
+	def discover(preference):
+		preferences.append(preference)
+		return "10.0.0.5"
+
+	monkeypatch.setattr(nacos_server, "get_first_non_loopback_ip", discover)
+	nacos_settings = NacosSettings()
+	nacos_settings.SERVER_ADDR = "127.0.0.1:8848"
+	nacos_settings.SERVICE_IP_PREFERENCE = "eth0"
+	nacos_settings.RECONCILE_INTERVAL = 0
+	server = NacosServer("addressed", nacos_settings=nacos_settings,
+						 version="1.0.0")
+
+	@server.list_tools()
+	async def list_tools() -> list[types.Tool]:
+		return []
+
+	assert nacos_settings.SERVICE_IP is None
+	fake = FakeNacos()
+	with fake.install():
+		await server.register_to_nacos("sse", port=18000)
+		try:
+			assert await server.wait_until_registered(5)
+			assert nacos_settings.SERVICE_IP == "10.0.0.5"
+			assert preferences == ["eth0"]
+			assert [instance.ip for instance in
+					fake.instances("addressed::1.0.0")] == ["10.0.0.5"]
+		finally:
+			await server.close()
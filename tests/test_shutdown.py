@@ -0,0 +1,84 @@
+import asyncio
+import contextlib
+import signal
+import socket
+
+import pytest
+import uvicorn
+from starlette.applications import Starlette
+
+from nacos_mcp_wrapper.server.shutdown import GracefulShutdown, start_serving
+
+
+class FakeUvicornServer:
+
+	def __init__(self):
+		self.should_exit = False
+		self.force_exit = False
+		self.signals = []
+
+	def handle_exit(self, sig, frame):
+		self.signals.append(sig)
+		self.should_exit = True
+
+
+@pytest.mark.anyio
+async def test_worker_ignores_interrupt_then_stops_once_on_forwarded_term():
+	server = FakeUvicornServer()
+	shutdown = GracefulShutdown(server, [], worker=True)
+
+	# Ctrl-C reaches the worker directly, the parent forwards it as SIGTERM
+	server.handle_exit(signal.SIGINT, None)
+	server.handle_exit(signal.SIGTERM, None)
+	await asyncio.sleep(0)
+	await shutdown._shutdown_task
+
+	assert server.should_exit
+	assert not server.force_exit
+	assert server.signals == []
+
+
+@pytest.mark.anyio
+async def test_signal_after_shutdown_started_goes_to_uvicorn():
+	server = FakeUvicornServer()
+	shutdown = GracefulShutdown(server, [])
+
+	server.handle_exit(signal.SIGINT, None)
+	await asyncio.sleep(0)
+	await shutdown._shutdown_task
+	server.handle_exit(signal.SIGINT, None)
+
+	assert server.signals == [signal.SIGINT]
+
+
+@pytest.mark.anyio
+async def test_start_serving_returns_once_listening():
+	sock = socket.socket()
+	sock.bind(("127.0.0.1", 0))
+	server = uvicorn.Server(uvicorn.Config(Starlette(), log_level="warning"))
+
+	serve_task = await start_serving(server, [sock])
+
+	assert server.started
+	assert not serve_task.done()
+	_, writer = await asyncio.open_connection(*sock.getsockname())
+	writer.close()
+	server.should_exit = True
+	await serve_task
+
+
+@pytest.mark.anyio
+async def test_start_serving_returns_when_the_server_does_not_start():
+	@contextlib.asynccontextmanager
+	async def lifespan(app):
+		raise RuntimeError("startup failed")
+		yield
+
+	server = uvicorn.Server(uvicorn.Config(Starlette(lifespan=lifespan),
+										   port=0, lifespan="on",
+										   log_level="critical"))
+
+	serve_task = await asyncio.wait_for(start_serving(server), 10)
+	await serve_task
+
+	assert not server.started
@@ -0,0 +1,142 @@
+import asyncio
+
+import mcp.types as types
+import pytest
+from mcp.server.fastmcp import Context
+from mcp.server.lowlevel.server import request_ctx
+from v2.nacos.ai.model.mcp.mcp import McpServerDetailInfo, McpTool, \
+	McpToolMeta, McpToolSpecification
+
+from nacos_mcp_wrapper.server.nacos_mcp import NacosMCP
+from nacos_mcp_wrapper.server.nacos_settings import NacosSettings
+from nacos_mcp_wrapper.server.single_flight import SingleFlight
+
+
+@pytest.mark.anyio
+async def test_followers_get_the_result_when_the_first_caller_is_cancelled():
+	single_flight = SingleFlight()
+	release = asyncio.Event()
+	calls = 0
+
+	async def fetch():
+		nonlocal calls
+		calls += 1
+		await release.wait()
+		return "value"
+
+	first = asyncio.create_task(single_flight.run("key", fetch))
+	await asyncio.sleep(0)
+	followers = [asyncio.create_task(single_flight.run("key", fetch))
+				 for _ in range(2)]
+	await asyncio.sleep(0)
+	first.cancel()
+	await asyncio.sleep(0)
+	release.set()
+
+	assert await asyncio.gather(*followers) == ["value", "value"]
+	assert first.cancelled()
+	assert calls == 1
+	assert single_flight.coalesced == 2
+
+
+@pytest.mark.anyio
+async def test_call_is_cancelled_with_its_last_caller():
+	single_flight = SingleFlight()
+	cancelled = asyncio.Event()
+
+	async def fetch():
+		try:
+			await asyncio.sleep(60)
+		except asyncio.CancelledError:
+			cancelled.set()
+			raise
+
+	callers = [asyncio.create_task(single_flight.run("key", fetch))
+			   for _ in range(2)]
+	await asyncio.sleep(0)
+	for caller in callers:
+		caller.cancel()
+	await asyncio.wait_for(cancelled.wait(), 1)
+
+	assert len(single_flight) == 0
+
+
+def mark_single_flight(mcp: NacosMCP, *names: str):
+	server = mcp.nacos_server
+	server.update_tools(McpServerDetailInfo(
+			name=server.name, version=server.version,
+			toolSpec=McpToolSpecification(
+					tools=[McpTool(name=name) for name in names],
+					toolsMeta={name: McpToolMeta(
+							invokeContext={"singleFlight": "true"})
+						for name in names})))
+
+
+def call(name: str) -> types.CallToolRequest:
+	return types.CallToolRequest(
+			method="tools/call",
+			params=types.CallToolRequestParams(name=name,
+											   arguments={"key": "a"}))
+
+
+@pytest.mark.anyio
+async def test_shared_call_runs_without_the_request_context_of_its_first_caller():
+	mcp = NacosMCP("single-flight", nacos_settings=NacosSettings())
+	release = asyncio.Event()
+	seen_contexts = []
+
+	@mcp.tool()
+	async def lookup(key: str) -> str:
+		try:
+			seen_contexts.append(request_ctx.get())
+		except LookupError:
+			seen_contexts.append(None)
+		await release.wait()
+		return f"value of {key}"
+
+	server = mcp.nacos_server
+	await server.init_tools_tmp()
+	mark_single_flight(mcp, "lookup")
+	handler = server.request_handlers[types.CallToolRequest]
+
+	async def call_in_request(request_context):
+		request_ctx.set(request_context)
+		return await handler(call("lookup"))
+
+	first = asyncio.create_task(call_in_request(object()))
+	await asyncio.sleep(0.01)
+	followers = [asyncio.create_task(call_in_request(object()))
+				 for _ in range(2)]
+	await asyncio.sleep(0.01)
+	first.cancel()
+	await asyncio.sleep(0.01)
+	release.set()
+
+	results = await asyncio.gather(*followers)
+	for result in results:
+		assert not result.root.isError
+		assert result.root.content[0].text == "value of a"
+	assert seen_contexts == [None]
+
+
+@pytest.mark.anyio
+async def test_tools_using_the_context_are_not_coalesced():
+	mcp = NacosMCP("single-flight", nacos_settings=NacosSettings())
+	calls = 0
+
+	@mcp.tool()
+	async def report(key: str, ctx: Context) -> str:
+		nonlocal calls
+		calls += 1
+		await asyncio.sleep(0.01)
+		return key
+
+	server = mcp.nacos_server
+	await server.init_tools_tmp()
+	mark_single_flight(mcp, "report")
+	handler = server.request_handlers[types.CallToolRequest]
+
+	await asyncio.gather(handler(call("report")), handler(call("report")))
+
+	assert "report" not in server._single_flight_tools
+	assert calls == 2
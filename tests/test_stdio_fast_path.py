@@ -0,0 +1,64 @@
+import mcp.types as types
+import pytest
+
+from nacos_mcp_wrapper.server.nacos_server import NacosServer
+from nacos_mcp_wrapper.server.nacos_settings import NacosSettings
+from nacos_mcp_wrapper.testing.fake_nacos import FakeNacos
+
+
+def make_server(cache_dir: str, description: str) -> NacosServer:
+	nacos_settings = NacosSettings()
+	nacos_settings.SERVER_ADDR = "127.0.0.1:8848"
+	nacos_settings.RECONCILE_INTERVAL = 0
+	nacos_settings.SUBSCRIBE_QUIET_WINDOW = 0
+	nacos_settings.CACHE_DIR = cache_dir
+	nacos_settings.STDIO_FAST_PATH = True
+	server = NacosServer("stdio-fast-path", nacos_settings=nacos_settings,
+						 version="1.0.0")
+
+	@server.list_tools()
+	async def list_tools() -> list[types.Tool]:
+		return [types.Tool(name="get", description=description,
+						   inputSchema={"type": "object",
+										"properties": {"id": {"type": "string"}},
+										"required": ["id"]})]
+
+	return server
+
+
+async def register_stdio(fake: FakeNacos, cache_dir: str,
+		description: str = "Get an item") -> NacosServer:
+	server = make_server(cache_dir, description)
+	with fake.install():
+		await server.register_to_nacos("stdio")
+		assert await server.wait_until_registered(5)
+	return server
+
+
+@pytest.mark.anyio
+async def test_stdio_fast_path_only_subscribes_when_unchanged(tmp_path):
+	fake = FakeNacos()
+	await (await register_stdio(fake, str(tmp_path))).close()
+	fake.calls.clear()
+
+	server = await register_stdio(fake, str(tmp_path))
+	try:
+		assert dict(fake.calls) == {"subscribe_mcp_server": 1}
+		assert server.registration_state.status == "registered"
+	finally:
+		await server.close()
+
+
+@pytest.mark.anyio
+async def test_stdio_fast_path_checks_nacos_when_the_tools_changed(tmp_path):
+	fake = FakeNacos()
+	await (await register_stdio(fake, str(tmp_path))).close()
+	fake.calls.clear()
+
+	server = await register_stdio(fake, str(tmp_path),
+								  description="Get an item by id")
+	try:
+		assert fake.calls["get_mcp_server"] == 1
+		assert server.registration_state.status == "registered"
+	finally:
+		await server.close()
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+from v2.nacos.ai.model.mcp.mcp import McpToolMeta
+
+from nacos_mcp_wrapper.server.tool_policy import ToolLimiter, ToolPolicy, \
+	ToolRejectedError, ToolTimeoutError
+
+
+def meta(**invoke_context) -> McpToolMeta:
+	return McpToolMeta(invokeContext=invoke_context)
+
+
+def test_policy_is_read_from_the_invoke_context():
+	assert ToolPolicy.from_meta("tool", meta(maxConcurrency="2", maxQueue="0",
+											 timeout="1.5")) == ToolPolicy(
+			max_concurrency=2, max_queue=0, timeout=1.5)
+	assert ToolPolicy.from_meta("tool", meta(maxQueue="3")) is None
+	assert ToolPolicy.from_meta("tool", None) is None
+	assert ToolPolicy.from_meta("tool", meta(maxConcurrency="many",
+											 timeout="-1")) is None
+
+
+@pytest.mark.anyio
+async def test_limiter_caps_concurrency_and_rejects_past_the_queue():
+	limiter = ToolLimiter("tool", ToolPolicy(max_concurrency=2, max_queue=1))
+	release = asyncio.Event()
+	running = 0
+	peak = 0
+
+	async def call(value):
+		nonlocal running, peak
+		running += 1
+		peak = max(peak, running)
+		await release.wait()
+		running -= 1
+		return value
+
+	calls = [asyncio.create_task(limiter.run(call, index)) for index in range(3)]
+	await asyncio.sleep(0.01)
+	assert (limiter.in_flight, limiter.waiting) == (2, 1)
+
+	with pytest.raises(ToolRejectedError):
+		await limiter.run(call, 3)
+
+	release.set()
+	assert await asyncio.gather(*calls) == [0, 1, 2]
+	assert peak == 2
+	assert limiter.rejected == 1
+	assert limiter.admitted == 0
+
+
+@pytest.mark.anyio
+async def test_limiter_timeout_includes_queueing():
+	limiter = ToolLimiter("tool", ToolPolicy(max_concurrency=1, timeout=0.2))
+	release = asyncio.Event()
+
+	async def call(value):
+		await release.wait()
+		return value
+
+	first = asyncio.create_task(limiter.run(call, "first"))
+	await asyncio.sleep(0.1)
+	loop = asyncio.get_running_loop()
+	start = loop.time()
+	with pytest.raises(ToolTimeoutError):
+		# queued until the first call times out, then runs for what is left
+		await limiter.run(call, "queued")
+	elapsed = loop.time() - start
+	with pytest.raises(ToolTimeoutError):
+		await first
+
+	assert elapsed < 0.3
+	assert limiter.timed_out == 2
+	assert (limiter.admitted, limiter.in_flight) == (0, 0)
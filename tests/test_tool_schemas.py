@@ -0,0 +1,54 @@
+import mcp.types as types
+import pytest
+
+from nacos_mcp_wrapper.server import nacos_server
+from nacos_mcp_wrapper.server.nacos_server import NacosServer
+from nacos_mcp_wrapper.server.nacos_settings import NacosSettings
+
+SCHEMA = {
+	"type": "object",
+	"properties": {"item": {"$ref": "#/$defs/item"}},
+	"$defs": {"item": {"type": "object",
+					   "properties": {"name": {"type": "string"}}}},
+}
+
+
+def make_server(cache_dir: str | None = None) -> NacosServer:
+	nacos_settings = NacosSettings()
+	nacos_settings.CACHE_DIR = cache_dir
+	server = NacosServer("schemas", nacos_settings=nacos_settings,
+						 version="1.0.0")
+
+	@server.list_tools()
+	async def list_tools() -> list[types.Tool]:
+		return [types.Tool(name="get", description="Get an item",
+						   inputSchema=SCHEMA)]
+
+	return server
+
+
+@pytest.mark.anyio
+async def test_schemas_are_not_digested_without_cache(monkeypatch):
+	server = make_server()
+
+	def fail(*parts):
+		raise AssertionError("schema digested without cache")
+
+	monkeypatch.setattr(nacos_server, "content_digest", fail)
+	await server.init_tools_tmp()
+
+	schema = server._tmp_tools["get"].inputSchema
+	assert schema["properties"]["item"]["properties"]["name"] == {
+		"type": "string"}
+
+
+@pytest.mark.anyio
+async def test_cached_schema_is_kept_apart_from_the_served_one(tmp_path):
+	server = make_server(str(tmp_path))
+	await server.init_tools_tmp()
+
+	served = server._tmp_tools["get"].inputSchema
+	served["properties"]["item"]["description"] = "from nacos"
+
+	cached = server._schemas_cache["get"]["schema"]
+	assert "description" not in cached["properties"]["item"]
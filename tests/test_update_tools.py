@@ -0,0 +1,69 @@
+import mcp.types as types
+import pytest
+from v2.nacos.ai.model.mcp.mcp import McpServerDetailInfo, McpTool, \
+	McpToolMeta, McpToolSpecification
+
+from nacos_mcp_wrapper.server.nacos_server import NacosServer
+from nacos_mcp_wrapper.server.nacos_settings import NacosSettings
+from nacos_mcp_wrapper.server.utils import content_digest
+
+SCHEMA = {"type": "object",
+		  "properties": {"id": {"type": "string", "description": "Id"}}}
+
+
+def make_server() -> NacosServer:
+	server = NacosServer("updates", nacos_settings=NacosSettings(),
+						 version="1.0.0")
+
+	@server.list_tools()
+	async def list_tools() -> list[types.Tool]:
+		return [types.Tool(name=name, description=f"Local {name}",
+						   inputSchema=SCHEMA) for name in ("get", "put")]
+
+	return server
+
+
+def make_detail(descriptions: dict[str, str],
+		tools_meta: dict[str, McpToolMeta] | None = None) -> McpServerDetailInfo:
+	return McpServerDetailInfo(
+			name="updates", version="1.0.0", protocol="stdio",
+			toolSpec=McpToolSpecification(
+					tools=[McpTool(name=name, description=description,
+								   inputSchema={"type": "object", "properties": {
+									   "id": {"type": "string",
+											  "description": f"{name} id"}}})
+						   for name, description in descriptions.items()],
+					toolsMeta=tools_meta or {}))
+
+
+@pytest.mark.anyio
+async def test_update_tools_only_touches_the_changed_tools():
+	server = make_server()
+	await server.init_tools_tmp()
+
+	descriptions = {"get": "Get an item", "put": "Put an item"}
+	assert server.update_tools(make_detail(descriptions)) == {"get", "put"}
+	assert server.update_tools(make_detail(descriptions)) == set()
+
+	descriptions["put"] = "Store an item"
+	assert server.update_tools(make_detail(descriptions)) == {"put"}
+	assert server._tmp_tools["put"].description == "Store an item"
+	assert server._tmp_tools["get"].description == "Get an item"
+	assert server._tmp_tools["put"].inputSchema["properties"]["id"][
+		"description"] == "put id"
+
+	tools_meta = {"get": McpToolMeta(enabled=False)}
+	assert server.update_tools(make_detail(descriptions, tools_meta)) == {"get"}
+	assert not server.is_tool_enabled("get")
+	assert server.is_tool_enabled("put")
+
+
+@pytest.mark.parametrize("first,second", [
+	((None,), ("",)),
+	((None, "a"), ("", "a")),
+	(("a\0", "b"), ("a", "\0b")),
+	(("ab", ""), ("a", "b")),
+])
+def test_content_digest_keeps_parts_apart(first, second):
+	assert content_digest(*first) != content_digest(*second)
+	assert content_digest(*first) == content_digest(*first)
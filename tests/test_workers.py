@@ -0,0 +1,181 @@
+import asyncio
+import signal
+import socket
+import subprocess
+import sys
+import textwrap
+import time
+
+import psutil
+import pytest
+import uvicorn
+
+from nacos_mcp_wrapper.server.nacos_mcp import NacosMCP
+from nacos_mcp_wrapper.server.nacos_settings import NacosSettings
+from nacos_mcp_wrapper.testing.fake_nacos import FakeNacos
+
+WORKERS = 3
+SERVICE_NAME = "workers::1.0.0"
+
+
+class RecordingServer(uvicorn.Server):
+
+	servers: list["RecordingServer"] = []
+
+	def __init__(self, config):
+		super().__init__(config)
+		RecordingServer.servers.append(self)
+
+
+def free_ports(count: int) -> int:
+	"""First of ``count`` consecutive free ports."""
+	for _ in range(50):
+		with socket.socket() as sock:
+			sock.bind(("127.0.0.1", 0))
+			base = sock.getsockname()[1]
+		if base + count > 65535:
+			continue
+		try:
+			for port in range(base, base + count):
+				with socket.socket() as sock:
+					sock.bind(("127.0.0.1", port))
+		except OSError:
+			continue
+		return base
+	raise RuntimeError("no free port range")
+
+
+def make_settings(**settings) -> NacosSettings:
+	nacos_settings = NacosSettings()
+	nacos_settings.SERVER_ADDR = "127.0.0.1:8848"
+	nacos_settings.SERVICE_IP = "127.0.0.1"
+	nacos_settings.RECONCILE_INTERVAL = 0
+	for key, value in settings.items():
+		setattr(nacos_settings, key, value)
+	return nacos_settings
+
+
+def make_mcp(nacos_settings: NacosSettings, port: int,
+		worker_registration: str) -> NacosMCP:
+	mcp = NacosMCP("workers", version="1.0.0", nacos_settings=nacos_settings,
+				   port=port, log_level="WARNING", stateless_http=True,
+				   workers=WORKERS, worker_registration=worker_registration)
+
+	@mcp.tool()
+	def echo(text: str) -> str:
+		"""Echo the text"""
+		return text
+
+	return mcp
+
+
+async def serve_workers(mcps: list[NacosMCP], socks: list | None,
+		monkeypatch) -> list[asyncio.Task]:
+	"""Serve each NacosMCP as the worker of its index, in this process."""
+	RecordingServer.servers = []
+	monkeypatch.setattr(uvicorn, "Server", RecordingServer)
+	tasks = [asyncio.create_task(mcp._serve_worker(
+			"streamable-http", None, index,
+			None if socks is None else socks[index]))
+		for index, mcp in enumerate(mcps)]
+	while (len(RecordingServer.servers) < len(mcps)
+		   or not all(server.started for server in RecordingServer.servers)):
+		assert not any(task.done() for task in tasks)
+		await asyncio.sleep(0.01)
+	for mcp in mcps:
+		assert await mcp.nacos_server.wait_until_registered(5)
+	return tasks
+
+
+async def stop_workers(tasks: list[asyncio.Task]):
+	for server in RecordingServer.servers:
+		server.should_exit = True
+	await asyncio.gather(*tasks)
+
+
+@pytest.mark.anyio
+async def test_only_the_first_worker_registers_the_shared_instance(
+		monkeypatch):
+	port = free_ports(1)
+	sock = uvicorn.Config(None, host="127.0.0.1", port=port).bind_socket()
+	# forked workers each get their own copy of the settings
+	mcps = [make_mcp(make_settings(), port, "host") for _ in range(WORKERS)]
+	fake = FakeNacos()
+	with fake.install():
+		tasks = await serve_workers(mcps, [sock.dup() for _ in mcps],
+									monkeypatch)
+		try:
+			assert [(instance.ip, instance.port)
+					for instance in fake.instances(SERVICE_NAME)] == [
+				("127.0.0.1", port)]
+			assert fake.calls["register_instance"] == 1
+		finally:
+			await stop_workers(tasks)
+			sock.close()
+
+	assert fake.instances(SERVICE_NAME) == []
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("service_port", [None, 19000])
+async def test_each_worker_registers_its_own_port(service_port, monkeypatch):
+	port = free_ports(WORKERS)
+	# shared, a worker must not change what the next one reads
+	nacos_settings = make_settings(SERVICE_PORT=service_port)
+	mcps = [make_mcp(nacos_settings, port, "worker") for _ in range(WORKERS)]
+	fake = FakeNacos()
+	with fake.install():
+		tasks = await serve_workers(mcps, None, monkeypatch)
+		try:
+			first = service_port or port
+			assert sorted(instance.port for instance in
+						  fake.instances(SERVICE_NAME)) == [
+				first + index for index in range(WORKERS)]
+			assert nacos_settings.SERVICE_PORT == service_port
+		finally:
+			await stop_workers(tasks)
+
+
+def test_metrics_port_is_rejected_with_several_workers():
+	with pytest.raises(ValueError, match="METRICS_PORT"):
+		make_mcp(make_settings(METRICS_PORT=9464), 8000, "worker")
+
+
+def test_workers_are_forked_and_listen_on_their_ports():
+	port = free_ports(WORKERS)
+	script = textwrap.dedent(f"""
+		from nacos_mcp_wrapper.server.nacos_mcp import NacosMCP
+		from nacos_mcp_wrapper.server.nacos_settings import NacosSettings
+		from nacos_mcp_wrapper.testing.fake_nacos import FakeNacos
+
+		nacos_settings = NacosSettings()
+		nacos_settings.SERVER_ADDR = "127.0.0.1:8848"
+		nacos_settings.SERVICE_IP = "127.0.0.1"
+		mcp = NacosMCP("workers", nacos_settings=nacos_settings,
+					   port={port}, log_level="WARNING", workers={WORKERS},
+					   worker_registration="worker")
+		# the forked workers inherit the fake
+		with FakeNacos().install():
+			mcp.run(transport="streamable-http")
+	""")
+	process = subprocess.Popen([sys.executable, "-c", script])
+	try:
+		deadline = time.monotonic() + 30
+		listening = set()
+		while len(listening) < WORKERS:
+			assert process.poll() is None
+			assert time.monotonic() < deadline
+			for worker_port in range(port, port + WORKERS):
+				with socket.socket() as sock:
+					if sock.connect_ex(("127.0.0.1", worker_port)) == 0:
+						listening.add(worker_port)
+			time.sleep(0.1)
+
+		workers = psutil.Process(process.pid).children()
+		assert len(workers) == WORKERS
+	finally:
+		process.send_signal(signal.SIGTERM)
+		returncode = process.wait(30)
+
+	assert returncode == 0
+	assert not any(worker.is_running() for worker in workers)